@@ -1978,6 +1978,18 @@ CREATE TABLE IF NOT EXISTS instance_info
 ) ENGINE = MyISAM
   CHARACTER SET = latin1;
 
+-- id_sequence contains the next id to use for an id field of a table, when METdbLoad
+--   reserves blocks of ids with the id_block_size tag
+DROP TABLE IF EXISTS id_sequence;
+CREATE TABLE IF NOT EXISTS id_sequence
+(
+    id_table VARCHAR(64)     NOT NULL,
+    id_field VARCHAR(64)     NOT NULL,
+    next_id  BIGINT UNSIGNED NOT NULL,
+    PRIMARY KEY (id_table, id_field)
+) ENGINE = MyISAM
+  CHARACTER SET = latin1;
+
 DROP TABLE IF EXISTS model_fcst_lead_offset;
 CREATE TABLE model_fcst_lead_offset
 (
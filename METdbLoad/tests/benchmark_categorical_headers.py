@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark keeping the stat header columns as categoricals.
+
+Writes a stat file with the same mix of line types as benchmark_read_stat.py, reads it
+with ReadDataFiles.read_data with and without categorical_headers, then for each
+prints the memory used by the header columns and the time to read the file, find the
+unique stat headers and merge their ids back into the lines, as write_stat_data does.
+The headers found are checked to be the same both ways. Peak memory of the whole read
+is measured by benchmark_read_memory.py.
+
+Usage: python benchmark_categorical_headers.py [number of lines]
+"""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import os
+import sys
+import random
+import tempfile
+import timeit
+
+import pandas as pd
+
+import constants as CN
+from read_data_files import ReadDataFiles
+from read_load_xml import XmlLoadFile
+from benchmark_read_stat import HEADER, stat_line
+
+
+def read_stat_file(stat_file, categorical_headers):
+    """Read the stat file as a load would."""
+    load_flags = XmlLoadFile(None).flags
+    load_flags['categorical_headers'] = categorical_headers
+    load_flags['load_orank'] = True
+
+    file_data = ReadDataFiles()
+    file_data.read_data(load_flags, [stat_file], [])
+    return file_data.stat_data
+
+
+def unique_headers(stat_data):
+    """Find the unique headers and give them ids, as write_stat_data does."""
+    stat_headers = stat_data[CN.STAT_HEADER_KEYS].copy()
+    stat_headers.drop_duplicates(CN.STAT_HEADER_KEYS[1:], keep='first', inplace=True)
+    stat_headers.reset_index(drop=True, inplace=True)
+    stat_headers[CN.STAT_HEADER_ID] = stat_headers.index + 1
+    return stat_headers
+
+
+def merge_headers(stat_data, stat_headers):
+    """Put the header ids back into the lines, as write_stat_data does."""
+    return pd.merge(left=stat_data, right=stat_headers, on=CN.STAT_HEADER_KEYS[1:])
+
+
+def main():
+    """Write the stat file, then compare reading it with and without categoricals."""
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stat_file = os.path.join(tmp_dir, "benchmark.stat")
+        with open(stat_file, "w", encoding="utf-8") as out_file:
+            out_file.write(HEADER + "\n")
+            for _ in range(num_lines):
+                out_file.write(stat_line(random.choice(["CTC", "CNT", "PCT", "RHIST",
+                                                        "MCTC", "ORANK"])) + "\n")
+
+        print(f"{num_lines} lines, {os.path.getsize(stat_file) / 1024 / 1024:.1f} MB")
+
+        headers = {}
+        for categorical_headers in (False, True):
+            read_seconds = min(timeit.repeat(lambda: read_stat_file(stat_file,
+                                                                    categorical_headers),
+                                             number=1, repeat=2))
+            stat_data = read_stat_file(stat_file, categorical_headers)
+            header_mb = stat_data[CN.STAT_HEADER_CATEGORIES].memory_usage(deep=True).sum() \
+                / 1024 / 1024
+
+            unique_seconds = min(timeit.repeat(lambda: unique_headers(stat_data),
+                                               number=1, repeat=3))
+            stat_headers = unique_headers(stat_data)
+            merge_seconds = min(timeit.repeat(lambda: merge_headers(stat_data, stat_headers),
+                                              number=1, repeat=3))
+            headers[categorical_headers] = stat_headers.astype(str)
+
+            print(f"categorical_headers={categorical_headers}: header columns {header_mb:.0f} MB, "
+                  f"read {read_seconds:.2f} s, unique headers {unique_seconds:.3f} s, "
+                  f"merge {merge_seconds:.3f} s, {len(stat_headers.index)} headers")
+
+        pd.testing.assert_frame_equal(headers[False], headers[True])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Benchmark the peak memory used to read a stat file.
+
+Writes a stat file with the same mix of line types as benchmark_read_stat.py, then reads
+it with ReadDataFiles.read_data in a new process for each tokenizer, with and without
+categorical_headers, so that each run starts with a fresh peak resident set size (RSS). Prints the peak RSS above the RSS
+after imports, per million lines and as a multiple of the size of the file.
+
+Usage: python benchmark_read_memory.py [number of lines]
+"""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import os
+import sys
+import random
+import resource
+import subprocess
+import tempfile
+
+from benchmark_read_stat import HEADER, stat_line
+
+
+def peak_rss_mb():
+    """Peak RSS of this process so far, in MB (ru_maxrss is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read_stat_file(stat_file, fast_tokenizer, categorical_headers):
+    """Read the stat file as a load would, and print the RSS before and after."""
+    # pylint:disable=import-outside-toplevel
+    from read_data_files import ReadDataFiles
+    from read_load_xml import XmlLoadFile
+
+    load_flags = XmlLoadFile(None).flags
+    load_flags['fast_tokenizer'] = fast_tokenizer
+    load_flags['categorical_headers'] = categorical_headers
+    load_flags['load_orank'] = True
+    start_mb = peak_rss_mb()
+
+    file_data = ReadDataFiles()
+    file_data.read_data(load_flags, [stat_file], [])
+
+    print(start_mb, peak_rss_mb(), len(file_data.stat_data.index))
+
+
+def main():
+    """Write the stat file, then read it in a new process with each set of flags."""
+    if len(sys.argv) > 2 and sys.argv[1] == '--read':
+        read_stat_file(sys.argv[2], sys.argv[3] == 'True', sys.argv[4] == 'True')
+        return
+
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stat_file = os.path.join(tmp_dir, "benchmark.stat")
+        with open(stat_file, "w", encoding="utf-8") as out_file:
+            out_file.write(HEADER + "\n")
+            for _ in range(num_lines):
+                out_file.write(stat_line(random.choice(["CTC", "CNT", "PCT", "RHIST",
+                                                        "MCTC", "ORANK"])) + "\n")
+
+        size_mb = os.path.getsize(stat_file) / 1024 / 1024
+        print(f"{num_lines} lines, {size_mb:.1f} MB")
+
+        for fast_tokenizer, categorical_headers in ((False, False), (True, False),
+                                                    (False, True), (True, True)):
+            result = subprocess.run([sys.executable, __file__, '--read', stat_file,
+                                     str(fast_tokenizer), str(categorical_headers)],
+                                    capture_output=True, check=True, text=True)
+            start_mb, end_mb, read_lines = result.stdout.split()[-3:]
+            used_mb = float(end_mb) - float(start_mb)
+            assert int(read_lines) == num_lines
+            print(f"fast_tokenizer={fast_tokenizer} categorical_headers={categorical_headers}: "
+                  f"peak {used_mb:.0f} MB above start, "
+                  f"{used_mb / num_lines * 1e6:.0f} MB per million lines, "
+                  f"{used_mb / size_mb:.1f} x file size")
+
+
+if __name__ == '__main__':
+    main()
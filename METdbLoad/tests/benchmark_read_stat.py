@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark the default and fast tokenizers used to read stat files.
+
+Writes a stat file with a mix of fixed and variable length line types, then times
+ReadDataFiles.read_stat with each tokenizer and checks the results are the same.
+
+Usage: python benchmark_read_stat.py [number of lines]
+"""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import os
+import sys
+import random
+import tempfile
+import timeit
+
+import pandas as pd
+
+import constants as CN
+from read_data_files import ReadDataFiles
+
+HEADER = ("VERSION MODEL DESC FCST_LEAD FCST_VALID_BEG FCST_VALID_END OBS_LEAD "
+          "OBS_VALID_BEG OBS_VALID_END FCST_VAR FCST_UNITS FCST_LEV OBS_VAR OBS_UNITS "
+          "OBS_LEV OBTYPE VX_MASK INTERP_MTHD INTERP_PNTS FCST_THRESH OBS_THRESH "
+          "COV_THRESH ALPHA LINE_TYPE")
+
+
+def stat_line(line_type):
+    """Make one stat line of the given line type, with random values."""
+    header = ("V11.0.0 GFS NA 120000 20230101_120000 20230101_120000 000000 "
+              "20230101_120000 20230101_120000 TMP K Z2 TMP K Z2 ADPSFC " +
+              random.choice(["FULL", "EAST", "WEST"]) + " NEAREST 1 >273.0 >273.0 NA NA " +
+              line_type)
+    if line_type == "CTC":
+        values = "100 10 20 30 40 0.5"
+    elif line_type == "PCT":
+        n_thresh = random.choice([3, 6, 11])
+        values = f"100 {n_thresh} " + " ".join(f"{i / (n_thresh - 1):.2f} 4 6"
+                                                for i in range(n_thresh - 1)) + " 1.0"
+    elif line_type == "RHIST":
+        n_rank = random.choice([11, 21, 31])
+        values = f"100 {n_rank} " + " ".join("3" for _ in range(n_rank))
+    elif line_type == "MCTC":
+        n_cat = random.choice([2, 3, 4])
+        values = f"100 {n_cat} " + " ".join("7" for _ in range(n_cat * n_cat)) + " 0.5"
+    elif line_type == "ORANK":
+        n_ens = random.choice([5, 10, 20])
+        values = (f"100 1 07225 32.1 -97.2 NA 150 281.5 {random.randint(1, n_ens + 1)} {n_ens} " +
+                  " ".join(f"{280 + random.random():.3f}" for _ in range(n_ens)) +
+                  " NA 281.1 NA NA 0 0 0.5 NA")
+    else:
+        values = "100 " + " ".join(f"{random.random():.5f}" for _ in range(80))
+    return header + " " + values
+
+
+def main():
+    """Write the stat file, then time reading it with each tokenizer."""
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stat_file = os.path.join(tmp_dir, "benchmark.stat")
+        with open(stat_file, "w", encoding="utf-8") as out_file:
+            out_file.write(HEADER + "\n")
+            for _ in range(num_lines):
+                out_file.write(stat_line(random.choice(["CTC", "CNT", "PCT", "RHIST",
+                                                        "MCTC", "ORANK"])) + "\n")
+
+        hdr_names = CN.LONG_HEADER + CN.COL_NUMS
+        size_mb = os.path.getsize(stat_file) / 1024 / 1024
+        print(f"{num_lines} lines, {size_mb:.1f} MB")
+
+        pd.testing.assert_frame_equal(ReadDataFiles.read_stat(stat_file, hdr_names),
+                                      ReadDataFiles.read_stat(stat_file, hdr_names,
+                                                              fast_tokenizer=True))
+
+        for fast_tokenizer in (False, True):
+            seconds = min(timeit.repeat(lambda: ReadDataFiles.read_stat(stat_file, hdr_names,
+                                                                        fast_tokenizer=fast_tokenizer),
+                                        number=1, repeat=3))
+            print(f"fast_tokenizer={fast_tokenizer}: {seconds:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Benchmark formatting CNT line data as CSV for LOAD DATA.
+
+Makes a CNT line data frame with the columns and types that write_stat_data passes to
+write_to_sql, checks that DataFrame.to_csv and RunSql.write_csv give the same text,
+then times each of them writing all of the lines.
+
+Usage: python benchmark_write_csv.py [number of lines]
+"""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import io
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import constants as CN
+from run_sql import RunSql
+
+
+def cnt_data(num_lines):
+    """Make CNT line data with random values, some of them not available."""
+    rng = np.random.default_rng(0)
+    valid_times = pd.Timestamp('2023-01-01 12:00:00') + \
+        pd.to_timedelta(rng.integers(0, 240, num_lines) * 3600, unit='s')
+    line_data = pd.DataFrame({CN.STAT_HEADER_ID: rng.integers(1, 5000, num_lines),
+                              CN.DATA_FILE_ID: rng.integers(1, 100, num_lines),
+                              CN.LINE_NUM: np.arange(num_lines) + 2,
+                              CN.FCST_LEAD: rng.choice([0, 60000, 120000], num_lines),
+                              CN.FCST_VALID_BEG: valid_times,
+                              CN.FCST_VALID_END: valid_times,
+                              CN.FCST_INIT_BEG: valid_times - pd.Timedelta(hours=6),
+                              CN.OBS_LEAD: 0,
+                              CN.OBS_VALID_BEG: valid_times,
+                              CN.OBS_VALID_END: valid_times,
+                              CN.ALPHA: '0.05'})
+
+    # the stat values are read as text, the second one is a number
+    stat_values = {}
+    for col_name in CN.LINE_DATA_COLS[CN.CNT][len(line_data.columns):]:
+        values = np.round(rng.random(num_lines) * 100, 4)
+        if col_name == '1':
+            stat_values[col_name] = values
+        else:
+            text = values.astype(str).astype(object)
+            text[rng.random(num_lines) < 0.1] = None
+            stat_values[col_name] = text
+    return pd.concat([line_data, pd.DataFrame(stat_values)], axis=1)
+
+
+def to_csv_file(line_data, col_list, csv_file):
+    """Format the line data with to_csv, as write_to_sql used to."""
+    line_data[col_list].to_csv(csv_file, na_rep=CN.MV_NOTAV, index=False, header=False,
+                               sep=CN.SEP)
+
+
+def write_csv_file(line_data, col_list, csv_file):
+    """Format the line data with RunSql.write_csv."""
+    RunSql.write_csv(line_data, col_list, csv_file)
+
+
+def main():
+    """Make the CNT line data, check that both ways give the same text for the first
+    lines, then time writing all of the lines both ways."""
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    line_data = cnt_data(num_lines)
+    col_list = CN.LINE_DATA_COLS[CN.CNT]
+    print(f"{num_lines} CNT lines, {len(col_list)} columns")
+
+    check_data = line_data.iloc[0:100000]
+    csv_texts = []
+    for write_file in (to_csv_file, write_csv_file):
+        csv_file = io.StringIO()
+        write_file(check_data, col_list, csv_file)
+        csv_texts.append(csv_file.getvalue())
+    assert csv_texts[0] == csv_texts[1]
+
+    with open(os.devnull, 'w', encoding='utf-8', newline='') as csv_file:
+        for name, write_file in (("to_csv", to_csv_file), ("write_csv", write_csv_file)):
+            seconds = min(timeit.repeat(lambda: write_file(line_data, col_list, csv_file),
+                                        number=1, repeat=2))
+            print(f"{name}: {seconds:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Benchmark putting data_file_ids into the line data of a set of files.
+
+Makes line data for sets of files with the same number of lines per file, then times
+WriteFileSql.set_data_file_ids, and the scan per file that it replaced, for each set.
+The time per line should stay about the same as the number of files grows.
+
+Usage: python benchmark_write_file_sql.py [number of lines per file]
+"""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import constants as CN
+from write_file_sql import WriteFileSql
+
+
+def scan_per_file(data_files, line_data):
+    """Set the data_file_ids with one scan of the line data per file."""
+    for _, row in data_files.iterrows():
+        line_data.loc[line_data[CN.FILE_ROW] == row[CN.FILE_ROW],
+                      CN.DATA_FILE_ID] = row[CN.DATA_FILE_ID]
+
+
+def main():
+    """Time both ways of setting the ids for 25, 50 and 100 files."""
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    for num_files in (25, 50, 100):
+        data_files = pd.DataFrame({CN.FILE_ROW: np.arange(num_files),
+                                   CN.DATA_FILE_ID: np.arange(num_files) + 1000})
+        line_data = pd.DataFrame({CN.FILE_ROW: np.repeat(np.arange(num_files), num_lines),
+                                  CN.LINE_NUM: np.tile(np.arange(num_lines) + 2, num_files)})
+
+        map_data = line_data.copy()
+        map_seconds = min(timeit.repeat(lambda: WriteFileSql.set_data_file_ids(data_files,
+                                                                               [map_data]),
+                                        number=1, repeat=3))
+        scan_data = line_data.copy()
+        scan_seconds = min(timeit.repeat(lambda: scan_per_file(data_files, scan_data),
+                                         number=1, repeat=1))
+        assert (map_data[CN.DATA_FILE_ID] == scan_data[CN.DATA_FILE_ID]).all()
+
+        num_rows = num_files * num_lines
+        print(f"{num_files} files x {num_lines} lines: "
+              f"map {map_seconds:.3f} s ({map_seconds / num_rows * 1e9:.1f} ns/line), "
+              f"scan per file {scan_seconds:.3f} s ({scan_seconds / num_rows * 1e9:.1f} ns/line)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Test adding the revision lines of MTD 2D revision files."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import numpy as np
+import pandas as pd
+
+import constants as CN
+from read_data_files import ReadDataFiles
+
+REV_FIELDS = [CN.AREA, CN.CENTROID_X, CN.CENTROID_Y, CN.CENTROID_LAT, CN.CENTROID_LON,
+              CN.INTENSITY_10, CN.INTENSITY_25, CN.INTENSITY_50, CN.INTENSITY_75,
+              CN.INTENSITY_90]
+
+
+def make_lines(obj_ids):
+    """Make one line per object id, with different values in each field."""
+    num_lines = len(obj_ids)
+    mtd_file = pd.DataFrame({CN.OBJECT_ID: obj_ids,
+                             CN.FCST_VAR: 'APCP', CN.OBS_VAR: 'APCP',
+                             CN.AXIS_ANG: np.arange(num_lines) * 2.5,
+                             CN.REVISION_ID: CN.MV_NULL,
+                             CN.LINENUMBER: np.arange(num_lines) + 2})
+    for field_num, rev_field in enumerate(REV_FIELDS):
+        mtd_file[rev_field] = (np.arange(num_lines) ** 2 + field_num).astype(float)
+    return mtd_file
+
+
+def test_add_revisions():
+    """Each line after the first of a run of more than 2 lines of an object gets a REV_ line
+       with the change from the line before, and each such run gets the next revision id."""
+    obj_ids = ['F001', 'F001', 'F001', 'F002', 'F002', 'F003', 'F003', 'F003']
+    mtd_file = make_lines(obj_ids)
+    all_lines = ReadDataFiles.add_revisions(mtd_file.copy())
+
+    assert len(all_lines.index) == 12
+    pd.testing.assert_frame_equal(all_lines.iloc[:8], mtd_file, check_dtype=False)
+
+    # each field of line n is n ** 2 plus a number for the field, so the change from the
+    # line before is 2 * n - 1 for lines 1, 2, 6 and 7
+    expected_lines = pd.DataFrame({CN.OBJECT_ID: ['F001', 'F001', 'F003', 'F003'],
+                                   CN.FCST_VAR: 'REV_APCP', CN.OBS_VAR: 'REV_APCP',
+                                   CN.AXIS_ANG: CN.MV_NOTAV,
+                                   CN.REVISION_ID: [1, 1, 2, 2],
+                                   CN.LINENUMBER: 0})
+    for rev_field in REV_FIELDS:
+        expected_lines[rev_field] = [1.0, 3.0, 11.0, 13.0]
+    pd.testing.assert_frame_equal(all_lines.iloc[8:].reset_index(drop=True), expected_lines,
+                                  check_dtype=False)
+
+    # runs next to each other get their own revision ids
+    rev_lines = ReadDataFiles.add_revisions(make_lines(['F001'] * 3 + ['F002'] * 4)).iloc[7:]
+    assert rev_lines[CN.REVISION_ID].tolist() == [1, 1, 2, 2, 2]
+
+
+def test_short_runs():
+    """Runs of 1 or 2 lines, including a run at the end of the file, get no REV_ lines."""
+    mtd_file = make_lines(['F001', 'F002', 'F002', 'F001', 'F003', 'F003'])
+    pd.testing.assert_frame_equal(ReadDataFiles.add_revisions(mtd_file.copy()), mtd_file)
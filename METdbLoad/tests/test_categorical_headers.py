@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Test reading stat files with the header columns kept as categoricals."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import os
+
+import pandas as pd
+
+import constants as CN
+from read_data_files import ReadDataFiles
+from read_load_xml import XmlLoadFile
+
+STAT_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'METreformat', 'test', 'data',
+                         'point_stat', 'point_stat_FV3_GFS_v15p2_CONUS_25km_NDAS_ADPSFC_'
+                         '010000L_20190615_010000V.stat')
+
+
+def test_same_values(tmp_path):
+    """Several files read with categorical_headers have the same values as without."""
+    load_files = []
+    for model in ('GFS', 'WRF'):
+        load_file = str(tmp_path / f'point_stat_{model}.stat')
+        with open(STAT_FILE, encoding='utf-8') as stat_file:
+            stat_text = stat_file.read()
+        with open(load_file, 'w', encoding='utf-8') as copy_file:
+            copy_file.write(stat_text.replace('FV3_GFS_v15p2_CONUS_25km', model))
+        load_files.append(load_file)
+
+    stat_data = []
+    for categorical_headers in (False, True):
+        flags = XmlLoadFile(None).flags
+        flags['categorical_headers'] = categorical_headers
+        file_data = ReadDataFiles()
+        file_data.read_data(flags, load_files, [])
+        stat_data.append(file_data.stat_data)
+
+    category_cols = [col_name for col_name in stat_data[1]
+                     if isinstance(stat_data[1][col_name].dtype, pd.CategoricalDtype)]
+    assert set(category_cols) == set(CN.STAT_HEADER_CATEGORIES)
+    assert stat_data[1][CN.MODEL].cat.categories.tolist() == ['GFS', 'WRF']
+    pd.testing.assert_frame_equal(stat_data[1].astype({col_name: object
+                                                       for col_name in category_cols}),
+                                  stat_data[0])
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Test skipping unchanged files with the manifest, with SQLite standing in for MySQL."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import os
+import sqlite3
+
+import constants as CN
+from file_manifest import FileManifest
+from read_data_files import ReadDataFiles
+
+
+def make_files(tmp_path, num_files):
+    """Make some data files, and a data_file table holding them with ids up to num_files."""
+    load_files = []
+    for file_num in range(num_files):
+        data_file = tmp_path / f'point_stat_{file_num}.stat'
+        data_file.write_text('VERSION MODEL\n')
+        load_files.append(str(data_file))
+
+    db_conn = sqlite3.connect(':memory:')
+    db_conn.execute("CREATE TABLE data_file (data_file_id INTEGER, filename TEXT, path TEXT)")
+    db_conn.executemany("INSERT INTO data_file VALUES (?, ?, ?)",
+                        [(file_id + 1, os.path.basename(load_file), str(tmp_path))
+                         for file_id, load_file in enumerate(load_files)])
+    return load_files, db_conn
+
+
+def file_stats(load_files):
+    """Find the type, size and modification time of the files, as read_xml does."""
+    return {load_file: ReadDataFiles.file_stat(load_file) for load_file in load_files}
+
+
+def test_unchanged_files_skipped(tmp_path):
+    """Files loaded before are skipped, unless their size or modification time changed."""
+    load_files, db_conn = make_files(tmp_path, 3)
+    manifest_file = str(tmp_path / 'manifest.sqlite')
+
+    manifest = FileManifest()
+    manifest.load(manifest_file, db_conn.cursor())
+    assert manifest.new_files(load_files, file_stats(load_files)) == load_files
+    manifest.add_files({load_files[0]: 1, load_files[1]: 2})
+    manifest.save(manifest_file)
+
+    with open(load_files[1], 'a', encoding='utf-8') as data_file:
+        data_file.write('V11.0 WRF\n')
+
+    manifest = FileManifest()
+    manifest.load(manifest_file, db_conn.cursor())
+    assert manifest.new_files(load_files, file_stats(load_files)) == load_files[1:]
+
+    stat_info = os.stat(load_files[0])
+    os.utime(load_files[0], ns=(stat_info.st_atime_ns, stat_info.st_mtime_ns + 10 ** 9))
+    assert manifest.new_files(load_files, file_stats(load_files)) == load_files
+
+
+def test_rebuilt_database(tmp_path, monkeypatch):
+    """Files are not skipped if the data_file table no longer has them with their ids."""
+    load_files, db_conn = make_files(tmp_path, 3)
+    manifest_file = str(tmp_path / 'manifest.sqlite')
+
+    manifest = FileManifest()
+    manifest.new_files(load_files, file_stats(load_files))
+    manifest.add_files({load_files[0]: 1, load_files[1]: 2, load_files[2]: 3})
+    manifest.save(manifest_file)
+
+    db_conn.execute("DELETE FROM data_file WHERE data_file_id = 2")
+    db_conn.execute("UPDATE data_file SET filename = 'grid_stat.stat' WHERE data_file_id = 3")
+
+    monkeypatch.setattr(CN, 'IDS_PER_QUERY', 2)
+    manifest = FileManifest()
+    manifest.load(manifest_file, db_conn.cursor())
+    assert manifest.new_files(load_files, file_stats(load_files)) == load_files[1:]
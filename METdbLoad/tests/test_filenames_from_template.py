@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Test finding the files to load, with their type, size and modification time."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import os
+
+import constants as CN
+from read_load_xml import XmlLoadFile
+
+
+def test_filenames_from_template(tmp_path):
+    """MET files are found in directory order, without other files or missing directories."""
+    for model in ('GFS', 'WRF'):
+        for valid in ('2023010100', '2023010112'):
+            file_dir = tmp_path / model / valid
+            file_dir.mkdir(parents=True)
+            (file_dir / 'point_stat.stat').write_text('')
+            (file_dir / 'mode_obj.txt').write_text('')
+            (file_dir / 'notes.txt').write_text('')
+            (file_dir / 'old.stat').mkdir()
+
+    folder_template = os.path.join(str(tmp_path), '{model}', '{valid}')
+    template_fills = {'model': ['GFS', 'NAM', 'WRF'], 'valid': ['2023010100', '2023010112'],
+                      'unused': ['x']}
+
+    for scan_workers in (1, 4):
+        load_files = [load_file for load_file, _ in
+                      XmlLoadFile.filenames_from_template(folder_template,
+                                                          dict(template_fills),
+                                                          scan_workers)]
+        assert [os.path.relpath(os.path.dirname(load_file), tmp_path)
+                for load_file in load_files[::2]] == \
+            ['GFS/2023010100', 'GFS/2023010112', 'WRF/2023010100', 'WRF/2023010112']
+        assert sorted(os.path.basename(load_file) for load_file in load_files[:2]) == \
+            ['mode_obj.txt', 'point_stat.stat']
+        assert len(load_files) == 8
+
+
+def test_discover_files(tmp_path):
+    """Files of types not loaded, empty files and files that are not MET files are dropped."""
+    for file_name, file_text in (('point_stat.stat', 'VERSION\n'), ('empty.stat', ''),
+                                 ('mode_obj.txt', 'VERSION\n'), ('notes.txt', 'VERSION\n'),
+                                 ('track.tcst', 'VERSION\n')):
+        (tmp_path / file_name).write_text(file_text)
+
+    xml_loadfile = XmlLoadFile(None)
+    xml_loadfile.flags['load_mode'] = False
+    xml_loadfile.load_files = [str(tmp_path / file_name) for file_name in
+                               ('point_stat.stat', 'empty.stat', 'mode_obj.txt', 'notes.txt',
+                                'track.tcst', 'missing.stat')]
+    xml_loadfile.discover_files()
+
+    assert [os.path.basename(load_file) for load_file in xml_loadfile.load_files] == \
+        ['point_stat.stat', 'track.tcst', 'missing.stat']
+    assert xml_loadfile.file_stats[str(tmp_path / 'point_stat.stat')][:2] == (CN.STAT, 8)
+    assert str(tmp_path / 'missing.stat') not in xml_loadfile.file_stats
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Test matching stat headers when the temporary header table cannot be created."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import pandas as pd
+import pymysql
+
+import constants as CN
+from write_stat_sql import WriteStatSql
+
+
+class HeaderCursor:
+    """Cursor without permission to create temporary tables, holding one stat header."""
+
+    def __init__(self, stat_header):
+        self.stat_header = stat_header
+        self.queries = []
+        self.rowcount = 0
+        self.result = None
+
+    def execute(self, query, args=None):
+        """Fail to create the temporary table, or look a header up in stat_header."""
+        self.queries.append(query)
+        if query == CN.CREATE_TMP_HEADER:
+            raise pymysql.err.OperationalError(1044, 'Access denied')
+        if query == CN.Q_HEADER:
+            self.result = self.stat_header.get(tuple(args))
+            self.rowcount = int(self.result is not None)
+
+    def fetchone(self):
+        """Return the id found by the last query."""
+        return (self.result,)
+
+
+def test_query_each_header():
+    """Each header is looked up on its own, and the temporary table is dropped after."""
+    stat_headers = pd.DataFrame([['V11.0', f'model{row_num}'] + ['NA'] *
+                                 (len(CN.STAT_HEADER_KEYS) - 2) for row_num in range(3)],
+                                columns=CN.STAT_HEADER_KEYS, index=[4, 7, 9])
+    sql_cur = HeaderCursor({tuple(stat_headers.loc[7, CN.STAT_HEADER_KEYS[1:]]): 42})
+
+    assert WriteStatSql.get_existing_headers(stat_headers, '/tmp', sql_cur, 'OFF') == {7: 42}
+    assert sql_cur.queries.count(CN.Q_HEADER) == 3
+    assert sql_cur.queries[-1] == CN.DROP_TMP_HEADER
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Test pulling the repeating variables out of variable length stat lines."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import numpy as np
+import pandas as pd
+
+import constants as CN
+from write_stat_sql import WriteStatSql
+
+NUM_FIELDS = 12
+
+
+def make_lines(var_counts, ec_values=None):
+    """Make lines with var_counts sets of repeats, numbered so each field is different."""
+    lines = []
+    for row_num, var_count in enumerate(var_counts):
+        width = var_count * var_count if ec_values is not None else var_count * 3
+        fields = [var_count] + [100 * row_num + field for field in range(width)]
+        if ec_values is not None:
+            fields.append(ec_values[row_num])
+        lines.append(['V11.0', 5, 20 + row_num] + fields +
+                     [np.nan] * (NUM_FIELDS - len(fields)))
+    return pd.DataFrame(lines, columns=[CN.VERSION, CN.DATA_FILE_ID, CN.LINE_DATA_ID] +
+                        [str(field) for field in range(1, NUM_FIELDS + 1)])
+
+
+def expand_each_line(line_type, line_data):
+    """Expand the lines one at a time, as write_stat_data did before get_var_data."""
+    list_var = []
+    var_index = line_data.columns.get_loc(CN.LINE_VAR_COUNTER[line_type]) + 1
+    for row_num, file_line in line_data.iterrows():
+        var_count = int(file_line[CN.LINE_VAR_COUNTER[line_type]])
+        basic_count = var_count
+        if line_type == CN.MCTC:
+            var_count = var_count * var_count
+        var_repeats = CN.LINE_VAR_REPEATS[line_type]
+        repeat_width = int(var_count * var_repeats)
+
+        var_data = pd.DataFrame(file_line.iloc[var_index:var_index + repeat_width].values.
+                                reshape(var_count, var_repeats))
+        var_data.insert(0, CN.LINE_DATA_ID, file_line[CN.LINE_DATA_ID])
+        var_data.insert(1, 'i_value', var_data.index + 1)
+
+        if line_type == CN.MCTC:
+            var_data.loc[:, 'i_value'] = \
+                np.repeat(np.array(range(1, basic_count + 1)), basic_count)
+            var_data.insert(2, 'j_value', np.resize(range(1, basic_count + 1), var_count))
+            if pd.isna(line_data.iloc[row_num, var_index + repeat_width]):
+                line_data.iloc[row_num, var_index + repeat_width] = \
+                    1/line_data.iloc[row_num, var_index - 1]
+            line_data.iloc[row_num, var_index] = \
+                line_data.iloc[row_num, var_index + repeat_width]
+
+        list_var.append(var_data)
+    return line_data, pd.concat(list_var, ignore_index=True, sort=False)
+
+
+def check_same(line_type, line_data):
+    """get_var_data gives the same lines and variables as expanding each line."""
+    each_lines, each_var = expand_each_line(line_type, line_data.copy())
+    block_lines, block_var = WriteStatSql.get_var_data(line_type, line_data.copy(), None, None)
+    pd.testing.assert_frame_equal(block_lines, each_lines)
+    pd.testing.assert_frame_equal(block_var, each_var)
+
+
+def line_frame(versions, fields, num_fields):
+    """Make one line for each version, with its fields padded with NaN to num_fields."""
+    lines = [[version, 5, 20 + row_num] + line_fields +
+             [np.nan] * (num_fields - len(line_fields))
+             for row_num, (version, line_fields) in enumerate(zip(versions, fields))]
+    return pd.DataFrame(lines, columns=[CN.VERSION, CN.DATA_FILE_ID, CN.LINE_DATA_ID] +
+                        [str(field) for field in range(1, num_fields + 1)])
+
+
+def var_frame(var_rows):
+    """Make the expected variable data, with the values in columns 0, 1, ..."""
+    return pd.DataFrame(var_rows, columns=[CN.LINE_DATA_ID, 'i_value'] +
+                        list(range(len(var_rows[0]) - 2)))
+
+
+def check_expected(line_type, line_data, expected_lines, expected_var):
+    """get_var_data gives the expected lines and variables."""
+    block_lines, block_var = WriteStatSql.get_var_data(line_type, line_data, None, None)
+    pd.testing.assert_frame_equal(block_lines, expected_lines, check_dtype=False)
+    pd.testing.assert_frame_equal(block_var, expected_var, check_dtype=False)
+
+
+def test_pct():
+    """PCT lines with different numbers of thresholds are kept in line order."""
+    check_same(CN.PCT, make_lines([2, 3, 2, 1]))
+
+    line_data = make_lines([2, 1])
+    expected_var = var_frame([[20, 1, 0, 1, 2], [20, 2, 3, 4, 5], [21, 1, 100, 101, 102]])
+    check_expected(CN.PCT, line_data, line_data.copy(), expected_var)
+
+
+def test_mctc():
+    """MCTC lines get i and j counters, and a missing ec_value is filled in."""
+    check_same(CN.MCTC, make_lines([2, 3, 2], ec_values=[0.25, np.nan, np.nan]))
+
+    # the ec_value of 1/n_cat is put in place of the first count, as well as at the end
+    line_data = make_lines([2], ec_values=[np.nan])
+    expected_lines = line_data.copy()
+    expected_lines[['2', '6']] = 0.5
+    expected_var = pd.DataFrame([[20, 1, 1, 0], [20, 1, 2, 1], [20, 2, 1, 2], [20, 2, 2, 3]],
+                                columns=[CN.LINE_DATA_ID, 'i_value', 'j_value', 0])
+    check_expected(CN.MCTC, line_data, expected_lines, expected_var)
+
+
+def test_rhist_old_versions():
+    """Old RHIST lines count ranks from the third field, after 2 to 4 ECNT fields, and the
+       ranks are blanked in the line."""
+    versions = ['V4.2', 'V5.1', 'V6.0', 'V12.0']
+    line_data = line_frame(versions, [[10, 0.5, 2, 7, 3],
+                                      [11, 0.5, 2, 0.1, 4, 6],
+                                      [12, 0.5, 3, 0.1, 0.2, 1, 2, 5],
+                                      [2, 8, 9]], 8)
+    expected_lines = line_frame(versions, [[10, 0.5, 2, CN.MV_NOTAV, CN.MV_NOTAV],
+                                           [11, 0.5, 2, 0.1, CN.MV_NOTAV, CN.MV_NOTAV],
+                                           [12, 0.5, 3, 0.1, 0.2] + [CN.MV_NOTAV] * 3,
+                                           [2, 8, 9]], 8)
+    expected_var = var_frame([[20, 1, 7], [20, 2, 3],
+                              [21, 1, 4], [21, 2, 6],
+                              [22, 1, 1], [22, 2, 2], [22, 3, 5],
+                              [23, 1, 8], [23, 2, 9]])
+    check_expected(CN.RHIST, line_data, expected_lines, expected_var)
+
+
+def test_pstd_versions():
+    """PSTD thresholds start 10 fields after n_thresh, and are blanked in the line unless
+       the version is V01."""
+    versions = ['V12.0', 'V01']
+    stats = list(range(101, 111))
+    line_data = line_frame(versions, [[2] + stats + [0.3, 0.6], [1] + stats + [0.5]], 13)
+    expected_lines = line_frame(versions, [[2] + stats + [CN.MV_NOTAV] * 2,
+                                           [1] + stats + [0.5]], 13)
+    expected_var = var_frame([[20, 1, 0.3], [20, 2, 0.6], [21, 1, 0.5]])
+    check_expected(CN.PSTD, line_data, expected_lines, expected_var)
+
+
+def test_orank_shift():
+    """The 7 ORANK fields after the ensemble values move left to follow n_ens."""
+    first_fields = list(range(1, 11))
+    line_data = line_frame(['V12.0'] * 2,
+                           [first_fields + [3, 31, 32, 33] + list(range(41, 48)),
+                            first_fields + [2, 31, 32] + list(range(51, 58))], 21)
+    expected_lines = line_frame(['V12.0'] * 2,
+                                [first_fields + [3] + list(range(41, 48)) + [45, 46, 47],
+                                 first_fields + [2] + list(range(51, 58)) + [56, 57]], 21)
+    expected_var = var_frame([[20, 1, 31], [20, 2, 32], [20, 3, 33],
+                              [21, 1, 31], [21, 2, 32]])
+    check_expected(CN.ORANK, line_data, expected_lines, expected_var)
+
+
+def test_pjc_prc():
+    """PJC and PRC lines have 1 set of values fewer than n_thresh."""
+    pjc_values = list(range(11, 25))
+    line_data = line_frame(['V12.0'], [[3] + pjc_values], 15)
+    expected_var = var_frame([[20, 1] + pjc_values[0:7], [20, 2] + pjc_values[7:14]])
+    check_expected(CN.PJC, line_data, line_data.copy(), expected_var)
+
+    prc_values = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+    line_data = line_frame(['V12.0', 'V12.0'], [[3] + prc_values[0:6], [4] + prc_values], 10)
+    expected_var = var_frame([[20, 1, 0.1, 0.2, 0.3], [20, 2, 0.4, 0.5, 0.6],
+                              [21, 1, 0.1, 0.2, 0.3], [21, 2, 0.4, 0.5, 0.6],
+                              [21, 3, 0.7, 0.8, 0.9]])
+    check_expected(CN.PRC, line_data, line_data.copy(), expected_var)
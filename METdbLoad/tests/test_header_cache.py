@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Test keeping header ids between loads, with SQLite standing in for MySQL."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import os
+import sqlite3
+
+import pandas as pd
+
+import constants as CN
+from header_cache import HeaderCache
+
+KEY_FIELDS = CN.HEADER_CACHE_KEYS[CN.TCST_HEADER]
+
+
+def make_headers(storm_ids):
+    """Make tcst headers, one for each storm id, with ids from 1."""
+    tcst_headers = pd.DataFrame({key_field: 'NA' for key_field in KEY_FIELDS},
+                                index=range(len(storm_ids)))
+    tcst_headers[CN.STORM_ID] = storm_ids
+    tcst_headers[CN.STORM_NAME] = None
+    tcst_headers[CN.TCST_HEADER_ID] = tcst_headers.index + 1
+    return tcst_headers
+
+
+def make_database(tcst_headers):
+    """Make a tcst_header table holding the headers."""
+    db_conn = sqlite3.connect(':memory:')
+    db_conn.execute("CREATE TABLE tcst_header (tcst_header_id INTEGER, " +
+                    ", ".join(KEY_FIELDS) + ")")
+    db_conn.executemany("INSERT INTO tcst_header VALUES (" +
+                        ", ".join(["?"] * (len(KEY_FIELDS) + 1)) + ")",
+                        tcst_headers[[CN.TCST_HEADER_ID] + KEY_FIELDS].values.tolist())
+    return db_conn
+
+
+def save_cache(tmp_path, tcst_headers):
+    """Save the ids of the headers to a cache file."""
+    cache_file = str(tmp_path / 'headers.sqlite')
+    header_cache = HeaderCache(10)
+    header_cache.add_ids(CN.TCST_HEADER, tcst_headers, KEY_FIELDS, CN.TCST_HEADER_ID)
+    header_cache.save(cache_file)
+    return cache_file
+
+
+def test_same_headers(tmp_path, monkeypatch):
+    """Saved ids are used when the headers in the database have the same key fields."""
+    tcst_headers = make_headers(['AL012023', 'AL022023', 'EP012023'])
+    cache_file = save_cache(tmp_path, tcst_headers)
+    db_conn = make_database(tcst_headers)
+
+    monkeypatch.setattr(CN, 'IDS_PER_QUERY', 2)
+    header_cache = HeaderCache(10)
+    header_cache.load(cache_file, db_conn.cursor())
+    assert header_cache.get_ids(CN.TCST_HEADER, tcst_headers.iloc[::-1], KEY_FIELDS) == \
+        {2: 3, 1: 2, 0: 1}
+
+
+def test_id_of_other_header(tmp_path):
+    """No ids are used, and the file is removed, if an id now belongs to another header."""
+    tcst_headers = make_headers(['AL012023', 'AL022023'])
+    cache_file = save_cache(tmp_path, tcst_headers)
+    db_conn = make_database(make_headers(['AL022023', 'AL012023']))
+
+    header_cache = HeaderCache(10)
+    header_cache.load(cache_file, db_conn.cursor())
+    assert not header_cache.header_ids
+    assert not os.path.exists(cache_file)
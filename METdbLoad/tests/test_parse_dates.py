@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Test converting columns of dates with ReadDataFiles.parse_dates."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import numpy as np
+import pandas as pd
+
+import constants as CN
+from read_data_files import ReadDataFiles
+
+
+def test_same_as_to_datetime():
+    """Dates are the same as from pd.to_datetime, including missing and bad dates."""
+    ReadDataFiles.date_cache.clear()
+    for dates in (['20230101_120000', '20230101_180000', '20230101_120000', np.nan],
+                  ['20230101_120000', CN.MV_NULL],
+                  []):
+        column = pd.Series(dates, dtype=object, index=range(5, 5 + len(dates)), name='valid')
+        pd.testing.assert_series_equal(ReadDataFiles.parse_dates(column),
+                                       pd.to_datetime(column, format=CN.MET_DATE_FORMAT,
+                                                      errors='ignore'))
+
+
+def test_cache_overflow(monkeypatch):
+    """A column with dates from a full cache and new dates is still converted."""
+    monkeypatch.setattr(CN, 'DATE_CACHE_SIZE', 3)
+    ReadDataFiles.date_cache.clear()
+
+    first = pd.Series(['20230101_000000', '20230101_060000'], dtype=object)
+    ReadDataFiles.parse_dates(first)
+
+    column = pd.Series(['20230101_000000', '20230101_060000', '20230101_120000',
+                        '20230101_180000'], dtype=object)
+    pd.testing.assert_series_equal(ReadDataFiles.parse_dates(column),
+                                   pd.to_datetime(column, format=CN.MET_DATE_FORMAT))
+    assert len(ReadDataFiles.date_cache[CN.MET_DATE_FORMAT]) <= 3
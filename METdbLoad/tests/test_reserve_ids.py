@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Test reserving blocks of ids for concurrent loads, with SQLite standing in for MySQL."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import sqlite3
+import sys
+import threading
+
+import constants as CN
+from run_sql import RunSql
+
+
+class SqliteCursor:
+    """Cursor that runs the MySQL statements of reserve_ids on SQLite."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cur = connection.cursor()
+        self.last_insert_id = None
+        self.result = None
+
+    def execute(self, query, args=()):
+        """Run a query, keeping the next_id set by an UPDATE as LAST_INSERT_ID does."""
+        if query == CN.Q_LAST_INSERT_ID:
+            self.result = (self.last_insert_id,)
+            return
+        query = query.replace('%s', '?').replace('INSERT IGNORE', 'INSERT OR IGNORE')
+        if query.startswith('UPDATE id_sequence'):
+            query = query.replace('LAST_INSERT_ID(', '(').replace('GREATEST(', 'MAX(') + \
+                ' RETURNING next_id'
+            self.last_insert_id = self.cur.execute(query, args).fetchone()[0]
+            return
+        self.result = self.cur.execute(query, args).fetchone()
+
+    def fetchone(self):
+        """Return the row found by the last query."""
+        return self.result
+
+
+def test_interleaved_reservations(monkeypatch):
+    """Two loads taking ids in turn never get the same id, though ids are not in order."""
+    db_conn = sqlite3.connect(':memory:')
+    db_conn.execute("CREATE TABLE id_sequence (id_table TEXT, id_field TEXT, next_id INTEGER, "
+                    "PRIMARY KEY (id_table, id_field))")
+    db_conn.execute("CREATE TABLE stat_header (stat_header_id INTEGER)")
+    db_conn.executemany("INSERT INTO stat_header VALUES (?)", [(1,), (2,)])
+    monkeypatch.setattr(RunSql, 'id_block_size', 10)
+
+    load_blocks = [{}, {}]
+    reserved = [[], []]
+    for load_num, id_count in ((0, 4), (1, 4), (0, 4), (1, 8), (0, 4), (1, 3)):
+        # each load keeps its own blocks
+        monkeypatch.setattr(RunSql, 'id_blocks', load_blocks[load_num])
+        next_id = RunSql.get_next_id(CN.STAT_HEADER, CN.STAT_HEADER_ID,
+                                     SqliteCursor(db_conn), id_count)
+        reserved[load_num].extend(range(next_id, next_id + id_count))
+
+    assert reserved[0] == list(range(3, 11)) + list(range(33, 37))
+    assert reserved[1] == list(range(13, 17)) + list(range(23, 31)) + list(range(43, 46))
+    assert not set(reserved[0]) & set(reserved[1])
+    # the first load takes ids from 7 after the other load took ids from 13, so an id
+    # larger than next_id does not mark a new row
+    assert reserved[0][4] == 7 and reserved[1][0] == 13
+
+
+def test_load_without_blocks(monkeypatch):
+    """A block reserved after a load without id blocks starts after the ids it wrote."""
+    db_conn = sqlite3.connect(':memory:')
+    db_conn.execute("CREATE TABLE id_sequence (id_table TEXT, id_field TEXT, next_id INTEGER, "
+                    "PRIMARY KEY (id_table, id_field))")
+    db_conn.execute("CREATE TABLE stat_header (stat_header_id INTEGER)")
+    monkeypatch.setattr(RunSql, 'id_block_size', 10)
+    monkeypatch.setattr(RunSql, 'id_blocks', {})
+
+    assert RunSql.get_next_id(CN.STAT_HEADER, CN.STAT_HEADER_ID, SqliteCursor(db_conn), 4) == 1
+    db_conn.executemany("INSERT INTO stat_header VALUES (?)", [(1,), (2,), (3,), (4,)])
+
+    # a load without id blocks writes ids after the largest one in the table
+    monkeypatch.setattr(RunSql, 'id_block_size', 0)
+    next_id = RunSql.get_next_id(CN.STAT_HEADER, CN.STAT_HEADER_ID, SqliteCursor(db_conn), 20)
+    assert next_id == 5
+    db_conn.executemany("INSERT INTO stat_header VALUES (?)",
+                        [(header_id,) for header_id in range(next_id, next_id + 20)])
+
+    # the next load with id blocks does not reuse ids 11 to 24
+    monkeypatch.setattr(RunSql, 'id_block_size', 10)
+    monkeypatch.setattr(RunSql, 'id_blocks', {})
+    assert RunSql.get_next_id(CN.STAT_HEADER, CN.STAT_HEADER_ID, SqliteCursor(db_conn), 4) == 25
+    assert RunSql.get_next_id(CN.STAT_HEADER, CN.STAT_HEADER_ID, SqliteCursor(db_conn), 4) == 29
+
+
+def test_writer_threads(monkeypatch):
+    """Writer threads sharing the blocks of one load never get the same ids."""
+    db_conn = sqlite3.connect(':memory:', check_same_thread=False)
+    db_conn.execute("CREATE TABLE id_sequence (id_table TEXT, id_field TEXT, next_id INTEGER, "
+                    "PRIMARY KEY (id_table, id_field))")
+    db_conn.execute("CREATE TABLE line_data_pct (line_data_id INTEGER)")
+    monkeypatch.setattr(RunSql, 'id_block_size', 1000)
+    monkeypatch.setattr(RunSql, 'id_blocks', {})
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    db_lock = threading.Lock()
+    reserved = [[] for _ in range(4)]
+
+    class LockedCursor(SqliteCursor):
+        """Cursor on the shared connection, used by one thread at a time."""
+
+        def execute(self, query, args=()):
+            with db_lock:
+                super().execute(query, args)
+
+    def take_ids(thread_num):
+        sql_cur = LockedCursor(db_conn)
+        for _ in range(2000):
+            next_id = RunSql.get_next_id('line_data_pct', CN.LINE_DATA_ID, sql_cur, 3)
+            reserved[thread_num].extend(range(next_id, next_id + 3))
+
+    try:
+        threads = [threading.Thread(target=take_ids, args=(num,)) for num in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    all_ids = [next_id for thread_ids in reserved for next_id in thread_ids]
+    assert len(all_ids) == 4 * 2000 * 3
+    assert len(set(all_ids)) == len(all_ids)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test the pool of database connections, with SQLite standing in for MySQL."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import sqlite3
+import threading
+
+from run_sql import RunSqlPool
+
+
+def make_pool(tmp_path, pool_size):
+    """Make a pool of connections to a SQLite file with one table."""
+    connection = {'db_database': str(tmp_path / 'pool.sqlite')}
+    with sqlite3.connect(connection['db_database']) as conn:
+        conn.execute("CREATE TABLE line_data (thread_num INTEGER)")
+    conn.close()
+    return RunSqlPool(connection, pool_size,
+                      connect=lambda conn_info: sqlite3.connect(conn_info['db_database'],
+                                                                check_same_thread=False),
+                      db_error=sqlite3.Error)
+
+
+def test_thread_cursors(tmp_path):
+    """Each thread gets its own cursor, and connections are reused after release."""
+    pool = make_pool(tmp_path, 2)
+    barrier = threading.Barrier(2)
+    thread_conns = []
+
+    def write_rows(thread_num):
+        sql_cur = pool.cursor()
+        assert pool.cursor() is sql_cur
+        thread_conns.append(pool.thread_data.conn)
+        barrier.wait()
+        sql_cur.execute("INSERT INTO line_data VALUES (?)", [thread_num])
+        pool.release()
+
+    for _ in range(2):
+        threads = [threading.Thread(target=write_rows, args=(num,)) for num in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert pool.open_count == 2
+    assert len(set(map(id, thread_conns))) == 2
+
+    sql_cur = pool.cursor()
+    sql_cur.execute("SELECT COUNT(*) FROM line_data")
+    assert sql_cur.fetchone()[0] == 4
+    pool.close_all()
+
+
+def test_reconnect(tmp_path):
+    """A connection that no longer works is replaced when it is taken from the pool."""
+    pool = make_pool(tmp_path, 1)
+    pool.cursor()
+    lost_conn = pool.thread_data.conn
+    pool.release()
+    lost_conn.close()
+
+    sql_cur = pool.cursor()
+    assert pool.thread_data.conn is not lost_conn
+    sql_cur.execute("SELECT COUNT(*) FROM line_data")
+    assert sql_cur.fetchone()[0] == 0
+    pool.close_all()
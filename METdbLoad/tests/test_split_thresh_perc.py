@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Test splitting the percentile out of thresholds."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import numpy as np
+import pandas as pd
+
+import constants as CN
+from read_data_files import ReadDataFiles
+
+
+def split_each_line(all_stat):
+    """Split the percentiles with string methods on every line, as combine_data did."""
+    perc_lines = all_stat.fcst_thresh.str.contains(CN.L_PAREN, regex=False) & \
+        all_stat.fcst_thresh.str.contains(CN.R_PAREN, regex=False)
+    all_stat.loc[perc_lines, CN.FCST_PERC] = \
+        all_stat.loc[perc_lines, CN.FCST_THRESH].str.split(CN.L_PAREN).str[1]. \
+        str.split(CN.R_PAREN).str[0].astype(float)
+    all_stat.loc[perc_lines, CN.FCST_THRESH] = \
+        all_stat.loc[perc_lines, CN.FCST_THRESH].str.split(CN.L_PAREN).str[0]
+    return all_stat
+
+
+def split_once(all_stat):
+    """Split the percentiles once per different threshold, as combine_data does."""
+    perc_lines, thresh, perc = ReadDataFiles.split_thresh_perc(all_stat[CN.FCST_THRESH])
+    if perc_lines.any():
+        all_stat.loc[perc_lines, CN.FCST_PERC] = perc
+        all_stat.loc[perc_lines, CN.FCST_THRESH] = thresh
+    return all_stat
+
+
+def test_split_thresh_perc():
+    """Thresholds with and without percentiles, repeated and missing, split the same way."""
+    all_stat = pd.DataFrame({CN.FCST_THRESH: ['>=SFP50(12.5)', 'NA', '>0', '>=SFP50(12.5)',
+                                              '<=OBP10(0.25)', 'nan', '>SFP(5', '>=SFP90(3)',
+                                              '>0', '<=OBP10(0.25)'],
+                             CN.FCST_PERC: CN.MV_NOTAV})
+    pd.testing.assert_frame_equal(split_once(all_stat.copy()), split_each_line(all_stat.copy()))
+
+    perc_lines, thresh, perc = ReadDataFiles.split_thresh_perc(all_stat[CN.FCST_THRESH])
+    assert perc_lines.sum() == 5
+    assert thresh.tolist() == ['>=SFP50', '>=SFP50', '<=OBP10', '>=SFP90', '<=OBP10']
+    np.testing.assert_array_equal(perc, [12.5, 12.5, 0.25, 3.0, 0.25])
+
+
+def test_no_percentiles():
+    """Thresholds without any percentiles are left as they are."""
+    all_stat = pd.DataFrame({CN.FCST_THRESH: ['>0', 'NA', '>0'], CN.FCST_PERC: CN.MV_NOTAV})
+    pd.testing.assert_frame_equal(split_once(all_stat.copy()), split_each_line(all_stat.copy()))
+
+    split_stat = split_once(all_stat.copy())
+    assert split_stat[CN.FCST_THRESH].tolist() == ['>0', 'NA', '>0']
+    assert split_stat[CN.FCST_PERC].tolist() == [CN.MV_NOTAV] * 3
+
+
+def test_expected_lines():
+    """A percentile like >=SFP50(12.5) is split off its thresh. NA and missing thresholds,
+       and thresholds with no percentile, are left as they are."""
+    all_stat = pd.DataFrame({CN.FCST_THRESH: ['>0', '>=SFP50(12.5)', 'NA', None,
+                                              '>=SFP50(12.5)', '<=OBP10(0.25)'],
+                             CN.FCST_PERC: CN.MV_NOTAV})
+    split_stat = split_once(all_stat)
+    assert split_stat[CN.FCST_THRESH].tolist() == ['>0', '>=SFP50', 'NA', None, '>=SFP50',
+                                                   '<=OBP10']
+    assert split_stat[CN.FCST_PERC].tolist() == [CN.MV_NOTAV, 12.5, CN.MV_NOTAV, CN.MV_NOTAV,
+                                                 12.5, 0.25]
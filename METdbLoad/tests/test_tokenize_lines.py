@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Test splitting the lines of a stat file into fields with fast_tokenizer."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import os
+
+import pandas as pd
+
+from read_data_files import ReadDataFiles
+
+STAT_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'METreformat', 'test', 'data',
+                         'point_stat', 'point_stat_FV3_GFS_v15p2_CONUS_25km_NDAS_ADPSFC_'
+                         '010000L_20190615_010000V.stat')
+
+
+def read_both(filename):
+    """Read a stat file with and without fast_tokenizer."""
+    hdr_names = ReadDataFiles.read_stat_hdr(filename, os.path.getsize(filename))
+    return (ReadDataFiles.read_stat(filename, hdr_names),
+            ReadDataFiles.read_stat(filename, hdr_names, fast_tokenizer=True))
+
+
+def test_same_fields():
+    """A stat file written by MET has the same fields either way, whole or in chunks."""
+    split_file, tokenized_file = read_both(STAT_FILE)
+    assert len(split_file.index) == 94
+    pd.testing.assert_frame_equal(split_file, tokenized_file)
+
+    hdr_names = ReadDataFiles.read_stat_hdr(STAT_FILE, os.path.getsize(STAT_FILE))
+    pd.testing.assert_frame_equal(
+        pd.concat(ReadDataFiles.read_stat(STAT_FILE, hdr_names, 40, fast_tokenizer=True)),
+        tokenized_file)
+
+
+def test_trailing_whitespace(tmp_path):
+    """Trailing whitespace makes an empty last field only when splitting on spaces."""
+    with open(STAT_FILE, encoding='utf-8') as stat_file:
+        lines = stat_file.readlines()
+    lines[1] = lines[1].rstrip('\n') + '  \n'
+    padded_file = tmp_path / 'point_stat.stat'
+    padded_file.write_text(''.join(lines))
+
+    split_file, tokenized_file = read_both(str(padded_file))
+    num_fields = len(lines[1].split())
+    assert split_file.iloc[0, num_fields] == ''
+    assert tokenized_file.iloc[0, num_fields] is None
+    pd.testing.assert_frame_equal(split_file.iloc[1:], tokenized_file.iloc[1:])
+
+
+def test_blank_chunk(tmp_path):
+    """A chunk of only blank lines does not end the file early."""
+    with open(STAT_FILE, encoding='utf-8') as stat_file:
+        lines = stat_file.readlines()
+    blank_file = tmp_path / 'point_stat.stat'
+    blank_file.write_text(''.join(lines[0:3] + ['\n', '  \n'] + lines[3:]))
+
+    hdr_names = ReadDataFiles.read_stat_hdr(str(blank_file), os.path.getsize(blank_file))
+    blank_chunks = pd.concat(ReadDataFiles.read_stat(str(blank_file), hdr_names, 2,
+                                                     fast_tokenizer=True))
+    assert len(blank_chunks.index) == 94
+    # lines are padded to the longest line of their chunk, so compare with the same chunks
+    chunks = pd.concat(ReadDataFiles.read_stat(STAT_FILE, hdr_names, 2, fast_tokenizer=True))
+    pd.testing.assert_frame_equal(blank_chunks.reset_index(drop=True), chunks)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test rebuilding the thresholds of VSDB PCT lines."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import numpy as np
+import pandas as pd
+
+import constants as CN
+from read_data_files import ReadDataFiles
+
+
+def make_lines(n_vars):
+    """Make PCT lines as combine_data has them before the thresholds are rebuilt."""
+    num_cols = len(CN.COL_NUMS[0:-2])
+    lines = []
+    for row_num, n_var in enumerate(n_vars):
+        oy_values = [row_num + 0.5 * col for col in range(n_var)]
+        subtotals = [10.0 * (row_num + col + 1) for col in range(n_var)]
+        values = oy_values + subtotals
+        if row_num == 1:
+            values[n_var] = np.nan
+        lines.append([0.0, n_var] + values + [0.0] * (num_cols - len(values)))
+    return pd.DataFrame(lines, columns=[CN.TOTAL_LC, CN.N_VAR] + CN.COL_NUMS[0:-2])
+
+
+def values_each_line(vsdb_data):
+    """Rebuild the lines one at a time, as combine_data did before vsdb_pct_values."""
+    zero_col = vsdb_data.columns.get_loc('0')
+    col_total = vsdb_data.columns.get_loc(CN.TOTAL_LC)
+    for index, row in vsdb_data.iterrows():
+        var_values = []
+        n_var = int(row[CN.N_VAR])
+        col_start = zero_col + n_var
+        col_end = col_start + n_var
+        vsdb_data.iloc[index, col_total] = row[col_start:col_end].sum()
+        for i in range(n_var):
+            var_values = var_values + [i/(n_var - 1)]
+            var_values = var_values + [row[str(i)]]
+            var_values = var_values + [row[str(i+n_var)] - row[str(i)]]
+        df_values = pd.DataFrame([var_values])
+        vsdb_data.iloc[index, zero_col:zero_col + (n_var * 3)] = \
+            df_values.iloc[0, 0:n_var * 3].values
+    return vsdb_data
+
+
+def test_vsdb_pct_values():
+    """Lines with different n_var get the same totals and values as one line at a time."""
+    vsdb_data = make_lines([3, 5, 3, 11, 5])
+    expected = values_each_line(vsdb_data.copy())
+    ReadDataFiles.vsdb_pct_values(vsdb_data)
+    pd.testing.assert_frame_equal(vsdb_data, expected, check_exact=True)
+    assert vsdb_data.loc[1, CN.TOTAL_LC] == 30.0 + 40.0 + 50.0 + 60.0
+
+
+def test_hand_computed():
+    """Each thresh_i is i / (n_var - 1), ending at 1, and on_i is the subtotal less oy_i.
+       A missing last subtotal is left out of the total, and its on_i is missing."""
+    num_cols = len(CN.COL_NUMS[0:-2])
+    lines = [[0.0, 3, 1.0, 2.0, 3.0, 10.0, 20.0, np.nan],
+             [0.0, 2, 4.0, 5.0, 40.0, 50.0]]
+    vsdb_data = pd.DataFrame([line + [0.0] * (num_cols + 2 - len(line)) for line in lines],
+                             columns=[CN.TOTAL_LC, CN.N_VAR] + CN.COL_NUMS[0:-2])
+    ReadDataFiles.vsdb_pct_values(vsdb_data)
+
+    assert vsdb_data[CN.TOTAL_LC].tolist() == [30.0, 90.0]
+    np.testing.assert_array_equal(vsdb_data.loc[0, CN.COL_NUMS[0:9]].to_numpy(dtype=float),
+                                  [0.0, 1.0, 9.0, 0.5, 2.0, 18.0, 1.0, 3.0, np.nan])
+    np.testing.assert_array_equal(vsdb_data.loc[1, CN.COL_NUMS[0:6]].to_numpy(dtype=float),
+                                  [0.0, 4.0, 36.0, 1.0, 5.0, 45.0])
+    # the columns after the sets are left as they were
+    assert (vsdb_data.loc[0, CN.COL_NUMS[9:-2]] == 0.0).all()
+    assert (vsdb_data.loc[1, CN.COL_NUMS[6:-2]] == 0.0).all()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Test formatting line data as CSV for LOAD DATA the same way as to_csv."""
+
+# pylint:disable=import-error
+# imported modules exist
+
+import io
+
+import numpy as np
+import pandas as pd
+
+import constants as CN
+from run_sql import RunSql
+
+
+def check_same(raw_data):
+    """write_csv gives the same text as to_csv with na_rep and sep, in any size chunks."""
+    col_list = raw_data.columns.tolist()
+    to_csv_file = io.StringIO()
+    raw_data.to_csv(to_csv_file, na_rep=CN.MV_NOTAV, index=False, header=False, sep=CN.SEP)
+    csv_file = io.StringIO()
+    RunSql.write_csv(raw_data, col_list, csv_file)
+    assert csv_file.getvalue() == to_csv_file.getvalue()
+
+
+def test_column_types(monkeypatch):
+    """Numbers, text, missing values, times and categoricals are formatted as to_csv does."""
+    valid_times = pd.to_datetime(['2023-01-01 12:00:00', '2023-01-01 18:30:00',
+                                  '2023-01-01 12:00:00', '2023-01-02 00:00:00'])
+    raw_data = pd.DataFrame({'line_data_id': np.array([1, 2, 3, 4], dtype='int64'),
+                             'total': [10.0, np.nan, 0.125, 1e-07],
+                             'fcst_valid_beg': valid_times,
+                             'obs_valid_beg': valid_times.normalize(),
+                             'model': pd.Categorical(['GFS', 'WRF', 'GFS', 'GFS']),
+                             'alpha': ['0.05', None, 'NA', np.nan],
+                             'mixed': [1, '2.5', None, 3.25]})
+    check_same(raw_data)
+    monkeypatch.setattr(CN, 'CSV_CHUNK_CELLS', 10)
+    check_same(raw_data)
+
+
+def test_quoted_text():
+    """Text that to_csv quotes, like a separator in a value, is left to to_csv."""
+    raw_data = pd.DataFrame({'line_data_id': [1, 2], 'descr': ['a' + CN.SEP + 'b', 'c"d']})
+    assert RunSql.format_csv([raw_data[col].to_numpy() for col in raw_data]) is None
+    check_same(raw_data)
+
+
+def test_quoted_text_with_times(monkeypatch):
+    """A chunk left to to_csv keeps the time format of the whole column."""
+    monkeypatch.setattr(CN, 'CSV_CHUNK_CELLS', 4)
+    raw_data = pd.DataFrame({'fcst_valid_beg': pd.to_datetime(['2023-01-01 12:00:00',
+                                                               '2023-01-02 00:00:00']),
+                             'descr': ['GFS', 'a' + CN.SEP + 'b']})
+    check_same(raw_data)
@@ -4,6 +4,7 @@
 # pylint:disable=no-member
 # constants exist in constants.py
 
+import re
 from collections import OrderedDict
 import numpy as np
 
@@ -17,6 +18,38 @@ MAX_COL = 125
 # Goal is to not max out memory
 MAX_FILES = 100
 
+# Stat files larger than this many bytes are read in chunks of lines when
+# the stat_chunk_size tag is set, so that memory does not depend on file size
+CHUNK_FILE_SIZE = 100 * 1024 * 1024
+
+# Default number of header ids kept in the cache shared by all sets of files
+HEADER_CACHE_SIZE = 100000
+
+# Most dates kept for each date format in the cache of parsed dates shared by all files
+DATE_CACHE_SIZE = 100000
+
+# Format of dates in MET files, and in VSDB files
+MET_DATE_FORMAT = '%Y%m%d_%H%M%S'
+VSDB_DATE_FORMAT = '%Y%m%d%H'
+
+# Default number of threads listing the directories made from the folder template
+SCAN_WORKERS = 8
+
+# Default number of ids reserved at a time when loads run concurrently
+ID_BLOCK_SIZE = 10000
+
+# Seconds to wait for another load to release a header or file lock
+LOCK_TIMEOUT = 600
+
+# CSV data is formatted this many values (rows times columns) at a time, like to_csv
+CSV_CHUNK_CELLS = 100000
+
+# Bytes read at a time when emptying a pipe that LOAD DATA stopped reading
+PIPE_READ_SIZE = 65536
+
+# Rows passed to executemany at a time when insert_size is 1 and LOAD DATA is not allowed
+INSERT_BATCH_ROWS = 10000
+
 COL_NUMS = [str(x) for x in range(MAX_COL - 24)]
 
 MYSQL = "mysql"
@@ -60,6 +93,10 @@ L_PAREN = '('
 # Right paren for searching
 R_PAREN = ')'
 
+# Threshold with a percentile in parens, e.g. >=SFP50(273.5): the threshold before the
+# first left paren, and the percentile after it, up to the next paren
+THRESH_PERC = re.compile(r'^([^(]*)\(([^()]*)')
+
 # Triple zero for tests for MODE files
 T_ZERO = '000'
 
@@ -246,23 +283,76 @@ STAT_HEADER_KEYS = [VERSION, MODEL, DESCR, FCST_VAR, FCST_UNITS, FCST_LEV,
                     OBS_VAR, OBS_UNITS, OBS_LEV, OBTYPE, VX_MASK,
                     INTERP_MTHD, INTERP_PNTS, FCST_THRESH, OBS_THRESH]
 
+# stat columns with few different values, kept as categoricals with categorical_headers
+# fcst_thresh and obs_thresh are not, as their percentiles are split out after reading
+STAT_HEADER_CATEGORIES = [VERSION, MODEL, DESCR, FCST_VAR, FCST_UNITS, FCST_LEV,
+                          OBS_VAR, OBS_UNITS, OBS_LEV, OBTYPE, VX_MASK,
+                          INTERP_MTHD, LINE_TYPE]
+
 TCST_HEADER_KEYS = [VERSION, AMODEL, BMODEL, DESCR, STORM_ID, BASIN, CYCLONE,
                     STORM_NAME, INIT_MASK, VALID_MASK]
 
 VSDB_HEADER = [VERSION, MODEL, FCST_LEAD, FCST_VALID_BEG, OBTYPE,
                VX_MASK, LINE_TYPE, FCST_VAR, FCST_LEV]
 
-Q_FILE = "SELECT data_file_id FROM data_file WHERE " + \
-         "path=%s AND filename=%s"
+# All of the files in a set at once - format with one (%s,%s) per file
+Q_FILES = "SELECT data_file_id, filename, path FROM data_file WHERE " + \
+          "(filename, path) IN ({}) ORDER BY data_file_id"
 
+# Files in the manifest of earlier loads - format with a list of data_file_ids
+Q_FILE_IDS = "SELECT data_file_id, filename, path FROM data_file WHERE data_file_id IN ({})"
+
+# number of data_file_ids or header ids checked with each query
+IDS_PER_QUERY = 1000
+
+# One header at a time, when the temporary table cannot be used
 Q_HEADER = "SELECT stat_header_id FROM stat_header WHERE " + \
            "=%s AND ".join(STAT_HEADER_KEYS[1:]) + "=%s"
 
+# Candidate stat headers are staged in a temporary table, keyed by their row number in
+# stat_header_id, and matched against stat_header with one join
+TMP_STAT_HEADER = 'tmp_stat_header'
+
+CREATE_TMP_HEADER = "CREATE TEMPORARY TABLE " + TMP_STAT_HEADER + " LIKE stat_header"
+
+DROP_TMP_HEADER = "DROP TEMPORARY TABLE IF EXISTS " + TMP_STAT_HEADER
+
+Q_HEADERS = "SELECT t.stat_header_id, MIN(s.stat_header_id) FROM " + TMP_STAT_HEADER + \
+            " t JOIN stat_header s ON " + \
+            " AND ".join("t." + key + "=s." + key for key in STAT_HEADER_KEYS[1:]) + \
+            " GROUP BY t.stat_header_id"
+
 Q_HEADER_TCST = "SELECT tcst_header_id FROM tcst_header WHERE " + \
                 "=%s AND ".join(TCST_HEADER_KEYS[1:]) + "=%s"
 
 Q_METADATA = "SELECT category, description FROM metadata"
 
+# Blocks of ids are reserved by moving next_id in id_sequence with one UPDATE
+CREATE_ID_SEQUENCE = "CREATE TABLE IF NOT EXISTS id_sequence (" + \
+                     "id_table VARCHAR(64) NOT NULL, id_field VARCHAR(64) NOT NULL, " + \
+                     "next_id BIGINT UNSIGNED NOT NULL, PRIMARY KEY (id_table, id_field)) " + \
+                     "ENGINE = MyISAM CHARACTER SET = latin1"
+
+Q_ID_SEQUENCE = "SELECT next_id FROM id_sequence WHERE id_table=%s AND id_field=%s"
+
+# format with the id field and then the table
+INS_ID_SEQUENCE = "INSERT IGNORE INTO id_sequence (id_table, id_field, next_id) " + \
+                  "SELECT %s, %s, COALESCE(MAX({}) + 1, 1) FROM {}"
+
+# format with the id field and then the table. The block starts after the largest id in
+# the table if that is past next_id, as loads without id blocks use MAX + 1 and do not
+# move next_id
+UPD_ID_SEQUENCE = "UPDATE id_sequence SET next_id = LAST_INSERT_ID(GREATEST(next_id, " + \
+                  "(SELECT COALESCE(MAX({}) + 1, 1) FROM {})) + %s) " + \
+                  "WHERE id_table=%s AND id_field=%s"
+
+Q_LAST_INSERT_ID = "SELECT LAST_INSERT_ID()"
+
+# Named locks, per database, that keep concurrent loads from writing the same headers or files
+Q_GET_LOCK = "SELECT GET_LOCK(CONCAT(DATABASE(), '.', %s), %s)"
+
+Q_RELEASE_LOCK = "SELECT RELEASE_LOCK(CONCAT(DATABASE(), '.', %s))"
+
 STAT_HEADER = 'stat_header'
 TCST_HEADER = 'tcst_header'
 STAT_HEADER_ID = 'stat_header_id'
@@ -310,6 +400,9 @@ VALUE_SLOTS_TCST = VALUE_SLOTS_TCST[:-2]
 INS_HEADER = "INSERT INTO stat_header (" + ",".join(STAT_HEADER_FIELDS) + \
              ") VALUES (" + VALUE_SLOTS + ")"
 
+INS_TMP_HEADER = "INSERT INTO " + TMP_STAT_HEADER + " (" + ",".join(STAT_HEADER_FIELDS) + \
+                 ") VALUES (" + VALUE_SLOTS + ")"
+
 INS_HEADER_TCST = "INSERT INTO tcst_header (" + ",".join(TCST_HEADER_FIELDS) + \
                   ") VALUES (" + VALUE_SLOTS_TCST + ")"
 
@@ -820,6 +913,8 @@ MTD_3D_SS = 12
 TCST = 13
 
 MTD_FILES = [MTD_2D, MTD_3D_PC, MTD_3D_PS, MTD_3D_SC, MTD_3D_SS]
+STAT_FILES = [STAT, VSDB_POINT_STAT]
+MODE_FILES = [MODE_CTS, MODE_OBJ]
 
 # mode file fields
 MODE_HEADER = 'mode_header'
@@ -953,6 +1048,14 @@ MTD_HEADER_FIELDS = [MTD_HEADER_ID, LINE_TYPE_LU_ID, DATA_FILE_ID,
 # MTD 2D files need the revision id to be unique
 MTD_2D_HEADER_KEYS = [REVISION_ID] + MTD_HEADER_KEYS
 
+# the fields that header ids are kept by in the header cache, by header table
+HEADER_CACHE_KEYS = {STAT_HEADER: STAT_HEADER_KEYS[1:], MODE_HEADER: MODE_HEADER_KEYS,
+                     TCST_HEADER: TCST_HEADER_KEYS[1:], MTD_HEADER: MTD_HEADER_KEYS}
+
+# Header ids in the header cache of earlier loads - format with the header table,
+# the key fields and a list of header ids
+Q_HEADER_KEYS = "SELECT {0}_id, {1} FROM {0} WHERE {0}_id IN ({2})"
+
 MTD_2D_OBJ_FIELDS = [MTD_HEADER_ID, OBJECT_ID, OBJECT_CAT, TIME_INDEX, AREA,
                      CENTROID_X, CENTROID_Y, CENTROID_LAT, CENTROID_LON, AXIS_ANG,
                      INTENSITY_10, INTENSITY_25, INTENSITY_50, INTENSITY_75,
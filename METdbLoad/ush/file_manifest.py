@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+"""
+Program Name: file_manifest.py
+Contact(s): Venita Hagerty
+Abstract:
+History Log:  Initial version
+Usage: Skip files that are unchanged since an earlier load, without reading them.
+Parameters: N/A
+Input Files: optional SQLite file of files loaded by earlier loads
+Output Files: optional SQLite file of loaded files
+Copyright 2020 UCAR/NCAR/RAL, CSU/CIRES, Regents of the University of Colorado, NOAA/OAR/ESRL/GSD
+"""
+
+import sys
+import os
+import re
+import logging
+import sqlite3
+
+import constants as CN
+
+
+class FileManifest:
+    """ Files already loaded into a database, with their size, modification time and
+        data_file_id, kept between loads so unchanged files are not read again
+        Returns:
+           N/A
+    """
+
+    def __init__(self):
+        # full file name to (size, modification time in ns, data_file_id)
+        self.loaded_files = {}
+        # full file name to (size, modification time in ns), taken before the file is read
+        self.file_stats = {}
+
+    @staticmethod
+    def manifest_file(manifest_dir, connection):
+        """ name the SQLite file that keeps the loaded files of one database.
+            Returns:
+               full path of the manifest file
+        """
+        db_name = re.sub(r'\W', '_', connection['db_host'] + '_' +
+                         str(connection['db_port']) + '_' + connection['db_database'])
+        return os.path.join(manifest_dir, 'METdbLoad_files_' + db_name + '.sqlite')
+
+    def load(self, manifest_file, sql_cur):
+        """ read the files loaded by earlier loads. Files are dropped if the data_file table
+            no longer has their id with the same file name and path, e.g. after the database
+            was rebuilt.
+            Returns:
+               N/A
+        """
+        if not os.path.isfile(manifest_file):
+            return
+
+        try:
+            with sqlite3.connect(manifest_file) as manifest_conn:
+                saved_files = manifest_conn.execute("SELECT full_file, size, mtime, id " +
+                                                    "FROM file_manifest").fetchall()
+            manifest_conn.close()
+
+            db_files = FileManifest.get_data_files([file_id for _, _, _, file_id in saved_files],
+                                                   sql_cur)
+
+            for full_file, size, mtime, file_id in saved_files:
+                file_path, _, file_name = full_file.rpartition(CN.FWD_SLASH)
+                if db_files.get(file_id) == (file_name, file_path):
+                    self.loaded_files[full_file] = (size, mtime, file_id)
+
+            if len(self.loaded_files) < len(saved_files):
+                logging.warning("!!! Files in manifest file %s not in the data_file table: %s",
+                                manifest_file, str(len(saved_files) - len(self.loaded_files)))
+            logging.info("Loaded files read from manifest file %s: %s",
+                         manifest_file, str(len(self.loaded_files)))
+
+        except (sqlite3.Error, RuntimeError, TypeError, NameError, KeyError, ValueError):
+            self.loaded_files.clear()
+            logging.warning("!!! %s reading manifest file %s", sys.exc_info()[0], manifest_file)
+
+    @staticmethod
+    def get_data_files(file_ids, sql_cur):
+        """ find which of the data_file_ids are still in the data_file table, a batch of
+            ids per query
+            Returns:
+               dictionary of (filename, path) by data_file_id
+        """
+        db_files = {}
+
+        for first_id in range(0, len(file_ids), CN.IDS_PER_QUERY):
+            id_list = ",".join(str(int(file_id)) for file_id in
+                               file_ids[first_id:first_id + CN.IDS_PER_QUERY])
+            sql_cur.execute(CN.Q_FILE_IDS.format(id_list))
+            for file_id, file_name, file_path in sql_cur.fetchall():
+                db_files[file_id] = (file_name, file_path)
+
+        return db_files
+
+    def new_files(self, load_files, file_stats):
+        """ check the size and modification time of each file, found when the files to load
+            were listed, against the manifest.
+            Returns:
+               list of the files that are not in the manifest or have changed
+        """
+        changed_files = []
+
+        for full_file in load_files:
+            if full_file not in file_stats:
+                # leave missing files for read_data to report
+                changed_files.append(full_file)
+                continue
+
+            self.file_stats[full_file] = file_stats[full_file][1:]
+            loaded = self.loaded_files.get(full_file)
+            if loaded is None or loaded[:2] != self.file_stats[full_file]:
+                changed_files.append(full_file)
+
+        logging.info("Files skipped as unchanged since they were loaded: %s",
+                     str(len(load_files) - len(changed_files)))
+        return changed_files
+
+    def add_files(self, file_ids):
+        """ add files written, or found already in the data_file table, to the manifest,
+            with the size and modification time they had before they were read.
+            Returns:
+               N/A
+        """
+        for full_file, file_id in file_ids.items():
+            if full_file in self.file_stats:
+                self.loaded_files[full_file] = self.file_stats[full_file] + (int(file_id),)
+
+    def save(self, manifest_file):
+        """ write the loaded files, for the next load.
+            Returns:
+               N/A
+        """
+        try:
+            with sqlite3.connect(manifest_file) as manifest_conn:
+                manifest_conn.execute("DROP TABLE IF EXISTS file_manifest")
+                manifest_conn.execute("CREATE TABLE file_manifest (full_file TEXT, " +
+                                      "size INTEGER, mtime INTEGER, id INTEGER)")
+                manifest_conn.executemany("INSERT INTO file_manifest VALUES (?, ?, ?, ?)",
+                                          [(full_file,) + loaded for full_file, loaded
+                                           in self.loaded_files.items()])
+            manifest_conn.close()
+
+            logging.info("Loaded files written to manifest file %s: %s",
+                         manifest_file, str(len(self.loaded_files)))
+
+        except (sqlite3.Error, RuntimeError, TypeError, NameError, KeyError):
+            logging.warning("!!! %s writing manifest file %s", sys.exc_info()[0], manifest_file)
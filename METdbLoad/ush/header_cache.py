@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+"""
+Program Name: header_cache.py
+Contact(s): Venita Hagerty
+Abstract:
+History Log:  Initial version
+Usage: Keep header ids that are already in the database, for all sets of files in a load.
+Parameters: N/A
+Input Files: optional SQLite file of header ids saved by an earlier load
+Output Files: optional SQLite file of header ids
+Copyright 2020 UCAR/NCAR/RAL, CSU/CIRES, Regents of the University of Colorado, NOAA/OAR/ESRL/GSD
+"""
+
+import sys
+import os
+import re
+import json
+import logging
+import sqlite3
+from collections import OrderedDict
+
+import constants as CN
+
+
+class HeaderCache:
+    """ Least recently used cache of header keys to header ids, shared by all sets of files
+        Returns:
+           N/A
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        # (header table, header key values) to header id, least recently used first
+        self.header_ids = OrderedDict()
+
+    @staticmethod
+    def cache_file(cache_dir, connection):
+        """ name the SQLite file that keeps the header ids of one database.
+            Returns:
+               full path of the cache file
+        """
+        db_name = re.sub(r'\W', '_', connection['db_host'] + '_' +
+                         str(connection['db_port']) + '_' + connection['db_database'])
+        return os.path.join(cache_dir, 'METdbLoad_headers_' + db_name + '.sqlite')
+
+    @staticmethod
+    def header_keys(table, headers, key_fields):
+        """ turn the key fields of each header into a key for the cache.
+            Returns:
+               list of keys, in the same order as the headers
+        """
+        return [(table,) + key for key in
+                zip(*[headers[key_field].astype(str) for key_field in key_fields])]
+
+    def get_ids(self, table, headers, key_fields):
+        """ look up the headers in the cache.
+            Returns:
+               dictionary of headers index to header id, for headers in the cache
+        """
+        cached_ids = {}
+
+        for row_num, key in zip(headers.index, self.header_keys(table, headers, key_fields)):
+            if key in self.header_ids:
+                self.header_ids.move_to_end(key)
+                cached_ids[row_num] = self.header_ids[key]
+
+        logging.debug("%s headers found in cache: %s", table, str(len(cached_ids)))
+        return cached_ids
+
+    def add_ids(self, table, headers, key_fields, id_field):
+        """ add the headers and their ids to the cache, removing the least recently used.
+            Returns:
+               N/A
+        """
+        for key, header_id in zip(self.header_keys(table, headers, key_fields),
+                                  headers[id_field].tolist()):
+            if key in self.header_ids:
+                self.header_ids.move_to_end(key)
+            else:
+                self.header_ids[key] = int(header_id)
+
+        while len(self.header_ids) > self.max_size:
+            self.header_ids.popitem(last=False)
+
+    def load(self, cache_file, sql_cur):
+        """ read header ids saved by an earlier load. None are used, and the cache file is
+            removed, if any id is no longer in its header table with the same key fields,
+            e.g. after the database was rebuilt.
+            Returns:
+               N/A
+        """
+        if not os.path.isfile(cache_file):
+            return
+
+        try:
+            with sqlite3.connect(cache_file) as cache_conn:
+                saved_ids = cache_conn.execute("SELECT tbl, hkey, id FROM header_cache " +
+                                               "ORDER BY rowid").fetchall()
+            cache_conn.close()
+
+            db_keys = {}
+            for table in {table for table, _, _ in saved_ids}:
+                db_keys[table] = self.get_header_keys(
+                    table, [header_id for tbl, _, header_id in saved_ids if tbl == table],
+                    sql_cur)
+
+            for table, hkey, header_id in saved_ids:
+                key = tuple(json.loads(hkey))
+                if not self.same_key(key, db_keys[table].get(header_id)):
+                    self.header_ids.clear()
+                    os.remove(cache_file)
+                    logging.warning("!!! Header cache file %s has %s id %s with other key " +
+                                    "fields in the database, removed it",
+                                    cache_file, table, str(header_id))
+                    return
+                self.header_ids[(table,) + key] = header_id
+
+            while len(self.header_ids) > self.max_size:
+                self.header_ids.popitem(last=False)
+
+            logging.info("Header ids read from cache file %s: %s",
+                         cache_file, str(len(self.header_ids)))
+
+        except (sqlite3.Error, OSError, RuntimeError, TypeError, NameError, KeyError,
+                ValueError):
+            self.header_ids.clear()
+            logging.warning("!!! %s reading header cache file %s", sys.exc_info()[0], cache_file)
+
+    @staticmethod
+    def get_header_keys(table, header_ids, sql_cur):
+        """ get the key fields of the headers with the header ids, a batch of ids per query
+            Returns:
+               dictionary of key field values by header id
+        """
+        db_keys = {}
+
+        for first_id in range(0, len(header_ids), CN.IDS_PER_QUERY):
+            id_list = ",".join(str(int(header_id)) for header_id in
+                               header_ids[first_id:first_id + CN.IDS_PER_QUERY])
+            sql_cur.execute(CN.Q_HEADER_KEYS.format(table, ",".join(CN.HEADER_CACHE_KEYS[table]),
+                                                    id_list))
+            for row in sql_cur.fetchall():
+                db_keys[row[0]] = row[1:]
+
+        return db_keys
+
+    @staticmethod
+    def same_key(key, db_values):
+        """ compare the key fields kept in the cache, as text, with the fields in the database.
+            A NULL field matches a missing value, and numbers match if they are equal.
+            Returns:
+               True if all of the fields match
+        """
+        if db_values is None or len(key) != len(db_values):
+            return False
+
+        for value, db_value in zip(key, db_values):
+            if db_value is None:
+                if value not in (CN.MV_NULL, 'None', 'nan', 'NaT'):
+                    return False
+            elif value != str(db_value):
+                try:
+                    if float(value) != float(db_value):
+                        return False
+                except (TypeError, ValueError):
+                    return False
+
+        return True
+
+    def save(self, cache_file):
+        """ write the header ids, least recently used first, for the next load.
+            Returns:
+               N/A
+        """
+        try:
+            with sqlite3.connect(cache_file) as cache_conn:
+                cache_conn.execute("DROP TABLE IF EXISTS header_cache")
+                cache_conn.execute("CREATE TABLE header_cache (tbl TEXT, hkey TEXT, id INTEGER)")
+                cache_conn.executemany("INSERT INTO header_cache VALUES (?, ?, ?)",
+                                       [(key[0], json.dumps(key[1:]), header_id)
+                                        for key, header_id in self.header_ids.items()])
+            cache_conn.close()
+
+            logging.info("Header ids written to cache file %s: %s",
+                         cache_file, str(len(self.header_ids)))
+
+        except (sqlite3.Error, RuntimeError, TypeError, NameError, KeyError):
+            logging.warning("!!! %s writing header cache file %s", sys.exc_info()[0], cache_file)
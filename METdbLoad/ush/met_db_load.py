@@ -20,6 +20,8 @@ Copyright 2020 UCAR/NCAR/RAL, CSU/CIRES, Regents of the University of Colorado,
 
 import argparse
 import logging
+import queue
+import threading
 import time
 from datetime import datetime
 from datetime import timedelta
@@ -31,12 +33,14 @@ import constants as CN
 
 from read_load_xml import XmlLoadFile
 from read_data_files import ReadDataFiles
-from run_sql import RunSql
+from run_sql import RunSql, RunSqlPool
 from write_file_sql import WriteFileSql
 from write_stat_sql import WriteStatSql
 from write_mode_sql import WriteModeSql
 from write_tcst_sql import WriteTcstSql
 from write_mtd_sql import WriteMtdSql
+from header_cache import HeaderCache
+from file_manifest import FileManifest
 
 
 def main():
@@ -69,6 +73,8 @@ def main():
     tmp_dir = [os.getenv('HOME')]
     parser.add_argument("xmlfile", help="Please provide required xml load_spec filename")
     parser.add_argument("-index", action="store_true", help="Only process index, do not load data")
+    parser.add_argument("-num_workers", type=int, default=None,
+                        help="Optional - number of processes used to read data files")
     parser.add_argument("tmpdir", nargs='*', default=tmp_dir,
                         help="Optional - when different directory wanted for tmp file")
 
@@ -91,6 +97,10 @@ def main():
         logging.error("*** %s occurred in Main reading XML ***", sys.exc_info()[0])
         sys.exit("*** Error reading XML")
 
+    # A number of workers on the command line overrides the XML tag
+    if args.num_workers is not None:
+        xml_loadfile.flags['num_workers'] = max(1, args.num_workers)
+
     #
     #  Verify the tmp file
     #
@@ -130,71 +140,86 @@ def main():
             sys.exit("*** Error processing index")
 
     #
-    #  Purge files if flags set to not load certain types of files
+    #  Files of types the user set flags to not load, and empty files, were removed
+    #  when the XML was read
     #
-    try:
-        # If user set flags to not read files, remove those files from load_files list
-        xml_loadfile.load_files = purge_files(xml_loadfile.load_files, xml_loadfile.flags)
+    if not xml_loadfile.load_files:
+        logging.warning("!!! No files to load")
+        sys.exit("*** No files to load")
 
-        if not xml_loadfile.load_files:
-            logging.warning("!!! No files to load")
-            sys.exit("*** No files to load")
+    #
+    #  With manifest_dir, skip files that are unchanged since an earlier load, without reading them
+    #
+    manifest = None
+    manifest_file = None
+    if xml_loadfile.flags["manifest_dir"] and not xml_loadfile.flags["force_dup_file"] and \
+            xml_loadfile.connection['db_management_system'] in CN.RELATIONAL:
+        try:
+            manifest = FileManifest()
+            manifest_file = FileManifest.manifest_file(xml_loadfile.flags["manifest_dir"],
+                                                       xml_loadfile.connection)
+            manifest_sql = RunSql()
+            manifest_sql.sql_on(xml_loadfile.connection)
+            manifest.load(manifest_file, manifest_sql.cur)
+            manifest_sql.sql_off(manifest_sql.conn, manifest_sql.cur)
 
-    except (RuntimeError, TypeError, NameError, KeyError):
-        logging.error("*** %s occurred in Main purging files not selected ***", sys.exc_info()[0])
-        sys.exit("*** Error when removing files from load list per XML")
+            xml_loadfile.load_files = manifest.new_files(xml_loadfile.load_files,
+                                                         xml_loadfile.file_stats)
 
-    # Set up indices to process some maximum number of files at a time
-    set_count = 0
-    first_file = 0
-    last_file = len(xml_loadfile.load_files) - 1
+            if not xml_loadfile.load_files:
+                logging.warning("!!! No new or changed files to load")
+                sys.exit("*** No files to load")
 
-    if last_file > CN.MAX_FILES:
-        mid_file = first_file + CN.MAX_FILES
-    else:
-        mid_file = last_file
+        except (RuntimeError, TypeError, NameError, KeyError):
+            logging.error("*** %s occurred in Main checking files in manifest ***",
+                          sys.exc_info()[0])
+            sys.exit("*** Error when checking files in manifest")
 
-    line_counts = {"Stat": 0, "Mode CTS": 0, "Mode Obj": 0, "Tcst": 0,
-                   "MTD 2D": 0, "MTD 3D Single": 0, "MTD 3D Pair": 0}
+    # Split the files into sets to process some maximum number of files at a time
+    try:
+        file_sets = split_sets(xml_loadfile.load_files)
 
-    while mid_file <= last_file:
-        try:
-            # Keep track of which set of files is being processed
-            set_count = set_count + 1
-            # Handle only 1 file, or more files
-            if first_file == last_file:
-                current_files = [xml_loadfile.load_files[first_file]]
-            else:
-                current_files = xml_loadfile.load_files[first_file:mid_file + 1]
+    except (RuntimeError, TypeError, NameError, KeyError):
+        logging.error("*** %s occurred in Main setting up loop ***", sys.exc_info()[0])
+        sys.exit("*** Error when setting up loop")
 
-        except (RuntimeError, TypeError, NameError, KeyError):
-            logging.error("*** %s occurred in Main setting up loop ***", sys.exc_info()[0])
-            sys.exit("*** Error when setting up loop")
+    line_counts = {"Stat": 0, "Mode CTS": 0, "Mode Obj": 0, "Tcst": 0,
+                   "MTD 2D": 0, "MTD 3D Single": 0, "MTD 3D Pair": 0}
 
-        #
-        #  Read the data files
-        #
-        try:
+    #
+    #  Read the data files, a set at a time
+    #  With read_ahead, the next sets are read while the current set is written
+    #
+    if xml_loadfile.flags["read_ahead"] > 0:
+        read_sets = read_ahead_sets(xml_loadfile.flags, file_sets, xml_loadfile.line_types,
+                                    xml_loadfile.file_stats)
+    else:
+        read_sets = read_file_sets(xml_loadfile.flags, file_sets, xml_loadfile.line_types,
+                                   xml_loadfile.file_stats)
 
-            # instantiate a read data files object
-            file_data = ReadDataFiles()
+    sql_run = None
+    sql_pool = None
+    loaded_files = None
+    chunk_file_id = None
 
-            # read in the data files, with options specified by XML flags
-            file_data.read_data(xml_loadfile.flags,
-                                current_files,
-                                xml_loadfile.line_types)
+    # header ids found or written by one set of files are kept for the later sets
+    header_cache = None
+    cache_file = None
+    if xml_loadfile.flags["header_cache_size"] > 0:
+        header_cache = HeaderCache(xml_loadfile.flags["header_cache_size"])
+        if xml_loadfile.flags["header_cache_dir"]:
+            cache_file = HeaderCache.cache_file(xml_loadfile.flags["header_cache_dir"],
+                                                xml_loadfile.connection)
 
-            current_files = []
+    for set_count, file_data in read_sets:
 
-            if file_data.data_files.empty:
-                logging.warning("!!! No files to load in current set %s", str(set_count))
-                # move indices to the next set of files
-                first_file, mid_file, last_file = next_set(mid_file, last_file)
-                continue
+        # a new large stat file, its data file is not written yet
+        if file_data.chunk_num <= 1:
+            chunk_file_id = None
 
-        except (RuntimeError, TypeError, NameError, KeyError):
-            logging.error("*** %s occurred in Main reading data ***", sys.exc_info()[0])
-            sys.exit("*** Error when reading data files")
+        if file_data.data_files.empty:
+            logging.warning("!!! No files to load in current set %s", str(set_count))
+            continue
 
         #
         #  Write the data to a database
@@ -203,7 +228,7 @@ def main():
 
             if xml_loadfile.connection['db_management_system'] in CN.RELATIONAL:
                 # for the first set of files, connect to the database
-                if set_count == 1:
+                if sql_run is None:
                     sql_run = RunSql()
                     sql_run.sql_on(xml_loadfile.connection)
 
@@ -211,41 +236,89 @@ def main():
                     if xml_loadfile.flags["drop_indexes"]:
                         sql_run.apply_indexes(True, sql_run.cur)
 
-                # write the data file records out. put data file ids into other dataframes
-                write_file = WriteFileSql()
-                updated_data = write_file.write_file_sql(xml_loadfile.flags,
-                                                         file_data.data_files,
-                                                         file_data.stat_data,
-                                                         file_data.mode_cts_data,
-                                                         file_data.mode_obj_data,
-                                                         file_data.tcst_data,
-                                                         file_data.mtd_2d_data,
-                                                         file_data.mtd_3d_single_data,
-                                                         file_data.mtd_3d_pair_data,
-                                                         tmp_dir,
-                                                         sql_run.cur,
-                                                         sql_run.local_infile)
-
-                file_data.data_files = updated_data[0]
-                file_data.stat_data = updated_data[1]
-                line_counts["Stat"] += len(file_data.stat_data)
-                file_data.mode_cts_data = updated_data[2]
-                line_counts["Mode CTS"] += len(file_data.mode_cts_data)
-                file_data.mode_obj_data = updated_data[3]
-                line_counts["Mode Obj"] += len(file_data.mode_obj_data)
-                file_data.tcst_data = updated_data[4]
-                line_counts["Tcst"] += len(file_data.tcst_data)
-                file_data.mtd_2d_data = updated_data[5]
-                line_counts["MTD 2D"] += len(file_data.mtd_2d_data)
-                file_data.mtd_3d_single_data = updated_data[6]
-                line_counts["MTD 3D Single"] += len(file_data.mtd_3d_single_data)
-                file_data.mtd_3d_pair_data = updated_data[7]
-                line_counts["MTD 3D Pair"] += len(file_data.mtd_3d_pair_data)
+                    # reserve ids in blocks instead of finding the largest id each time
+                    if xml_loadfile.flags["id_block_size"] > 0:
+                        sql_run.id_sequence_on(xml_loadfile.flags["id_block_size"],
+                                               sql_run.cur)
+
+                    # check for existing headers and files while holding a lock on the table
+                    RunSql.concurrent_load = xml_loadfile.flags["concurrent_load"]
+
+                    # send data to LOAD DATA through a pipe instead of a temporary CSV file
+                    RunSql.stream_infile = xml_loadfile.flags["stream_infile"]
+
+                    # without LOAD DATA, insert batches of rows, on more connections if asked
+                    RunSql.insert_size = xml_loadfile.insert_size
+                    if sql_run.local_infile != 'ON' and \
+                            xml_loadfile.flags["insert_workers"] > 1:
+                        RunSql.insert_pool = RunSqlPool(xml_loadfile.connection,
+                                                        xml_loadfile.flags["insert_workers"])
+
+                    # a pool of connections, so that stat line types can be written in parallel
+                    if xml_loadfile.flags["write_workers"] > 1:
+                        sql_pool = RunSqlPool(xml_loadfile.connection,
+                                              xml_loadfile.flags["write_workers"])
+
+                    # start with the header ids kept by earlier loads
+                    if cache_file:
+                        header_cache.load(cache_file, sql_run.cur)
+
+                if chunk_file_id is not None:
+                    # later chunks of a large stat file use the data file written with
+                    # an earlier chunk, or are skipped if the file was a duplicate
+                    if chunk_file_id == CN.NO_KEY:
+                        continue
+                    file_data.data_files[CN.DATA_FILE_ID] = chunk_file_id
+                    file_data.stat_data[CN.DATA_FILE_ID] = chunk_file_id
+                    line_counts["Stat"] += len(file_data.stat_data)
+
+                else:
+                    # write the data file records out. put data file ids into other dataframes
+                    write_file = WriteFileSql()
+                    updated_data = write_file.write_file_sql(xml_loadfile.flags,
+                                                             file_data.data_files,
+                                                             file_data.stat_data,
+                                                             file_data.mode_cts_data,
+                                                             file_data.mode_obj_data,
+                                                             file_data.tcst_data,
+                                                             file_data.mtd_2d_data,
+                                                             file_data.mtd_3d_single_data,
+                                                             file_data.mtd_3d_pair_data,
+                                                             tmp_dir,
+                                                             sql_run.cur,
+                                                             sql_run.local_infile)
+
+                    file_data.data_files = updated_data[0]
+                    file_data.stat_data = updated_data[1]
+                    line_counts["Stat"] += len(file_data.stat_data)
+                    file_data.mode_cts_data = updated_data[2]
+                    line_counts["Mode CTS"] += len(file_data.mode_cts_data)
+                    file_data.mode_obj_data = updated_data[3]
+                    line_counts["Mode Obj"] += len(file_data.mode_obj_data)
+                    file_data.tcst_data = updated_data[4]
+                    line_counts["Tcst"] += len(file_data.tcst_data)
+                    file_data.mtd_2d_data = updated_data[5]
+                    line_counts["MTD 2D"] += len(file_data.mtd_2d_data)
+                    file_data.mtd_3d_single_data = updated_data[6]
+                    line_counts["MTD 3D Single"] += len(file_data.mtd_3d_single_data)
+                    file_data.mtd_3d_pair_data = updated_data[7]
+                    line_counts["MTD 3D Pair"] += len(file_data.mtd_3d_pair_data)
+
+                    # files written now or loaded before are skipped by the next load
+                    if manifest is not None:
+                        manifest.add_files(write_file.file_ids)
+
+                    # remember the data file id for the rest of the chunks of a large file
+                    if file_data.chunk_num:
+                        if file_data.data_files.empty:
+                            chunk_file_id = CN.NO_KEY
+                        else:
+                            chunk_file_id = file_data.data_files[CN.DATA_FILE_ID].iloc[0]
 
                 if file_data.data_files.empty:
                     logging.warning("!!! No data to load in current set %s", str(set_count))
-                    # move indices to the next set of files
-                    first_file, mid_file, last_file = next_set(mid_file, last_file)
+                else:
+                    loaded_files = file_data.data_files
 
                 if not file_data.stat_data.empty:
                     stat_lines = WriteStatSql()
@@ -254,7 +327,9 @@ def main():
                                                file_data.stat_data,
                                                tmp_dir,
                                                sql_run.cur,
-                                               sql_run.local_infile)
+                                               sql_run.local_infile,
+                                               header_cache,
+                                               sql_pool)
 
                 if (not file_data.mode_cts_data.empty) or (not file_data.mode_obj_data.empty):
                     cts_lines = WriteModeSql()
@@ -264,7 +339,8 @@ def main():
                                               file_data.mode_obj_data,
                                               tmp_dir,
                                               sql_run.cur,
-                                              sql_run.local_infile)
+                                              sql_run.local_infile,
+                                              header_cache)
 
                 if not file_data.tcst_data.empty:
                     tcst_lines = WriteTcstSql()
@@ -273,7 +349,8 @@ def main():
                                                file_data.tcst_data,
                                                tmp_dir,
                                                sql_run.cur,
-                                               sql_run.local_infile)
+                                               sql_run.local_infile,
+                                               header_cache)
 
                 if (not file_data.mtd_2d_data.empty) or (not file_data.mtd_3d_single_data.empty) \
                         or (not file_data.mtd_3d_pair_data.empty):
@@ -285,40 +362,56 @@ def main():
                                              file_data.mtd_3d_pair_data,
                                              tmp_dir,
                                              sql_run.cur,
-                                             sql_run.local_infile)
-
-                # Processing for the last set of data
-                if mid_file >= last_file:
-                    # If any data was written, write to the metadata and instance_info tables
-                    if not file_data.data_files.empty:
-                        write_file.write_metadata_sql(xml_loadfile.flags,
-                                                      file_data.data_files,
-                                                      xml_loadfile.group,
-                                                      xml_loadfile.description,
-                                                      xml_loadfile.load_note,
-                                                      xml_loadfile.xml_str,
-                                                      tmp_dir,
-                                                      sql_run.cur,
-                                                      sql_run.local_infile)
-
-                    #  if apply_indexes is set to true, load the indexes
-                    if xml_loadfile.flags["apply_indexes"]:
-                        sql_run.apply_indexes(False, sql_run.cur)
-
-                    if sql_run.conn.open:
-                        sql_run.sql_off(sql_run.conn, sql_run.cur)
-
-            # move indices to the next set of files
-            first_file, mid_file, last_file = next_set(mid_file, last_file)
+                                             sql_run.local_infile,
+                                             header_cache)
 
         except (RuntimeError, TypeError, NameError, KeyError):
             logging.error("*** %s occurred in Main writing data ***", sys.exc_info()[0])
             sys.exit("*** Error when writing data to database")
 
-    if not file_data.data_files.empty:
+    #
+    #  Processing after the last set of data
+    #
+    if sql_run is not None:
+        try:
+            # If any data was written, write to the metadata and instance_info tables
+            if loaded_files is not None:
+                write_file = WriteFileSql()
+                write_file.write_metadata_sql(xml_loadfile.flags,
+                                              loaded_files,
+                                              xml_loadfile.group,
+                                              xml_loadfile.description,
+                                              xml_loadfile.load_note,
+                                              xml_loadfile.xml_str,
+                                              tmp_dir,
+                                              sql_run.cur,
+                                              sql_run.local_infile)
+
+            #  if apply_indexes is set to true, load the indexes
+            if xml_loadfile.flags["apply_indexes"]:
+                sql_run.apply_indexes(False, sql_run.cur)
+
+        except (RuntimeError, TypeError, NameError, KeyError):
+            logging.error("*** %s occurred in Main writing metadata ***", sys.exc_info()[0])
+            sys.exit("*** Error when writing metadata to database")
+
+        if sql_pool is not None:
+            sql_pool.close_all()
+
+        if RunSql.insert_pool is not None:
+            RunSql.insert_pool.close_all()
+
         if sql_run.conn.open:
             sql_run.sql_off(sql_run.conn, sql_run.cur)
 
+        # keep the header ids for the next load into this database
+        if cache_file:
+            header_cache.save(cache_file)
+
+        # keep the loaded files for the next load into this database
+        if manifest_file:
+            manifest.save(manifest_file)
+
     load_time_end = time.perf_counter()
     load_time = timedelta(seconds=load_time_end - load_time_start)
 
@@ -368,40 +461,106 @@ def next_set(mid_file, last_file):
     return first_file, mid_file, last_file
 
 
-def purge_files(load_files, xml_flags):
-    """ remove any files from load list that user has disallowed in XML tags
+def split_sets(load_files):
+    """ split the list of files into sets of files that are read and written together
         Returns:
-           List with files user wants to load
+           List of lists of filenames
     """
+    file_sets = []
+    first_file = 0
+    last_file = len(load_files) - 1
 
-    updated_list = load_files
+    if last_file > CN.MAX_FILES:
+        mid_file = first_file + CN.MAX_FILES
+    else:
+        mid_file = last_file
 
-    try:
-        # Remove names of MET and VSDB files if user set load_stat tag to false
-        if not xml_flags["load_stat"]:
-            updated_list = [item for item in updated_list
-                            if not (item.lower().endswith(".stat") or
-                                    item.lower().endswith(".vsdb"))]
-
-        # Remove names of MODE files if user set load_mode tag to false
-        if not xml_flags["load_mode"] and updated_list:
-            updated_list = [item for item in updated_list
-                            if not (item.lower().endswith("cts.txt") or
-                                    item.lower().endswith("obj.txt"))]
-
-        # Remove names of MTD files if user set load_mtd tag to false
-        if not xml_flags["load_mtd"] and updated_list:
-            updated_list = [item for item in updated_list
-                            if not (item.lower().endswith("2d.txt") or
-                                    "3d_s" in item.lower() or
-                                    "3d_p" in item.lower())]
+    while mid_file <= last_file:
+        file_sets.append(load_files[first_file:mid_file + 1])
+        first_file, mid_file, last_file = next_set(mid_file, last_file)
+
+    return file_sets
 
-    except (RuntimeError, TypeError, NameError, KeyError):
-        logging.error("*** %s occurred in purge_files ***", sys.exc_info()[0])
-        logging.error("*** %s occurred in Main purging files not selected ***", sys.exc_info()[0])
-        sys.exit("*** Error in purge files")
 
-    return updated_list
+def read_file_sets(xml_flags, file_sets, line_types, file_stats):
+    """ read each set of files in turn, one set in memory at a time
+        file_stats has the type, size and modification time of the files, by full file name
+        Returns:
+           generator of set number and ReadDataFiles object for each set
+    """
+    for set_count, current_files in enumerate(file_sets, start=1):
+        try:
+
+            # large stat files are read a chunk of lines at a time, after the rest of the set
+            large_files = []
+            if xml_flags["stat_chunk_size"] > 0:
+                large_files = [lf for lf in current_files if lf in file_stats and
+                               file_stats[lf][0] == CN.STAT and
+                               file_stats[lf][1] > CN.CHUNK_FILE_SIZE]
+                current_files = [lf for lf in current_files if lf not in large_files]
+
+            # instantiate a read data files object
+            file_data = ReadDataFiles()
+
+            # read in the data files, with options specified by XML flags
+            if current_files:
+                file_data.read_data(xml_flags,
+                                    current_files,
+                                    line_types,
+                                    file_stats)
+
+        except (RuntimeError, TypeError, NameError, KeyError):
+            logging.error("*** %s occurred in Main reading data ***", sys.exc_info()[0])
+            sys.exit("*** Error when reading data files")
+
+        if current_files:
+            yield set_count, file_data
+
+        for large_file in large_files:
+            logging.info("Reading %s in chunks of %s lines", large_file,
+                         str(xml_flags["stat_chunk_size"]))
+            try:
+                for chunk_data in ReadDataFiles.read_data_chunks(xml_flags, large_file,
+                                                                 line_types, file_stats):
+                    yield set_count, chunk_data
+
+            except (RuntimeError, TypeError, NameError, KeyError):
+                logging.error("*** %s occurred in Main reading data ***", sys.exc_info()[0])
+                sys.exit("*** Error when reading data files")
+
+
+def read_ahead_sets(xml_flags, file_sets, line_types, file_stats):
+    """ read sets of files in a separate thread, ahead of the sets being written
+        a bounded queue holds at most read_ahead sets that have been read but not written
+        Returns:
+           generator of set number and ReadDataFiles object for each set
+    """
+    set_queue = queue.Queue(maxsize=xml_flags["read_ahead"])
+
+    def read_sets():
+        try:
+            for set_read in read_file_sets(xml_flags, file_sets, line_types, file_stats):
+                # blocks while the queue is full, so memory stays bounded
+                set_queue.put((set_read, None))
+        except BaseException as read_error:
+            # includes sys.exit, which only ends this thread - pass it on to main
+            set_queue.put((None, read_error))
+            return
+        set_queue.put((None, None))
+
+    # daemon thread, so an error while writing does not wait on the reader
+    reader = threading.Thread(target=read_sets, name="read_ahead", daemon=True)
+    reader.start()
+
+    while True:
+        set_read, read_error = set_queue.get()
+        if read_error is not None:
+            raise read_error
+        if set_read is None:
+            break
+        yield set_read
+
+    reader.join()
 
 
 if __name__ == '__main__':
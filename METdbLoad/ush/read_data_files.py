@@ -17,9 +17,12 @@ Copyright 2020 UCAR/NCAR/RAL, CSU/CIRES, Regents of the University of Colorado,
 
 import sys
 import os
-from pathlib import Path
+import stat
 import logging
 import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import islice
 from datetime import timedelta
 from datetime import datetime
 import numpy as np
@@ -34,6 +37,9 @@ class ReadDataFiles:
            N/A
     """
 
+    # dates already parsed, by date format then date, shared by all files of a load
+    date_cache = {}
+
     def __init__(self):
         self.cache = {}
         self.stat_data = pd.DataFrame()
@@ -44,9 +50,12 @@ class ReadDataFiles:
         self.mtd_2d_data = pd.DataFrame()
         self.mtd_3d_single_data = pd.DataFrame()
         self.mtd_3d_pair_data = pd.DataFrame()
+        # 0 when all of the files are read at once, or the number of a chunk of a large file
+        self.chunk_num = 0
 
-    def read_data(self, load_flags, load_files, line_types):
-        """ Read in data files as given in load_spec file.
+    def read_data(self, load_flags, load_files, line_types, file_stats=None):
+        """ Read in data files as given in load_spec file. file_stats has the type, size
+            and modification time of files already found, by full file name.
             Returns:
                N/A
         """
@@ -57,14 +66,87 @@ class ReadDataFiles:
 
         # handle MET files, VSDB files, MODE files, MTD files, TCST files
 
-        # speed up with dask delayed?
+        file_results = []
+
+        if file_stats is None:
+            file_stats = {}
+
+        try:
+
+            self.set_data_files(load_files, file_stats)
+
+            # Read each file, in parallel worker processes if more than one is requested.
+            # Results come back in file order either way.
+            file_rows = self.data_files.itertuples(name=None)
+            file_args = [(row[0], row[1], row[2], row[5], load_flags["fast_tokenizer"],
+                          load_flags["categorical_headers"], file_stats.get(row[1]))
+                         for row in file_rows]
+
+            if load_flags["num_workers"] > 1 and len(file_args) > 1:
+                with ProcessPoolExecutor(max_workers=load_flags["num_workers"]) as executor:
+                    file_results = list(executor.map(ReadDataFiles.read_file, *zip(*file_args)))
+            else:
+                file_results = [ReadDataFiles.read_file(*args) for args in file_args]
+
+        except (RuntimeError, TypeError, NameError, KeyError):
+            logging.error("*** %s in read_data upper ***", sys.exc_info()[0])
+
+        self.combine_data(load_flags, line_types, file_results)
+
+        read_time_end = time.perf_counter()
+        read_time = timedelta(seconds=read_time_end - read_time_start)
+
+        logging.info("    >>> Read time: %s", str(read_time))
+
+        logging.debug("[--- End read_data ---]")
+
+    def set_data_files(self, load_files, file_stats=None):
+        """ Put the list of files into a dataframe to collect info to write to database.
+            The type of each file is taken from file_stats, if it was found already.
+            Returns:
+               N/A
+        """
+        if file_stats is None:
+            file_stats = {}
+
+        self.data_files[CN.FULL_FILE] = load_files
+        # Add the code that describes what kind of file this is - stat, vsdb, etc
+        self.data_files[CN.DATA_FILE_LU_ID] = \
+            [file_stats[load_file][0] if load_file in file_stats else
+             self.get_lookup(load_file) for load_file in load_files]
+
+        # Drop files that are not of a valid type
+        self.data_files.drop(self.data_files[self.data_files[CN.DATA_FILE_LU_ID] ==
+                                             CN.NO_KEY].index, inplace=True)
+        self.data_files.reset_index(drop=True, inplace=True)
+
+        # If no valid files to load, exit
+        if not len(self.data_files):
+            logging.warning("!!! No valid files to load")
+            sys.exit("*** No valid files to load")
+
+        # Won't know database key until we interact with the database, so no keys yet
+        self.data_files[CN.DATA_FILE_ID] = CN.NO_KEY
+        # Store the index in a column to make later merging with stat data easier
+        self.data_files[CN.FILE_ROW] = self.data_files.index
+        # Break the full file name into path and filename
+        self.data_files[CN.FILEPATH] = \
+            self.data_files[CN.FULL_FILE].str.rpartition(CN.FWD_SLASH)[0]
+        self.data_files[CN.FILENAME] = \
+            self.data_files[CN.FULL_FILE].str.rpartition(CN.FWD_SLASH)[2]
+        # current date and time for load date
+        self.data_files[CN.LOAD_DATE] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.data_files[CN.MOD_DATE] = None
+
+    def combine_data(self, load_flags, line_types, file_results):
+        """ Combine the lines read from each file by type of file, and apply the
+            changes that are made to all of the lines of a type at once.
+            file_results is emptied, so that the lines of each file can be freed.
+            Returns:
+               N/A
+        """
 
         one_file = pd.DataFrame()
-        vsdb_file = pd.DataFrame()
-        mode_file = pd.DataFrame()
-        tcst_file = pd.DataFrame()
-        mtd_file = pd.DataFrame()
-        file_hdr = pd.DataFrame()
         all_stat = pd.DataFrame()
         all_vsdb = pd.DataFrame()
         all_cts = pd.DataFrame()
@@ -87,520 +169,66 @@ class ReadDataFiles:
 
         try:
 
-            # Put the list of files into a dataframe to collect info to write to database
-            self.data_files[CN.FULL_FILE] = load_files
-            # Add the code that describes what kind of file this is - stat, vsdb, etc
-            self.data_files[CN.DATA_FILE_LU_ID] = \
-                np.vectorize(self.get_lookup)(self.data_files[CN.FULL_FILE])
-
-            # Drop files that are not of a valid type
-            self.data_files.drop(self.data_files[self.data_files[CN.DATA_FILE_LU_ID] ==
-                                                 CN.NO_KEY].index, inplace=True)
-            self.data_files.reset_index(drop=True, inplace=True)
-
-            # If no valid files to load, exit
-            if not len(self.data_files):
-                logging.warning("!!! No valid files to load")
-                sys.exit("*** No valid files to load")
-
-            # Won't know database key until we interact with the database, so no keys yet
-            self.data_files[CN.DATA_FILE_ID] = CN.NO_KEY
-            # Store the index in a column to make later merging with stat data easier
-            self.data_files[CN.FILE_ROW] = self.data_files.index
-            # Break the full file name into path and filename
-            self.data_files[CN.FILEPATH] = \
-                self.data_files[CN.FULL_FILE].str.rpartition(CN.FWD_SLASH)[0]
-            self.data_files[CN.FILENAME] = \
-                self.data_files[CN.FULL_FILE].str.rpartition(CN.FWD_SLASH)[2]
-            # current date and time for load date
-            self.data_files[CN.LOAD_DATE] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.data_files[CN.MOD_DATE] = None
-
-            # Check to make sure files exist
-            for row in self.data_files.itertuples(name=None):
-
-                row_num = row[0]
-                filename = row[1]
-                lu_id = row[2]
-                filepath = row[5]
-
-                # Read in each file. Add columns if needed. Append to all_stat dataframe.
-                file_and_path = Path(filename)
-
-                if file_and_path.is_file():
-                    # check for blank files or, for MET, no data after header line files
-                    # handle variable number of fields
-                    # get file info like size of file and last modified date of file
-                    stat_info = os.stat(file_and_path)
-                    # get last modified date of file in standard time format
-                    mod_date = time.strftime('%Y-%m-%d %H:%M:%S',
-                                             time.localtime(stat_info.st_mtime))
-                    self.data_files.at[row_num, CN.MOD_DATE] = mod_date
-
-                    #
-                    # Process stat files
-                    #
-                    if lu_id == CN.STAT:
+            for row_num, mod_date, file_lines in file_results:
 
-                        # Get the first line of the .stat file that has the headers
-                        try:
-                            file_hdr = pd.read_csv(filename, delim_whitespace=True,
-                                                   header=None, nrows=1)
-                        except (pandas.errors.EmptyDataError):
-                            logging.warning("!!! Stat file %s has no columns", filename)
-                            continue
-
-                        # MET file has no headers or no text - it's empty
-                        if file_hdr.empty or stat_info.st_size == 0:
-                            logging.warning("!!! Stat file %s is empty", filename)
-                            continue
-
-                        # Add a DESC column if the data file does not have one
-                        if not file_hdr.iloc[0].str.contains(CN.UC_DESC).any():
-                            hdr_names = CN.SHORT_HEADER + CN.COL_NUMS
-                            one_file = self.read_stat(filename, hdr_names)
-
-                            # File has headers but not data
-                            if not len(one_file):
-                                continue
-
-                            # If the file has no DESC column, add UNITS as well
-                            one_file.insert(2, CN.DESCR, CN.NOTAV)
-                            one_file.insert(10, CN.FCST_UNITS, CN.NOTAV)
-                            one_file.insert(13, CN.OBS_UNITS, CN.NOTAV)
-
-                        # If the file has a DESC column, but no UNITS columns
-                        elif not file_hdr.iloc[0].str.contains(CN.UC_FCST_UNITS).any():
-                            hdr_names = CN.MID_HEADER + CN.COL_NUMS
-                            one_file = self.read_stat(filename, hdr_names)
-
-                            # File has headers but not data
-                            if not len(one_file):
-                                continue
-
-                            one_file.insert(10, CN.FCST_UNITS, CN.NOTAV)
-                            one_file.insert(13, CN.OBS_UNITS, CN.NOTAV)
-
-                        else:
-                            hdr_names = CN.LONG_HEADER + CN.COL_NUMS
-                            one_file = self.read_stat(filename, hdr_names)
-
-                            # File has headers but not data
-                            if not len(one_file):
-                                continue
-
-                        # Defragmenting
-                        one_file = one_file.copy()
-
-                        # add line numbers and count the header line, for stat files
-                        one_file[CN.LINE_NUM] = one_file.index + 2
-                        one_file = one_file.copy()
-
-                        # add columns for fcst_perc and obs_perc
-                        # these can be in parens in fcst_thresh and obs_thresh in stat files
-                        one_file[[CN.FCST_PERC, CN.OBS_PERC]] = \
-                            (CN.MV_NOTAV, CN.MV_NOTAV)
-
-                    #
-                    # Process vsdb files
-                    #
-                    elif lu_id == CN.VSDB_POINT_STAT:
-
-                        # check whether vsdb file is empty
-                        if stat_info.st_size == 0:
-                            logging.warning("!!! Vsdb file %s is empty", filename)
-                            continue
-
-                        # read each line in as 1 column so some fixes can be made
-                        vsdb_file = pd.read_csv(filename, sep=CN.SEP, header=None)
-
-                        if vsdb_file.iloc[:, 0].str.contains('=').any():
-
-                            # split vsdb data into 2 columns - before the =, and after
-                            # this protects from changing weird variable names, and removes =
-                            split_file = vsdb_file.iloc[:, 0].str.split('=', expand=True)
-
-                            # put space in front of hyphen between numbers in case space is missing
-                            # FHO can have negative thresh - fix with regex, only between numbers
-                            split_file[split_file.columns[1]] = \
-                                split_file[split_file.columns[1]].str.replace(r'(\d)-(\d)', r'\1 -\2',
-                                                                              regex=True)
-
-                            # merge the two halves together again
-                            vsdb_file = split_file.iloc[:, 0] + ' ' + split_file.iloc[:, 1]
-
-                        else:
-                            vsdb_file = vsdb_file.iloc[:, 0]
-
-                        # break fields out, separated by 1 or more spaces
-                        vsdb_file = vsdb_file.str.split(' +', expand=True)
-
-                        # add column names
-                        hdr_names = CN.VSDB_HEADER + CN.COL_NUMS
-                        vsdb_file.columns = hdr_names[:len(vsdb_file.columns)]
-
-                        # add line numbers, starting at 1
-                        vsdb_file.insert(9, CN.LINE_NUM, vsdb_file.index + 1)
-
-                        # some line types need a piece of the path added to the model name
-                        # if last part of path contains an underscore, save string after it.
-                        # then add it to model name
-                        last_slash = filepath.rfind(CN.FWD_SLASH)
-                        last_und = filepath.rfind('_')
-                        ens_value = ''
-                        if last_und > last_slash:
-                            ens_value = filepath[last_und:]
-                        if not vsdb_file.loc[vsdb_file.line_type.isin(CN.ENS_VSDB_LINE_TYPES),
-                                             CN.MODEL].empty:
-                            vsdb_file.loc[vsdb_file.line_type.isin(CN.ENS_VSDB_LINE_TYPES),
-                                          CN.MODEL] = \
-                                vsdb_file.loc[vsdb_file.line_type.isin(CN.ENS_VSDB_LINE_TYPES),
-                                              CN.MODEL].str.split(CN.FWD_SLASH).str[0] + \
-                                ens_value + CN.FWD_SLASH + \
-                                vsdb_file.loc[vsdb_file.line_type.isin(CN.ENS_VSDB_LINE_TYPES),
-                                              CN.MODEL].str.split(CN.FWD_SLASH).str[1]
-
-                    #
-                    # Process mode files
-                    #
-                    elif lu_id in (CN.MODE_CTS, CN.MODE_OBJ):
-
-                        # Get the first line of the mode cts or obj file that has the headers
-                        try:
-                            file_hdr = pd.read_csv(filename, delim_whitespace=True,
-                                                   nrows=1)
-                        except (pandas.errors.EmptyDataError):
-                            logging.warning("!!! Mode file %s has no columns", filename)
-                            continue
-
-                        # MODE file has no headers or no text - it's empty
-                        if file_hdr.empty or stat_info.st_size == 0:
-                            logging.warning("!!! Mode file %s is empty", filename)
-                            continue
-
-                        # use lower case of headers in file as column names
-                        hdr_names = file_hdr.columns.tolist()
-                        hdr_names = [hdr.lower() for hdr in hdr_names]
-
-                        # change field name after intensity_90 to be intensity_nn
-                        if CN.INTENSITY_90 in hdr_names:
-                            hdr_names[hdr_names.index(CN.INTENSITY_90) + 1] = CN.INTENSITY_NN
-
-                        # read the file
-                        mode_file = self.read_mode(filename, hdr_names)
-
-                        # File has headers but not data
-                        if not len(mode_file):
-                            continue
-
-                        # add line numbers and count the header line, for mode files
-                        mode_file[CN.LINENUMBER] = mode_file.index + 2
-
-                        # add other fields if not present in file
-                        if CN.N_VALID not in hdr_names:
-                            mode_file.insert(2, CN.N_VALID, CN.MV_NULL)
-                        if CN.GRID_RES not in hdr_names:
-                            mode_file.insert(3, CN.GRID_RES, CN.MV_NULL)
-                        if CN.DESCR not in hdr_names:
-                            mode_file.insert(4, CN.DESCR, CN.NOTAV)
-
-                        if CN.ASPECT_DIFF not in hdr_names:
-                            mode_file[CN.ASPECT_DIFF] = CN.MV_NOTAV
-
-                        if CN.CURV_RATIO not in hdr_names:
-                            mode_file[CN.CURV_RATIO] = CN.MV_NOTAV
-
-                        # add units if input file does not have them
-                        if CN.FCST_UNITS not in hdr_names:
-                            mode_file.insert(16, CN.FCST_UNITS, CN.NOTAV)
-                            mode_file.insert(19, CN.OBS_UNITS, CN.NOTAV)
-
-                        # if FCST_LEAD is NA, set it to 0
-                        if not mode_file.fcst_lead.dtypes == 'int':
-                            mode_file.loc[mode_file.fcst_lead == CN.NOTAV, CN.FCST_LEAD] = 0
-                            mode_file[CN.FCST_LEAD] = mode_file[CN.FCST_LEAD].astype(int)
-
-                        # initially, match line data to the index of the file names
-                        mode_file[CN.FILE_ROW] = row_num
-
-                        # determine which types of records are in the file
-                        if lu_id == CN.MODE_CTS:
-                            # mode_cts
-                            list_cts.append(mode_file)
-                        # both single and pair data can be in the same files
-                        else:
-                            list_obj.append(mode_file)
-                    #
-                    # Process TCST files
-                    #
-                    elif lu_id == CN.TCST:
-
-                        # Get the first line of the .tcst file that has the headers
-                        try:
-                            file_hdr = pd.read_csv(filename, delim_whitespace=True,
-                                                   header=None, nrows=1)
-                        except (pandas.errors.EmptyDataError):
-                            logging.warning("!!! TCST file %s has no columns", filename)
-                            continue
-
-                        # TCST file has no headers or no text - it's empty
-                        if file_hdr.empty or stat_info.st_size == 0:
-                            logging.warning("!!! TCST file %s is empty", filename)
-                            continue
-
-
-
-                        # Add a DESC column if the data file does not have one
-                        if not file_hdr.iloc[0].str.contains(CN.UC_DESC).any():
-                            hdr_names = CN.SHORT_HEADER_TCST + CN.COL_NUMS
-                            tcst_file = self.read_tcst(filename, hdr_names)
-                            # File has headers but not data
-                            if not len(tcst_file):
-                                continue
-                            tcst_file.insert(3, CN.DESCR, CN.NOTAV)
-                        else:
-                            hdr_names = CN.LONG_HEADER_TCST + CN.COL_NUMS
-                            tcst_file = self.read_tcst(filename, hdr_names)
-
-                        # File has headers but not data
-                        if not len(tcst_file):
-                            continue
-
-                        # add line numbers and count the header line, for tcst files
-                        tcst_file[CN.LINE_NUM] = tcst_file.index + 2
-
-                        tcst_file = tcst_file.rename(columns={"init": "fcst_init",
-                                                              "lead": "fcst_lead",
-                                                              "valid": "fcst_valid"})
-
-                    #
-                    # Process MTD files
-                    #
-                    elif lu_id in CN.MTD_FILES:
-
-                        # Get the first line of the MTD file that has the headers
-                        try:
-                            file_hdr = pd.read_csv(filename, delim_whitespace=True,
-                                                   nrows=1)
-                        except (pandas.errors.EmptyDataError):
-                            logging.warning("!!! MTD file %s has no columns", filename)
-                            continue
-
-                        # MTD file has no headers or no text - it's empty
-                        if file_hdr.empty or stat_info.st_size == 0:
-                            logging.warning("!!! MTD file %s is empty", filename)
-                            continue
-
-                        # use lower case of headers in file as column names
-                        hdr_names = file_hdr.columns.tolist()
-                        hdr_names = [hdr.lower() for hdr in hdr_names]
-
-                        # MET output uses desc, mysql uses descr
-                        hdr_names[2] = CN.DESCR
-
-                        # read the MTD file the same way as a mode file
-                        mtd_file = self.read_mode(filename, hdr_names)
-
-                        # File has headers but not data
-                        if not len(mtd_file):
-                            continue
-
-                        # change field name after intensity_90 to be intensity_nn
-                        if CN.INTENSITY_90 in mtd_file:
-                            inten_col = mtd_file.columns.get_loc(CN.INTENSITY_90)
-                            # if intensity_90 is the last column, add a column
-                            if inten_col == len(mtd_file.columns) - 1:
-                                mtd_file[CN.INTENSITY_NN] = CN.MV_NOTAV
-                            else:
-                                mtd_file = mtd_file.rename(columns={mtd_file.columns[inten_col + 1]:
-                                                           CN.INTENSITY_NN})
-
-                        # add a column for the revision_id
-                        mtd_file[CN.REVISION_ID] = CN.MV_NULL
-
-                        # add line numbers and count the header line, for MTD files
-                        mtd_file[CN.LINENUMBER] = mtd_file.index + 2
-
-                        # add other fields if not present in file
-                        if CN.FCST_T_BEG not in hdr_names:
-                            mtd_file.insert(8, CN.FCST_T_BEG, CN.MV_NULL)
-                        if CN.FCST_T_END not in hdr_names:
-                            mtd_file.insert(9, CN.FCST_T_END, CN.MV_NULL)
-                        if CN.OBS_T_BEG not in hdr_names:
-                            mtd_file.insert(12, CN.OBS_T_BEG, CN.MV_NULL)
-                        if CN.OBS_T_END not in hdr_names:
-                            mtd_file.insert(13, CN.OBS_T_END, CN.MV_NULL)
-
-                        # add units if input file does not have them
-                        if CN.FCST_UNITS not in hdr_names:
-                            mtd_file.insert(17, CN.FCST_UNITS, CN.NOTAV)
-                            mtd_file.insert(20, CN.OBS_UNITS, CN.NOTAV)
-
-                        # if FCST_LEAD is NA, set it to 0 to do math
-                        if not mtd_file.fcst_lead.dtypes == 'int':
-                            mtd_file.loc[mtd_file.fcst_lead == CN.NOTAV, CN.FCST_LEAD] = 0
-                            mtd_file[CN.FCST_LEAD] = mtd_file[CN.FCST_LEAD].astype(int)
-
-                        # Copy forecast lead times, without trailing 0000 if they have them
-                        mtd_file[CN.FCST_LEAD_HR] = \
-                            np.where(mtd_file[CN.FCST_LEAD] < 25,
-                                     mtd_file[CN.FCST_LEAD] * 10000,
-                                     mtd_file[CN.FCST_LEAD])
-
-                        mtd_file[CN.FCST_LEAD_HR] = (((mtd_file[CN.FCST_LEAD_HR] // 10000) * 3600) +
-                                                     ((mtd_file[CN.FCST_LEAD_HR] // 100 % 100) * 60) +
-                                                     (mtd_file[CN.FCST_LEAD_HR] % 100))
-
-                        # Calculate fcst_init = fcst_valid - fcst_lead hours (in seconds)
-                        mtd_file.insert(5, CN.FCST_INIT, 0)
-                        mtd_file[CN.FCST_INIT] = mtd_file[CN.FCST_VALID] - \
-                            pd.to_timedelta(mtd_file[CN.FCST_LEAD_HR], unit='sec')
-
-                        # Where fcst_lead was set to zero for math, set it to -9999
-                        if mtd_file[CN.FCST_LEAD].eq(0).any():
-                            mtd_file.loc[mtd_file.fcst_lead == 0, CN.FCST_LEAD] = CN.MV_NOTAV
-
-                        # if OBS_LEAD is NA, set it to -9999
-                        if not mtd_file.obs_lead.dtypes == 'int':
-                            mtd_file.loc[mtd_file.obs_lead == CN.NOTAV, CN.OBS_LEAD] = CN.MV_NOTAV
-                            mtd_file[CN.OBS_LEAD] = mtd_file[CN.OBS_LEAD].astype(int)
-
-                        # initially, match line data to the index of the file names
-                        mtd_file[CN.FILE_ROW] = row_num
-
-                        # determine which types of records are in the file
-                        if lu_id in (CN.MTD_3D_SS, CN.MTD_3D_SC):
-                            # MTD single
-                            list_single.append(mtd_file)
-                        elif lu_id in (CN.MTD_3D_PS, CN.MTD_3D_PC):
-                            # MTD pair
-                            list_pair.append(mtd_file)
-                        # MTD 2D
-                        else:
-                            # This is an MTD 2D Revision file if 10 columns each have a single value
-                            mtd_rev = True
-                            for mtd_col in CN.MTD_2D_REV_FIELDS:
-                                if not (mtd_file[mtd_col] == mtd_file[mtd_col][0]).all():
-                                    mtd_rev = False
-                            if mtd_rev:
-                                rev_lines = []
-                                obj_id = 'new'
-                                obj_ct = 1
-                                last_line = len(mtd_file.index)
-                                create_new = False
-
-                                # Make all the fields float that are needed to do math
-                                mtd_file[mtd_file.columns[26:38]] = \
-                                    mtd_file[mtd_file.columns[26:38]].astype(float)
-                                # Create new rows by subtracting a previous row from a row by object
-                                # Unique sequential id is assigned to items with the same object id
-                                # Only object ids with more than 2 lines count and create lines
-                                for row_num, mtd_row in mtd_file.iterrows():
-
-                                    if mtd_row[CN.OBJECT_ID] == obj_id:
-                                        obj_ct += 1
-                                        if obj_ct == 2 and (row_num + 1) < last_line and \
-                                           mtd_file[CN.OBJECT_ID][row_num + 1] == obj_id:
-                                            rev_ctr += 1
-                                            create_new = True
-                                        if obj_ct > 1 and create_new:
-                                            new_line = mtd_file.iloc[row_num].to_dict()
-                                            new_line[CN.FCST_VAR] = 'REV_' + new_line[CN.FCST_VAR]
-                                            new_line[CN.OBS_VAR] = 'REV_' + new_line[CN.OBS_VAR]
-                                            new_line[CN.AREA] -= mtd_file[CN.AREA][row_num - 1]
-                                            new_line[CN.CENTROID_X] -= \
-                                                mtd_file[CN.CENTROID_X][row_num - 1]
-                                            new_line[CN.CENTROID_Y] -= \
-                                                mtd_file[CN.CENTROID_Y][row_num - 1]
-                                            new_line[CN.CENTROID_LAT] -= \
-                                                mtd_file[CN.CENTROID_LAT][row_num - 1]
-                                            new_line[CN.CENTROID_LON] -= \
-                                                mtd_file[CN.CENTROID_LON][row_num - 1]
-                                            new_line[CN.AXIS_ANG] = CN.MV_NOTAV
-                                            new_line[CN.INTENSITY_10] -= \
-                                                mtd_file[CN.INTENSITY_10][row_num - 1]
-                                            new_line[CN.INTENSITY_25] -= \
-                                                mtd_file[CN.INTENSITY_25][row_num - 1]
-                                            new_line[CN.INTENSITY_50] -= \
-                                                mtd_file[CN.INTENSITY_50][row_num - 1]
-                                            new_line[CN.INTENSITY_75] -= \
-                                                mtd_file[CN.INTENSITY_75][row_num - 1]
-                                            new_line[CN.INTENSITY_90] -= \
-                                                mtd_file[CN.INTENSITY_90][row_num - 1]
-                                            new_line[CN.REVISION_ID] = rev_ctr
-                                            new_line[CN.LINENUMBER] = 0
-                                            rev_lines.append(new_line)
-                                    else:
-                                        obj_id = mtd_row[CN.OBJECT_ID]
-                                        obj_ct = 1
-                                        create_new = False
-                                rev_df = pd.DataFrame(rev_lines)
-                                mtd_file = pd.concat([mtd_file, rev_df], ignore_index=True,
-                                                     sort=False)
-                                rev_df = rev_df.iloc[0:0]
-                            # concat new rows with mtd_file
-                            list_2d.append(mtd_file)
+                lu_id = self.data_files.at[row_num, CN.DATA_FILE_LU_ID]
 
-                    else:
-                        logging.warning("!!! File type of %s not valid", filename)
+                if mod_date is not None:
+                    self.data_files.at[row_num, CN.MOD_DATE] = mod_date
 
-                    # re-initialize pandas dataframes before reading next file
-                    if not one_file.empty:
-                        # initially, match line data to the index of the file names
-                        one_file[CN.FILE_ROW] = row_num
-                        # keep the dataframes from each file in a list
-                        list_frames.append(one_file)
-                        logging.debug("Lines in %s: %s", filename,
-                                      str(len(one_file.index)))
-                        one_file = one_file.iloc[0:0]
-                        if not file_hdr.empty:
-                            file_hdr = file_hdr.iloc[0:0]
-                    elif not vsdb_file.empty:
-                        vsdb_file.insert(10, CN.FILE_ROW, row_num)
-                        list_vsdb.append(vsdb_file)
-                        logging.debug("Lines in %s: %s", filename,
-                                      str(len(vsdb_file.index)))
-                        vsdb_file = vsdb_file.iloc[0:0]
-                    elif not mode_file.empty:
-                        logging.debug("Lines in %s: %s", filename,
-                                      str(len(mode_file.index)))
-                        mode_file = mode_file.iloc[0:0]
-                        if not file_hdr.empty:
-                            file_hdr = file_hdr.iloc[0:0]
-                    elif not tcst_file.empty:
-                        # initially, match line data to the index of the file names
-                        tcst_file[CN.FILE_ROW] = row_num
-                        # keep the dataframes from each file in a list
-                        list_tcst.append(tcst_file)
-                        logging.debug("Lines in %s: %s", filename,
-                                      str(len(one_file.index)))
-                        tcst_file = tcst_file.iloc[0:0]
-                        if not file_hdr.empty:
-                            file_hdr = file_hdr.iloc[0:0]
-                    elif not mtd_file.empty:
-                        logging.debug("Lines in %s: %s", filename,
-                                      str(len(mtd_file.index)))
-                        mtd_file = mtd_file.iloc[0:0]
-                        if not file_hdr.empty:
-                            file_hdr = file_hdr.iloc[0:0]
-                    else:
-                        logging.warning("!!! Empty file %s", filename)
-                        continue
+                if file_lines.empty:
+                    continue
+
+                # keep the dataframes from each file in a list by type of file
+                if lu_id == CN.STAT:
+                    list_frames.append(file_lines)
+                elif lu_id == CN.VSDB_POINT_STAT:
+                    list_vsdb.append(file_lines)
+                elif lu_id == CN.MODE_CTS:
+                    list_cts.append(file_lines)
+                # both single and pair data can be in the same files
+                elif lu_id == CN.MODE_OBJ:
+                    list_obj.append(file_lines)
+                elif lu_id == CN.TCST:
+                    list_tcst.append(file_lines)
+                elif lu_id in (CN.MTD_3D_SS, CN.MTD_3D_SC):
+                    list_single.append(file_lines)
+                elif lu_id in (CN.MTD_3D_PS, CN.MTD_3D_PC):
+                    list_pair.append(file_lines)
                 else:
-                    logging.warning("!!! No file %s", filename)
-                    sys.exit("*** No file " + filename)
+                    # revision ids start at 1 in each 2D file, make them unique for this load
+                    if CN.REVISION_ID in file_lines.columns:
+                        rev_rows = file_lines[CN.REVISION_ID] != CN.MV_NULL
+                        if rev_rows.any():
+                            file_rev_ct = file_lines.loc[rev_rows, CN.REVISION_ID].max()
+                            file_lines.loc[rev_rows, CN.REVISION_ID] = \
+                                file_lines.loc[rev_rows, CN.REVISION_ID] + rev_ctr
+                            rev_ctr += file_rev_ct
+                    list_2d.append(file_lines)
 
             # end for row
 
+            # the lists by type of file now hold the only references to the lines,
+            # so the lines of each file are freed once they are concatenated
+            file_results.clear()
+            file_lines = None
+
         except (RuntimeError, TypeError, NameError, KeyError):
-            logging.error("*** %s in read_data upper ***", sys.exc_info()[0])
+            logging.error("*** %s in read_data combine_data ***", sys.exc_info()[0])
 
         try:
 
             # concatenate all the dataframes - much faster than doing an append each time
             # added sort=False on 10/21/19 because that will be new default behavior
             if list_frames:
-                all_stat = pd.concat(list_frames, ignore_index=True, sort=False)
+                # the lines of a single file are used as they are, without a copy
+                if len(list_frames) == 1:
+                    all_stat = list_frames[0]
+                    all_stat.reset_index(drop=True, inplace=True)
+                else:
+                    if load_flags["categorical_headers"]:
+                        ReadDataFiles.union_categories(list_frames)
+                    all_stat = pd.concat(list_frames, ignore_index=True, sort=False)
                 list_frames = []
 
                 all_stat.fcst_thresh = all_stat.fcst_thresh.astype(str)
@@ -609,40 +237,15 @@ class ReadDataFiles:
                     all_stat.loc[all_stat['1'] == CN.NOTAV, '1'] = CN.MV_NOTAV
                     all_stat['1'] = all_stat['1'].astype(float)
 
-                # if a fcst percentage thresh is used, it is in parens in fcst_thresh
-                if all_stat.fcst_thresh.str.contains(CN.L_PAREN, regex=False).any():
-                    # save the value in parens
-                    all_stat.loc[all_stat.fcst_thresh.str.contains(CN.L_PAREN, regex=False) &
-                                 all_stat.fcst_thresh.str.contains(CN.R_PAREN, regex=False),
-                                 CN.FCST_PERC] = \
-                        all_stat.loc[all_stat.fcst_thresh.str.contains(CN.L_PAREN, regex=False) &
-                                     all_stat.fcst_thresh.str.contains(CN.R_PAREN, regex=False),
-                                     CN.FCST_THRESH].str.split(CN.L_PAREN).str[1]. \
-                        str.split(CN.R_PAREN).str[0].astype(float)
-                    # remove the percentage from fcst_thresh
-                    all_stat.loc[all_stat.fcst_thresh.str.contains(CN.L_PAREN, regex=False) &
-                                 all_stat.fcst_thresh.str.contains(CN.R_PAREN, regex=False),
-                                 CN.FCST_THRESH] = \
-                        all_stat.loc[all_stat.fcst_thresh.str.contains(CN.L_PAREN, regex=False) &
-                                     all_stat.fcst_thresh.str.contains(CN.R_PAREN, regex=False),
-                                     CN.FCST_THRESH].str.split(CN.L_PAREN).str[0]
-
-                # if an obs percentage thresh is used, it is in parens in obs_thresh
-                if all_stat.obs_thresh.str.contains(CN.L_PAREN, regex=False).any():
-                    # save the value in parens
-                    all_stat.loc[all_stat.obs_thresh.str.contains(CN.L_PAREN, regex=False) &
-                                 all_stat.obs_thresh.str.contains(CN.R_PAREN, regex=False),
-                                 CN.OBS_PERC] = \
-                        all_stat.loc[all_stat.obs_thresh.str.contains(CN.L_PAREN, regex=False) &
-                                     all_stat.obs_thresh.str.contains(CN.R_PAREN, regex=False),
-                                     CN.OBS_THRESH].str.split(CN.L_PAREN).str[1]. \
-                        str.split(CN.R_PAREN).str[0].astype(float)
-                    all_stat.loc[all_stat.obs_thresh.str.contains(CN.L_PAREN, regex=False) &
-                                 all_stat.obs_thresh.str.contains(CN.R_PAREN, regex=False),
-                                 CN.OBS_THRESH] = \
-                        all_stat.loc[all_stat.obs_thresh.str.contains(CN.L_PAREN, regex=False) &
-                                     all_stat.obs_thresh.str.contains(CN.R_PAREN, regex=False),
-                                     CN.OBS_THRESH].str.split(CN.L_PAREN).str[0]
+                # if a percentage thresh is used, it is in parens in fcst_thresh or obs_thresh
+                # save the value in parens, and remove it from the thresh
+                for thresh_col, perc_col in ((CN.FCST_THRESH, CN.FCST_PERC),
+                                             (CN.OBS_THRESH, CN.OBS_PERC)):
+                    perc_lines, thresh, perc = \
+                        ReadDataFiles.split_thresh_perc(all_stat[thresh_col])
+                    if perc_lines.any():
+                        all_stat.loc[perc_lines, perc_col] = perc
+                        all_stat.loc[perc_lines, thresh_col] = thresh
 
                 # These warnings and transforms only apply to stat files
                 # Give a warning message with data if value of alpha for an alpha line type is NA
@@ -819,8 +422,9 @@ class ReadDataFiles:
                 # add description
                 all_vsdb.insert(2, CN.DESCR, CN.NOTAV)
                 # reformat fcst_valid_beg
-                all_vsdb.fcst_valid_beg = pd.to_datetime(all_vsdb.fcst_valid_beg,
-                                                         format='%Y%m%d%H')
+                all_vsdb.fcst_valid_beg = ReadDataFiles.parse_dates(all_vsdb.fcst_valid_beg,
+                                                                    CN.VSDB_DATE_FORMAT,
+                                                                    errors='raise')
                 # fcst_valid_end is the same as fcst_valid_beg
                 all_vsdb[CN.FCST_VALID_END] = all_vsdb.fcst_valid_beg
                 # fcst_lead must be numeric for later calculations
@@ -900,25 +504,7 @@ class ReadDataFiles:
                         # all 3 sets of columns need to be float
                         vsdb_data[CN.COL_NUMS[0:-2]] = \
                             vsdb_data[CN.COL_NUMS[0:-2]].astype(float)
-                        # the total in line_data_pct is the total of all of the subtotals
-                        # calculated per row as there may be rows with different values of n_var
-                        col_total = vsdb_data.columns.get_loc(CN.TOTAL_LC)
-                        # calculate thresh and re-order values to be
-                        # in sets of thresh_i, oy_i, and on_i (which is subtotal - oy_i)
-                        for index, row in vsdb_data.iterrows():
-                            var_values = []
-                            n_var = row[CN.N_VAR]
-                            col_start = zero_col + n_var
-                            col_end = col_start + n_var
-                            vsdb_data.iloc[index, col_total] = row[col_start:col_end].sum()
-                            for i in range(n_var):
-                                var_values = var_values + [i/(n_var - 1)]
-                                var_values = var_values + [row[str(i)]]
-                                var_values = var_values + [row[str(i+n_var)] - row[str(i)]]
-                            df_values = pd.DataFrame([var_values])
-                            # put calculated and re-ordered values back into vsdb_data
-                            vsdb_data.iloc[index, zero_col:zero_col + (n_var * 3)] = \
-                                df_values.iloc[0, 0:n_var * 3].values
+                        ReadDataFiles.vsdb_pct_values(vsdb_data)
                         one_file = vsdb_data[CN.LONG_HEADER + [CN.TOTAL_LC, CN.N_VAR] +
                                              CN.COL_NUMS[0:-2] +
                                              [CN.LINE_NUM, CN.FILE_ROW]]
@@ -1115,28 +701,32 @@ class ReadDataFiles:
                 logging.debug("Shape of all_stat before transforms: %s", str(all_stat.shape))
 
                 # delete any lines that have invalid line_types
-                invalid_line_indexes = all_stat[~all_stat.line_type.isin(CN.UC_LINE_TYPES)].index
+                invalid_lines = ~all_stat.line_type.isin(CN.UC_LINE_TYPES)
 
-                if not invalid_line_indexes.empty:
+                if invalid_lines.any():
 
                     logging.warning("!!! Warning, invalid line_types:")
                     logging.warning("line types: %s",
-                                    str(all_stat.iloc[invalid_line_indexes].line_type))
+                                    str(all_stat.line_type[invalid_lines]))
 
-                    all_stat.drop(invalid_line_indexes, axis=0, inplace=True)
+                # the lines to delete are collected first, so that the dataframe is
+                # copied once when lines are deleted, and not at all when none are
+                drop_lines = invalid_lines
 
                 # if user specified line types to load, delete the rest
                 if load_flags["line_type_load"]:
-                    all_stat.drop(all_stat[~all_stat.line_type.isin(line_types)].index,
-                                  inplace=True)
+                    drop_lines = drop_lines | ~all_stat.line_type.isin(line_types)
 
                 # if load_spec has flag to not load MPR records, delete them
                 if not load_flags["load_mpr"]:
-                    all_stat.drop(all_stat[all_stat.line_type == CN.MPR].index, inplace=True)
+                    drop_lines = drop_lines | (all_stat.line_type == CN.MPR)
 
                 # if load_spec has flag to not load ORANK records, delete them
                 if not load_flags["load_orank"]:
-                    all_stat.drop(all_stat[all_stat.line_type == CN.ORANK].index, inplace=True)
+                    drop_lines = drop_lines | (all_stat.line_type == CN.ORANK)
+
+                if drop_lines.any():
+                    all_stat.drop(all_stat.index[drop_lines], inplace=True)
 
                 # reset the index, in case any lines have been deleted
                 all_stat.reset_index(drop=True, inplace=True)
@@ -1170,6 +760,10 @@ class ReadDataFiles:
 
                 logging.debug("Shape of all_stat after transforms: %s", str(all_stat.shape))
 
+                # the thresholds were changed as strings, and VSDB lines added as strings
+                if load_flags["categorical_headers"]:
+                    ReadDataFiles.header_categories(all_stat)
+
                 self.stat_data = all_stat
                 all_stat = all_stat.iloc[0:0]
 
@@ -1255,12 +849,612 @@ class ReadDataFiles:
             logging.error("*** %s in read_data if list_pair ***",
                           sys.exc_info()[0])
 
-        read_time_end = time.perf_counter()
-        read_time = timedelta(seconds=read_time_end - read_time_start)
+    @staticmethod
+    def read_file(row_num, filename, lu_id, filepath, fast_tokenizer=False,
+                  categorical_headers=False, file_stat=None):
+        """ Read in one data file and apply the changes that only need that file.
+            Called directly, or in a worker process when num_workers is more than 1.
+            file_stat is the type, size and modification time of the file, if found already.
+            Returns:
+               row number of the file, last modified date and dataframe of lines
+        """
 
-        logging.info("    >>> Read time: %s", str(read_time))
+        mod_date = None
+        file_lines = pd.DataFrame()
 
-        logging.debug("[--- End read_data ---]")
+        # Read in each file. Add columns if needed.
+        if file_stat is None:
+            file_stat = ReadDataFiles.file_stat(filename)
+
+        if file_stat is not None:
+            # check for blank files or, for MET, no data after header line files
+            # handle variable number of fields
+            # get file info like size of file and last modified date of file
+            file_size = file_stat[1]
+            # get last modified date of file in standard time format
+            mod_date = time.strftime('%Y-%m-%d %H:%M:%S',
+                                     time.localtime(file_stat[2] // 10 ** 9))
+
+            #
+            # Process stat files
+            #
+            if lu_id == CN.STAT:
+
+                hdr_names = ReadDataFiles.read_stat_hdr(filename, file_size)
+
+                if not hdr_names:
+                    return row_num, mod_date, pd.DataFrame()
+
+                one_file = ReadDataFiles.read_stat(filename, hdr_names,
+                                                   fast_tokenizer=fast_tokenizer)
+
+                # File has headers but not data
+                if not len(one_file):
+                    return row_num, mod_date, pd.DataFrame()
+
+                file_lines = ReadDataFiles.stat_lines(one_file, hdr_names, row_num,
+                                                      categorical_headers)
+
+            #
+            # Process vsdb files
+            #
+            elif lu_id == CN.VSDB_POINT_STAT:
+
+                # check whether vsdb file is empty
+                if file_size == 0:
+                    logging.warning("!!! Vsdb file %s is empty", filename)
+                    return row_num, mod_date, pd.DataFrame()
+
+                # read each line in as 1 column so some fixes can be made
+                vsdb_file = pd.read_csv(filename, sep=CN.SEP, header=None)
+
+                if vsdb_file.iloc[:, 0].str.contains('=').any():
+
+                    # split vsdb data into 2 columns - before the =, and after
+                    # this protects from changing weird variable names, and removes =
+                    split_file = vsdb_file.iloc[:, 0].str.split('=', expand=True)
+
+                    # put space in front of hyphen between numbers in case space is missing
+                    # FHO can have negative thresh - fix with regex, only between numbers
+                    split_file[split_file.columns[1]] = \
+                        split_file[split_file.columns[1]].str.replace(r'(\d)-(\d)', r'\1 -\2',
+                                                                      regex=True)
+
+                    # merge the two halves together again
+                    vsdb_file = split_file.iloc[:, 0] + ' ' + split_file.iloc[:, 1]
+
+                else:
+                    vsdb_file = vsdb_file.iloc[:, 0]
+
+                # break fields out, separated by 1 or more spaces
+                vsdb_file = vsdb_file.str.split(' +', expand=True)
+
+                # add column names
+                hdr_names = CN.VSDB_HEADER + CN.COL_NUMS
+                vsdb_file.columns = hdr_names[:len(vsdb_file.columns)]
+
+                # add line numbers, starting at 1
+                vsdb_file.insert(9, CN.LINE_NUM, vsdb_file.index + 1)
+
+                # some line types need a piece of the path added to the model name
+                # if last part of path contains an underscore, save string after it.
+                # then add it to model name
+                last_slash = filepath.rfind(CN.FWD_SLASH)
+                last_und = filepath.rfind('_')
+                ens_value = ''
+                if last_und > last_slash:
+                    ens_value = filepath[last_und:]
+                if not vsdb_file.loc[vsdb_file.line_type.isin(CN.ENS_VSDB_LINE_TYPES),
+                                     CN.MODEL].empty:
+                    vsdb_file.loc[vsdb_file.line_type.isin(CN.ENS_VSDB_LINE_TYPES),
+                                  CN.MODEL] = \
+                        vsdb_file.loc[vsdb_file.line_type.isin(CN.ENS_VSDB_LINE_TYPES),
+                                      CN.MODEL].str.split(CN.FWD_SLASH).str[0] + \
+                        ens_value + CN.FWD_SLASH + \
+                        vsdb_file.loc[vsdb_file.line_type.isin(CN.ENS_VSDB_LINE_TYPES),
+                                      CN.MODEL].str.split(CN.FWD_SLASH).str[1]
+
+                vsdb_file.insert(10, CN.FILE_ROW, row_num)
+
+                file_lines = vsdb_file
+
+            #
+            # Process mode files
+            #
+            elif lu_id in (CN.MODE_CTS, CN.MODE_OBJ):
+
+                # Get the first line of the mode cts or obj file that has the headers
+                try:
+                    file_hdr = pd.read_csv(filename, delim_whitespace=True,
+                                           nrows=1)
+                except (pd.errors.EmptyDataError):
+                    logging.warning("!!! Mode file %s has no columns", filename)
+                    return row_num, mod_date, pd.DataFrame()
+
+                # MODE file has no headers or no text - it's empty
+                if file_hdr.empty or file_size == 0:
+                    logging.warning("!!! Mode file %s is empty", filename)
+                    return row_num, mod_date, pd.DataFrame()
+
+                # use lower case of headers in file as column names
+                hdr_names = file_hdr.columns.tolist()
+                hdr_names = [hdr.lower() for hdr in hdr_names]
+
+                # change field name after intensity_90 to be intensity_nn
+                if CN.INTENSITY_90 in hdr_names:
+                    hdr_names[hdr_names.index(CN.INTENSITY_90) + 1] = CN.INTENSITY_NN
+
+                # read the file
+                mode_file = ReadDataFiles.read_mode(filename, hdr_names, fast_tokenizer)
+
+                # File has headers but not data
+                if not len(mode_file):
+                    return row_num, mod_date, pd.DataFrame()
+
+                # add line numbers and count the header line, for mode files
+                mode_file[CN.LINENUMBER] = mode_file.index + 2
+
+                # add other fields if not present in file
+                if CN.N_VALID not in hdr_names:
+                    mode_file.insert(2, CN.N_VALID, CN.MV_NULL)
+                if CN.GRID_RES not in hdr_names:
+                    mode_file.insert(3, CN.GRID_RES, CN.MV_NULL)
+                if CN.DESCR not in hdr_names:
+                    mode_file.insert(4, CN.DESCR, CN.NOTAV)
+
+                if CN.ASPECT_DIFF not in hdr_names:
+                    mode_file[CN.ASPECT_DIFF] = CN.MV_NOTAV
+
+                if CN.CURV_RATIO not in hdr_names:
+                    mode_file[CN.CURV_RATIO] = CN.MV_NOTAV
+
+                # add units if input file does not have them
+                if CN.FCST_UNITS not in hdr_names:
+                    mode_file.insert(16, CN.FCST_UNITS, CN.NOTAV)
+                    mode_file.insert(19, CN.OBS_UNITS, CN.NOTAV)
+
+                # if FCST_LEAD is NA, set it to 0
+                if not mode_file.fcst_lead.dtypes == 'int':
+                    mode_file.loc[mode_file.fcst_lead == CN.NOTAV, CN.FCST_LEAD] = 0
+                    mode_file[CN.FCST_LEAD] = mode_file[CN.FCST_LEAD].astype(int)
+
+                # initially, match line data to the index of the file names
+                mode_file[CN.FILE_ROW] = row_num
+
+                file_lines = mode_file
+            #
+            # Process TCST files
+            #
+            elif lu_id == CN.TCST:
+
+                # Get the first line of the .tcst file that has the headers
+                try:
+                    file_hdr = pd.read_csv(filename, delim_whitespace=True,
+                                           header=None, nrows=1)
+                except (pd.errors.EmptyDataError):
+                    logging.warning("!!! TCST file %s has no columns", filename)
+                    return row_num, mod_date, pd.DataFrame()
+
+                # TCST file has no headers or no text - it's empty
+                if file_hdr.empty or file_size == 0:
+                    logging.warning("!!! TCST file %s is empty", filename)
+                    return row_num, mod_date, pd.DataFrame()
+
+                # Add a DESC column if the data file does not have one
+                if not file_hdr.iloc[0].str.contains(CN.UC_DESC).any():
+                    hdr_names = CN.SHORT_HEADER_TCST + CN.COL_NUMS
+                    tcst_file = ReadDataFiles.read_tcst(filename, hdr_names, fast_tokenizer)
+                    # File has headers but not data
+                    if not len(tcst_file):
+                        return row_num, mod_date, pd.DataFrame()
+                    tcst_file.insert(3, CN.DESCR, CN.NOTAV)
+                else:
+                    hdr_names = CN.LONG_HEADER_TCST + CN.COL_NUMS
+                    tcst_file = ReadDataFiles.read_tcst(filename, hdr_names, fast_tokenizer)
+
+                # File has headers but not data
+                if not len(tcst_file):
+                    return row_num, mod_date, pd.DataFrame()
+
+                # add line numbers and count the header line, for tcst files
+                tcst_file[CN.LINE_NUM] = tcst_file.index + 2
+
+                tcst_file = tcst_file.rename(columns={"init": "fcst_init",
+                                                      "lead": "fcst_lead",
+                                                      "valid": "fcst_valid"})
+
+                # initially, match line data to the index of the file names
+                tcst_file[CN.FILE_ROW] = row_num
+
+                file_lines = tcst_file
+
+            #
+            # Process MTD files
+            #
+            elif lu_id in CN.MTD_FILES:
+
+                # Get the first line of the MTD file that has the headers
+                try:
+                    file_hdr = pd.read_csv(filename, delim_whitespace=True,
+                                           nrows=1)
+                except (pd.errors.EmptyDataError):
+                    logging.warning("!!! MTD file %s has no columns", filename)
+                    return row_num, mod_date, pd.DataFrame()
+
+                # MTD file has no headers or no text - it's empty
+                if file_hdr.empty or file_size == 0:
+                    logging.warning("!!! MTD file %s is empty", filename)
+                    return row_num, mod_date, pd.DataFrame()
+
+                # use lower case of headers in file as column names
+                hdr_names = file_hdr.columns.tolist()
+                hdr_names = [hdr.lower() for hdr in hdr_names]
+
+                # MET output uses desc, mysql uses descr
+                hdr_names[2] = CN.DESCR
+
+                # read the MTD file the same way as a mode file
+                mtd_file = ReadDataFiles.read_mode(filename, hdr_names, fast_tokenizer)
+
+                # File has headers but not data
+                if not len(mtd_file):
+                    return row_num, mod_date, pd.DataFrame()
+
+                # change field name after intensity_90 to be intensity_nn
+                if CN.INTENSITY_90 in mtd_file:
+                    inten_col = mtd_file.columns.get_loc(CN.INTENSITY_90)
+                    # if intensity_90 is the last column, add a column
+                    if inten_col == len(mtd_file.columns) - 1:
+                        mtd_file[CN.INTENSITY_NN] = CN.MV_NOTAV
+                    else:
+                        mtd_file = mtd_file.rename(columns={mtd_file.columns[inten_col + 1]:
+                                                   CN.INTENSITY_NN})
+
+                # add a column for the revision_id
+                mtd_file[CN.REVISION_ID] = CN.MV_NULL
+
+                # add line numbers and count the header line, for MTD files
+                mtd_file[CN.LINENUMBER] = mtd_file.index + 2
+
+                # add other fields if not present in file
+                if CN.FCST_T_BEG not in hdr_names:
+                    mtd_file.insert(8, CN.FCST_T_BEG, CN.MV_NULL)
+                if CN.FCST_T_END not in hdr_names:
+                    mtd_file.insert(9, CN.FCST_T_END, CN.MV_NULL)
+                if CN.OBS_T_BEG not in hdr_names:
+                    mtd_file.insert(12, CN.OBS_T_BEG, CN.MV_NULL)
+                if CN.OBS_T_END not in hdr_names:
+                    mtd_file.insert(13, CN.OBS_T_END, CN.MV_NULL)
+
+                # add units if input file does not have them
+                if CN.FCST_UNITS not in hdr_names:
+                    mtd_file.insert(17, CN.FCST_UNITS, CN.NOTAV)
+                    mtd_file.insert(20, CN.OBS_UNITS, CN.NOTAV)
+
+                # if FCST_LEAD is NA, set it to 0 to do math
+                if not mtd_file.fcst_lead.dtypes == 'int':
+                    mtd_file.loc[mtd_file.fcst_lead == CN.NOTAV, CN.FCST_LEAD] = 0
+                    mtd_file[CN.FCST_LEAD] = mtd_file[CN.FCST_LEAD].astype(int)
+
+                # Copy forecast lead times, without trailing 0000 if they have them
+                mtd_file[CN.FCST_LEAD_HR] = \
+                    np.where(mtd_file[CN.FCST_LEAD] < 25,
+                             mtd_file[CN.FCST_LEAD] * 10000,
+                             mtd_file[CN.FCST_LEAD])
+
+                mtd_file[CN.FCST_LEAD_HR] = (((mtd_file[CN.FCST_LEAD_HR] // 10000) * 3600) +
+                                             ((mtd_file[CN.FCST_LEAD_HR] // 100 % 100) * 60) +
+                                             (mtd_file[CN.FCST_LEAD_HR] % 100))
+
+                # Calculate fcst_init = fcst_valid - fcst_lead hours (in seconds)
+                mtd_file.insert(5, CN.FCST_INIT, 0)
+                mtd_file[CN.FCST_INIT] = mtd_file[CN.FCST_VALID] - \
+                    pd.to_timedelta(mtd_file[CN.FCST_LEAD_HR], unit='sec')
+
+                # Where fcst_lead was set to zero for math, set it to -9999
+                if mtd_file[CN.FCST_LEAD].eq(0).any():
+                    mtd_file.loc[mtd_file.fcst_lead == 0, CN.FCST_LEAD] = CN.MV_NOTAV
+
+                # if OBS_LEAD is NA, set it to -9999
+                if not mtd_file.obs_lead.dtypes == 'int':
+                    mtd_file.loc[mtd_file.obs_lead == CN.NOTAV, CN.OBS_LEAD] = CN.MV_NOTAV
+                    mtd_file[CN.OBS_LEAD] = mtd_file[CN.OBS_LEAD].astype(int)
+
+                # initially, match line data to the index of the file names
+                mtd_file[CN.FILE_ROW] = row_num
+
+                # MTD 2D
+                if lu_id not in (CN.MTD_3D_SS, CN.MTD_3D_SC, CN.MTD_3D_PS, CN.MTD_3D_PC):
+                    # This is an MTD 2D Revision file if 10 columns each have a single value
+                    mtd_rev = True
+                    for mtd_col in CN.MTD_2D_REV_FIELDS:
+                        if not (mtd_file[mtd_col] == mtd_file[mtd_col][0]).all():
+                            mtd_rev = False
+                    if mtd_rev:
+                        # revision ids are numbered within this file, read_data makes them unique
+
+                        # Make all the fields float that are needed to do math
+                        mtd_file[mtd_file.columns[26:38]] = \
+                            mtd_file[mtd_file.columns[26:38]].astype(float)
+
+                        mtd_file = ReadDataFiles.add_revisions(mtd_file)
+
+                file_lines = mtd_file
+
+            else:
+                logging.warning("!!! File type of %s not valid", filename)
+                return row_num, mod_date, pd.DataFrame()
+
+            if file_lines.empty:
+                logging.warning("!!! Empty file %s", filename)
+                return row_num, mod_date, pd.DataFrame()
+
+            logging.debug("Lines in %s: %s", filename, str(len(file_lines.index)))
+
+        else:
+            logging.warning("!!! No file %s", filename)
+            sys.exit("*** No file " + filename)
+
+        return row_num, mod_date, file_lines
+
+    @staticmethod
+    def read_stat_chunks(row_num, filename, chunk_size, fast_tokenizer=False,
+                         categorical_headers=False, file_stat=None):
+        """ Read in one stat file a chunk of lines at a time, so that memory used
+            depends on the size of the chunk and not the size of the file.
+            Returns:
+               generator of row number of the file, last modified date and
+               dataframe of lines for each chunk
+        """
+
+        if file_stat is None:
+            file_stat = ReadDataFiles.file_stat(filename)
+
+        if file_stat is None:
+            logging.warning("!!! No file %s", filename)
+            sys.exit("*** No file " + filename)
+
+        mod_date = time.strftime('%Y-%m-%d %H:%M:%S',
+                                 time.localtime(file_stat[2] // 10 ** 9))
+
+        hdr_names = ReadDataFiles.read_stat_hdr(filename, file_stat[1])
+
+        if not hdr_names:
+            return
+
+        for one_file in ReadDataFiles.read_stat(filename, hdr_names, chunk_size,
+                                                fast_tokenizer):
+            logging.debug("Lines in chunk of %s: %s", filename, str(len(one_file.index)))
+            yield row_num, mod_date, ReadDataFiles.stat_lines(one_file, hdr_names, row_num,
+                                                              categorical_headers)
+
+    @staticmethod
+    def read_data_chunks(load_flags, load_file, line_types, file_stats=None):
+        """ Read in one large stat file, stat_chunk_size lines at a time. Each chunk
+            goes through the same changes as a whole set of files in read_data.
+            Returns:
+               generator of a ReadDataFiles object for each chunk, with chunk_num set
+        """
+        if file_stats is None:
+            file_stats = {}
+
+        file_data = ReadDataFiles()
+        file_data.set_data_files([load_file], file_stats)
+
+        chunks = ReadDataFiles.read_stat_chunks(0, file_data.data_files.at[0, CN.FULL_FILE],
+                                                load_flags["stat_chunk_size"],
+                                                load_flags["fast_tokenizer"],
+                                                load_flags["categorical_headers"],
+                                                file_stats.get(load_file))
+
+        for chunk_num, file_result in enumerate(chunks, start=1):
+            chunk_data = ReadDataFiles()
+            chunk_data.chunk_num = chunk_num
+            chunk_data.data_files = file_data.data_files.copy()
+            chunk_data.combine_data(load_flags, line_types, [file_result])
+            yield chunk_data
+
+    @staticmethod
+    def read_stat_hdr(filename, file_size):
+        """ Read the header line of a stat file to find out which columns it has.
+            Returns:
+               list of column names, or an empty list if the file is empty
+        """
+
+        # Get the first line of the .stat file that has the headers
+        try:
+            file_hdr = pd.read_csv(filename, delim_whitespace=True,
+                                   header=None, nrows=1)
+        except (pd.errors.EmptyDataError):
+            logging.warning("!!! Stat file %s has no columns", filename)
+            return []
+
+        # MET file has no headers or no text - it's empty
+        if file_hdr.empty or file_size == 0:
+            logging.warning("!!! Stat file %s is empty", filename)
+            return []
+
+        # Data file does not have a DESC column
+        if not file_hdr.iloc[0].str.contains(CN.UC_DESC).any():
+            return CN.SHORT_HEADER + CN.COL_NUMS
+
+        # Data file has a DESC column, but no UNITS columns
+        if not file_hdr.iloc[0].str.contains(CN.UC_FCST_UNITS).any():
+            return CN.MID_HEADER + CN.COL_NUMS
+
+        return CN.LONG_HEADER + CN.COL_NUMS
+
+    @staticmethod
+    def stat_lines(one_file, hdr_names, row_num, categorical_headers=False):
+        """ Add the columns a stat file is missing, and the line numbers.
+            With categorical_headers, the header columns are made categoricals.
+            Returns:
+               dataframe of stat lines with all of the LONG_HEADER columns
+        """
+
+        # If the file has no DESC column, or no UNITS columns, add them all at once
+        # by taking the columns in LONG_HEADER order. Inserting them one at a time
+        # fragments the dataframe, and it then has to be copied to defragment it.
+        if CN.FCST_UNITS not in hdr_names:
+            one_file = one_file.reindex(columns=CN.LONG_HEADER + CN.COL_NUMS,
+                                        fill_value=CN.NOTAV)
+
+        # add line numbers and count the header line, for stat files
+        # a chunk of a file keeps its index from the start of the file
+        one_file[CN.LINE_NUM] = one_file.index + 2
+
+        # add columns for fcst_perc and obs_perc
+        # these can be in parens in fcst_thresh and obs_thresh in stat files
+        one_file[CN.FCST_PERC] = CN.MV_NOTAV
+        one_file[CN.OBS_PERC] = CN.MV_NOTAV
+
+        # initially, match line data to the index of the file names
+        one_file[CN.FILE_ROW] = row_num
+
+        if categorical_headers:
+            ReadDataFiles.header_categories(one_file)
+
+        return one_file
+
+    @staticmethod
+    def header_categories(stat_data):
+        """ Make the stat header columns categoricals, which keep each different value
+            once and a small integer code for each line.
+            Returns:
+               N/A
+        """
+        for col_name in CN.STAT_HEADER_CATEGORIES:
+            if col_name in stat_data and \
+                    not isinstance(stat_data[col_name].dtype, pd.CategoricalDtype):
+                stat_data[col_name] = stat_data[col_name].astype('category')
+
+    @staticmethod
+    def union_categories(list_frames):
+        """ Give each categorical column the same categories in all of the dataframes,
+            so that concat keeps it a categorical instead of going back to strings.
+            Returns:
+               N/A
+        """
+        for col_name in CN.STAT_HEADER_CATEGORIES:
+            columns = [one_file[col_name] for one_file in list_frames
+                       if isinstance(one_file[col_name].dtype, pd.CategoricalDtype)]
+            if len(columns) < len(list_frames):
+                continue
+
+            categories = columns[0].cat.categories
+            for column in columns[1:]:
+                categories = categories.union(column.cat.categories)
+
+            for one_file in list_frames:
+                one_file[col_name] = one_file[col_name].cat.set_categories(categories)
+
+    @staticmethod
+    def vsdb_pct_values(vsdb_data):
+        """ Put the total of the subtotals, and sets of thresh_i, oy_i and on_i, in the
+            columns of VSDB PCT lines read with n_var oy_i and then n_var subtotals.
+            Returns:
+               N/A
+        """
+        zero_col = vsdb_data.columns.get_loc('0')
+        # the total in line_data_pct is the total of all of the subtotals
+        # calculated per row as there may be rows with different values of n_var
+        col_total = vsdb_data.columns.get_loc(CN.TOTAL_LC)
+        # calculate thresh and re-order values to be
+        # in sets of thresh_i, oy_i, and on_i (which is subtotal - oy_i)
+        # rows with the same n_var are done together as one block
+        pct_values = vsdb_data[CN.COL_NUMS[0:-2]].to_numpy()
+        for n_var, var_rows in vsdb_data.groupby(CN.N_VAR).indices.items():
+            oy_values = pct_values[var_rows, 0:n_var]
+            sub_values = pct_values[var_rows, n_var:n_var * 2]
+            # add the subtotals in column order, skipping missing values
+            sub_total = np.zeros(len(var_rows))
+            for sub_col in range(n_var):
+                sub_total = sub_total + np.nan_to_num(sub_values[:, sub_col])
+            vsdb_data.iloc[var_rows, col_total] = sub_total
+            thresh_values = np.broadcast_to(np.arange(n_var) / (n_var - 1),
+                                            oy_values.shape)
+            # put calculated and re-ordered values back into vsdb_data
+            vsdb_data.iloc[var_rows, zero_col:zero_col + (n_var * 3)] = \
+                np.stack([thresh_values, oy_values, sub_values - oy_values],
+                         axis=2).reshape(len(var_rows), n_var * 3)
+
+    @staticmethod
+    def add_revisions(mtd_file):
+        """ Add a REV_ line for each line of an MTD 2D revision file that follows a line
+            with the same object id, in runs of more than 2 lines of one object.
+            Returns:
+               the lines of the file followed by the revision lines
+        """
+        # Lines in a row with the same object id are a run of that object
+        # Only runs of more than 2 lines create lines, and get a unique
+        # sequential revision id
+        obj_ids = mtd_file[CN.OBJECT_ID]
+        run_start = obj_ids.ne(obj_ids.shift())
+        runs = run_start.cumsum()
+        run_size = runs.map(runs.value_counts())
+        rev_run = run_size > 2
+        rev_ids = (run_start & rev_run).cumsum()
+
+        # Create new rows by subtracting the previous row from each row
+        # after the first in the run
+        rev_rows = np.flatnonzero(rev_run & ~run_start)
+        rev_lines = []
+        if rev_rows.size:
+            rev_df = mtd_file.iloc[rev_rows].reset_index(drop=True)
+            rev_df[CN.FCST_VAR] = 'REV_' + rev_df[CN.FCST_VAR]
+            rev_df[CN.OBS_VAR] = 'REV_' + rev_df[CN.OBS_VAR]
+            rev_fields = [CN.AREA, CN.CENTROID_X, CN.CENTROID_Y,
+                          CN.CENTROID_LAT, CN.CENTROID_LON,
+                          CN.INTENSITY_10, CN.INTENSITY_25, CN.INTENSITY_50,
+                          CN.INTENSITY_75, CN.INTENSITY_90]
+            for rev_field in rev_fields:
+                rev_df[rev_field] = rev_df[rev_field].to_numpy() - \
+                    mtd_file[rev_field].to_numpy()[rev_rows - 1]
+            rev_df[CN.AXIS_ANG] = CN.MV_NOTAV
+            rev_df[CN.REVISION_ID] = rev_ids.to_numpy()[rev_rows]
+            rev_df[CN.LINENUMBER] = 0
+            rev_lines = [rev_df]
+
+        return pd.concat([mtd_file] + rev_lines, ignore_index=True, sort=False)
+
+    @staticmethod
+    def split_thresh_perc(thresholds):
+        """ Split thresholds with a percentile in parens into the thresh and percentile.
+            Thresholds repeat on many lines, so each different one is split only once.
+            Returns:
+               boolean array of the lines with a percentile, and arrays of the thresh
+               and of the percentile value for each of those lines
+        """
+        codes, uniques = pd.factorize(thresholds)
+        uniques = pd.Series(uniques, dtype=object)
+
+        # a percentile needs a right paren as well as a left one
+        has_perc = uniques.str.contains(CN.R_PAREN, regex=False) & \
+            uniques.str.contains(CN.L_PAREN, regex=False)
+        parts = uniques.str.extract(CN.THRESH_PERC)
+
+        # missing thresholds have a code of -1, the last value
+        perc_lines = np.append(has_perc.to_numpy(dtype=bool), False)[codes]
+        perc_codes = codes[perc_lines]
+
+        return (perc_lines, parts[0].to_numpy()[perc_codes],
+                parts[1].where(has_perc).astype(float).to_numpy()[perc_codes])
+
+    @staticmethod
+    def file_stat(filename):
+        """ Find the type of a file from its name, and its size and modification time.
+            Returns:
+               data_file_lu_id, size and modification time in ns, or None if not a file
+        """
+        try:
+            stat_info = os.stat(filename)
+        except OSError:
+            return None
+
+        if not stat.S_ISREG(stat_info.st_mode):
+            return None
+
+        return ReadDataFiles.get_lookup(filename), stat_info.st_size, stat_info.st_mtime_ns
 
     @staticmethod
     def get_lookup(filename):
@@ -1296,50 +1490,93 @@ class ReadDataFiles:
             lu_type = CN.TCST
         return lu_type
 
-    def read_stat(self, filename, hdr_names):
+    @staticmethod
+    def read_stat(filename, hdr_names, chunk_size=None, fast_tokenizer=False):
         """ Read stat files without assuming read_csv can pad lines
             Returns:
                all the stat lines in a dataframe, with dates converted to datetime
+               or, with a chunk_size, a generator of dataframes of chunk_size lines
         """
+        if chunk_size:
+            return ReadDataFiles.read_stat_iter(filename, hdr_names, chunk_size, fast_tokenizer)
+
         stat_file = pd.DataFrame()
 
         try:
-            # Read file in as 1 column to avoid problems with varying line lengths
-            stat_file = pd.read_csv(filename, sep=CN.SEP, skiprows=1, header=None,
-                                    skipinitialspace=True)
+            stat_file = ReadDataFiles.read_lines(filename, hdr_names, fast_tokenizer)
         except (pd.errors.EmptyDataError):
             logging.warning("!!! Stat file %s has no data after headers",
                             filename)
             return stat_file
 
-        stat_file = stat_file.iloc[:, 0]
-
-        # break fields out, separated by 1 or more spaces
-        stat_file = stat_file.str.split(' +', expand=True)
+        return ReadDataFiles.split_stat(stat_file, hdr_names, fast_tokenizer)
 
-        # add new blank columns, and column headers
-        if len(stat_file.columns) < len(hdr_names):
-            stat_file[hdr_names[len(stat_file.columns):len(hdr_names) + 1]] = CN.NOTAV
+    @staticmethod
+    def read_stat_iter(filename, hdr_names, chunk_size, fast_tokenizer=False):
+        """ Read stat files chunk_size lines at a time
+            Returns:
+               generator of dataframes of stat lines, with dates converted to datetime
+        """
+        try:
+            with closing(ReadDataFiles.read_lines(filename, hdr_names, fast_tokenizer,
+                                                  chunk_size)) as reader:
+                for stat_file in reader:
+                    yield ReadDataFiles.split_stat(stat_file, hdr_names, fast_tokenizer)
+        except (pd.errors.EmptyDataError):
+            logging.warning("!!! Stat file %s has no data after headers",
+                            filename)
 
-        # add column names
-        stat_file.columns = hdr_names
+    @staticmethod
+    def split_stat(stat_file, hdr_names, fast_tokenizer=False):
+        """ Break the stat lines into fields
+            Returns:
+               the stat lines in a dataframe, with dates converted to datetime
+        """
+        stat_file = ReadDataFiles.split_fields(stat_file, hdr_names, fast_tokenizer)
 
         # convert MET dates to correct date format
-        stat_file[CN.FCST_VALID_BEG] = \
-            pd.to_datetime(stat_file[CN.FCST_VALID_BEG],
-                           format='%Y%m%d_%H%M%S', errors='ignore')
-        stat_file[CN.FCST_VALID_END] = \
-            pd.to_datetime(stat_file[CN.FCST_VALID_END],
-                           format='%Y%m%d_%H%M%S', errors='ignore')
-        stat_file[CN.OBS_VALID_BEG] = \
-            pd.to_datetime(stat_file[CN.OBS_VALID_BEG],
-                           format='%Y%m%d_%H%M%S', errors='ignore')
-        stat_file[CN.OBS_VALID_END] = \
-            pd.to_datetime(stat_file[CN.OBS_VALID_END],
-                           format='%Y%m%d_%H%M%S', errors='ignore')
+        for date_field in (CN.FCST_VALID_BEG, CN.FCST_VALID_END,
+                           CN.OBS_VALID_BEG, CN.OBS_VALID_END):
+            stat_file[date_field] = ReadDataFiles.parse_dates(stat_file[date_field])
         return stat_file
 
-    def read_tcst(self, filename, hdr_names):
+    @staticmethod
+    def parse_dates(dates, date_format=CN.MET_DATE_FORMAT, errors='ignore'):
+        """ Convert a column of dates to datetime, parsing each different date once.
+            Dates parsed for earlier columns or files are taken from date_cache.
+            As with pd.to_datetime, if errors is 'ignore' and any date can not be
+            parsed, the column is returned unchanged.
+            Returns:
+               the column of dates, converted to datetime
+        """
+        if pd.api.types.is_datetime64_any_dtype(dates):
+            return dates
+
+        date_codes, unique_dates = pd.factorize(dates)
+        format_cache = ReadDataFiles.date_cache.setdefault(date_format, {})
+
+        # times of the dates in this column, from the cache or parsed now
+        column_times = {date: format_cache[date] for date in unique_dates
+                        if date in format_cache}
+        new_dates = [date for date in unique_dates if date not in column_times]
+
+        if new_dates:
+            new_times = pd.to_datetime(pd.Index(new_dates, dtype=object),
+                                       format=date_format, errors=errors)
+            if not isinstance(new_times, pd.DatetimeIndex):
+                return dates
+            column_times.update(zip(new_dates, new_times.to_numpy()))
+            if len(format_cache) + len(new_dates) > CN.DATE_CACHE_SIZE:
+                format_cache.clear()
+            format_cache.update(zip(new_dates, new_times.to_numpy()))
+
+        # missing dates have a code of -1, which takes the NaT on the end
+        unique_times = np.array([column_times[date] for date in unique_dates] +
+                                [np.datetime64('NaT')], dtype='datetime64[ns]')
+        return pd.Series(unique_times[date_codes], index=dates.index, name=dates.name)
+
+    @staticmethod
+    def read_tcst(filename, hdr_names, fast_tokenizer=False):
         """ Read in all of the lines except the header of a tcst file.
             Returns:
                all the tcst lines in a dataframe, with dates converted to datetime
@@ -1347,37 +1584,22 @@ class ReadDataFiles:
         stat_file = pd.DataFrame()
 
         try:
-            # Read file in as 1 column to avoid problems with varying line lengths
-            stat_file = pd.read_csv(filename, sep=CN.SEP, skiprows=1, header=None,
-                                    skipinitialspace=True)
+            stat_file = ReadDataFiles.read_lines(filename, hdr_names, fast_tokenizer)
         except (pd.errors.EmptyDataError):
             logging.warning("!!! Tcst file %s has no data after headers",
                             filename)
             return stat_file
 
-        stat_file = stat_file.iloc[:, 0]
-
-        # break fields out, separated by 1 or more spaces
-        stat_file = stat_file.str.split(' +', expand=True)
-
-        # add new blank columns, and column headers
-        if len(stat_file.columns) < len(hdr_names):
-            stat_file[hdr_names[len(stat_file.columns):len(hdr_names) + 1]] = CN.NOTAV
-
-        # add column names
-        stat_file.columns = hdr_names
+        stat_file = ReadDataFiles.split_fields(stat_file, hdr_names, fast_tokenizer)
 
         # convert MET dates to correct date format
-        stat_file[CN.INIT] = \
-            pd.to_datetime(stat_file[CN.INIT],
-                           format='%Y%m%d_%H%M%S', errors='ignore')
-        stat_file[CN.VALID] = \
-            pd.to_datetime(stat_file[CN.VALID],
-                           format='%Y%m%d_%H%M%S', errors='ignore')
+        stat_file[CN.INIT] = ReadDataFiles.parse_dates(stat_file[CN.INIT])
+        stat_file[CN.VALID] = ReadDataFiles.parse_dates(stat_file[CN.VALID])
 
         return stat_file
 
-    def read_mode(self, filename, hdr_names):
+    @staticmethod
+    def read_mode(filename, hdr_names, fast_tokenizer=False):
         """ Read in all of the lines except the header of a mode file.
             Returns:
                all the mode lines in a dataframe, with dates converted to datetime
@@ -1385,18 +1607,89 @@ class ReadDataFiles:
         stat_file = pd.DataFrame()
 
         try:
-            # Read file in as 1 column to avoid problems with varying line lengths
-            stat_file = pd.read_csv(filename, sep=CN.SEP, skiprows=1, header=None,
-                                    skipinitialspace=True)
+            stat_file = ReadDataFiles.read_lines(filename, hdr_names, fast_tokenizer)
         except (pd.errors.EmptyDataError):
             logging.warning("!!! Mode or MTD file %s has no data after headers",
                             filename)
             return stat_file
 
-        stat_file = stat_file.iloc[:, 0]
+        stat_file = ReadDataFiles.split_fields(stat_file, hdr_names, fast_tokenizer)
+
+        # convert MET dates to correct date format
+        stat_file[CN.FCST_VALID] = ReadDataFiles.parse_dates(stat_file[CN.FCST_VALID])
+        stat_file.loc[stat_file.obs_valid == CN.NOTAV, CN.OBS_VALID] = CN.MV_NULL
+        stat_file[CN.OBS_VALID] = ReadDataFiles.parse_dates(stat_file[CN.OBS_VALID])
+
+        return stat_file
+
+    @staticmethod
+    def read_lines(filename, hdr_names, fast_tokenizer=False, chunk_size=None):
+        """ Read in all of the lines except the header of a MET file.
+            By default each line is read in as 1 column, to be split by split_fields.
+            With fast_tokenizer, the lines are already split into fields.
+            Returns:
+               dataframe of lines, or a reader of chunk_size lines at a time
+        """
+        if fast_tokenizer:
+            if chunk_size:
+                return ReadDataFiles.tokenize_chunks(filename, chunk_size)
+            with open(filename, encoding='utf-8') as met_file:
+                # skip the header line
+                met_file.readline()
+                return ReadDataFiles.tokenize_lines(met_file)
+
+        # Read file in as 1 column to avoid problems with varying line lengths
+        return pd.read_csv(filename, sep=CN.SEP, skiprows=1, header=None,
+                           skipinitialspace=True, chunksize=chunk_size)
+
+    @staticmethod
+    def tokenize_chunks(filename, chunk_size):
+        """ Split the lines after the header of a MET file chunk_size lines at a time.
+            Returns:
+               generator of dataframes of fields, indexed from the start of the file
+        """
+        with open(filename, encoding='utf-8') as met_file:
+            # skip the header line
+            met_file.readline()
+            first_line = 0
+            while True:
+                lines = list(islice(met_file, chunk_size))
+                if not lines:
+                    break
+                stat_file = ReadDataFiles.tokenize_lines(lines)
+                # a chunk of only blank lines is skipped, not taken as the end of the file
+                if stat_file.empty:
+                    continue
+                stat_file.index = stat_file.index + first_line
+                first_line = first_line + len(stat_file.index)
+                yield stat_file
+
+    @staticmethod
+    def tokenize_lines(lines):
+        """ Split lines on whitespace and skip blank lines. The lines are split one at a
+            time in Python, then the lists of fields become a dataframe at once. This is
+            faster than splitting with the C parser of read_csv, which makes a string for
+            each field a short line is missing. For lines of fields separated by spaces,
+            makes the same fields as str.split(' +', expand=True). Unlike that split, tabs
+            also separate fields, and leading or trailing whitespace makes no empty first
+            or last field.
+            Returns:
+               dataframe of fields, with short lines padded with None
+        """
+        return pd.DataFrame([fields for fields in (line.split() for line in lines)
+                             if fields])
 
-        # break fields out, separated by 1 or more spaces
-        stat_file = stat_file.str.split(' +', expand=True)
+    @staticmethod
+    def split_fields(stat_file, hdr_names, fast_tokenizer=False):
+        """ Break lines read by read_lines into fields, and name the columns
+            Returns:
+               dataframe with a column for each of hdr_names
+        """
+        if not fast_tokenizer:
+            stat_file = stat_file.iloc[:, 0]
+
+            # break fields out, separated by 1 or more spaces
+            stat_file = stat_file.str.split(' +', expand=True)
 
         # add new blank columns, and column headers
         if len(stat_file.columns) < len(hdr_names):
@@ -1405,13 +1698,4 @@ class ReadDataFiles:
         # add column names
         stat_file.columns = hdr_names
 
-        # convert MET dates to correct date format
-        stat_file[CN.FCST_VALID] = \
-            pd.to_datetime(stat_file[CN.FCST_VALID],
-                           format='%Y%m%d_%H%M%S', errors='ignore')
-        stat_file.loc[stat_file.obs_valid == CN.NOTAV, CN.OBS_VALID] = CN.MV_NULL
-        stat_file[CN.OBS_VALID] = \
-            pd.to_datetime(stat_file[CN.OBS_VALID],
-                           format='%Y%m%d_%H%M%S', errors='ignore')
-
         return stat_file
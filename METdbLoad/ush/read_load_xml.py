@@ -19,10 +19,13 @@ import sys
 import os
 from pathlib import Path
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
 import pandas as pd
 from lxml import etree
 
 import constants as CN
+from read_data_files import ReadDataFiles
 
 
 class XmlLoadFile:
@@ -61,8 +64,24 @@ class XmlLoadFile:
         self.flags['drop_indexes'] = False
         self.flags['apply_indexes'] = False
         self.flags['load_xml'] = True
+        self.flags['fast_tokenizer'] = False
+        self.flags['categorical_headers'] = False
+        self.flags['num_workers'] = 1
+        self.flags['read_ahead'] = 0
+        self.flags['stat_chunk_size'] = 0
+        self.flags['header_cache_size'] = CN.HEADER_CACHE_SIZE
+        self.flags['header_cache_dir'] = None
+        self.flags['manifest_dir'] = None
+        self.flags['id_block_size'] = 0
+        self.flags['concurrent_load'] = False
+        self.flags['write_workers'] = 1
+        self.flags['insert_workers'] = 1
+        self.flags['stream_infile'] = False
+        self.flags['scan_workers'] = CN.SCAN_WORKERS
 
         self.load_files = []
+        # data_file_lu_id, size and modification time in ns of files to load, by full file name
+        self.file_stats = {}
         self.line_types = []
 
     def read_xml(self):
@@ -115,6 +134,47 @@ class XmlLoadFile:
             if root.xpath('insert_size') and root.xpath('insert_size')[0].text.isdigit():
                 self.insert_size = int(root.xpath('insert_size')[0].text)
 
+            # num_workers value is an integer, number of processes used to read files
+            if root.xpath('num_workers') and root.xpath('num_workers')[0].text.isdigit():
+                self.flags['num_workers'] = max(1, int(root.xpath('num_workers')[0].text))
+
+            # read_ahead value is an integer, number of sets of files read before being written
+            if root.xpath('read_ahead') and root.xpath('read_ahead')[0].text.isdigit():
+                self.flags['read_ahead'] = int(root.xpath('read_ahead')[0].text)
+
+            # stat_chunk_size value is an integer, number of lines read at a time from large files
+            if root.xpath('stat_chunk_size') and root.xpath('stat_chunk_size')[0].text.isdigit():
+                self.flags['stat_chunk_size'] = int(root.xpath('stat_chunk_size')[0].text)
+
+            # header_cache_size value is an integer, most header ids kept between sets of files
+            if root.xpath('header_cache_size') and \
+                    root.xpath('header_cache_size')[0].text.isdigit():
+                self.flags['header_cache_size'] = int(root.xpath('header_cache_size')[0].text)
+
+            # write_workers value is an integer, number of connections writing line types
+            if root.xpath('write_workers') and root.xpath('write_workers')[0].text.isdigit():
+                self.flags['write_workers'] = max(1, int(root.xpath('write_workers')[0].text))
+
+            # insert_workers value is an integer, number of connections inserting batches of rows
+            if root.xpath('insert_workers') and root.xpath('insert_workers')[0].text.isdigit():
+                self.flags['insert_workers'] = max(1, int(root.xpath('insert_workers')[0].text))
+
+            # scan_workers value is an integer, number of threads listing template directories
+            if root.xpath('scan_workers') and root.xpath('scan_workers')[0].text.isdigit():
+                self.flags['scan_workers'] = max(1, int(root.xpath('scan_workers')[0].text))
+
+            # id_block_size value is an integer, number of ids reserved at a time for a table
+            if root.xpath('id_block_size') and root.xpath('id_block_size')[0].text.isdigit():
+                self.flags['id_block_size'] = int(root.xpath('id_block_size')[0].text)
+
+            # header_cache_dir is where header ids are kept between loads
+            if root.xpath('header_cache_dir'):
+                self.flags['header_cache_dir'] = root.xpath('header_cache_dir')[0].text
+
+            # manifest_dir is where the files loaded are kept between loads
+            if root.xpath('manifest_dir'):
+                self.flags['manifest_dir'] = root.xpath('manifest_dir')[0].text
+
             # Handle flags with a default of True
             default_true = ["stat_header_db_check", "mode_header_db_check",
                             "mtd_header_db_check", "tcst_header_db_check",
@@ -124,10 +184,20 @@ class XmlLoadFile:
 
             # Handle flags with a default of False
             default_false = ["verbose", "drop_indexes", "apply_indexes",
-                             "load_mpr", "load_orank", "force_dup_file"]
+                             "load_mpr", "load_orank", "force_dup_file",
+                             "fast_tokenizer", "categorical_headers", "concurrent_load",
+                             "stream_infile"]
 
             self.flag_default_false(root, default_false)
 
+            # concurrent loads can not use the largest id in a table, reserve blocks of ids
+            if self.flags['concurrent_load']:
+                if self.flags['id_block_size'] == 0:
+                    self.flags['id_block_size'] = CN.ID_BLOCK_SIZE
+                if self.flags['drop_indexes'] or self.flags['apply_indexes']:
+                    logging.warning("!!! drop_indexes and apply_indexes affect " +
+                                    "all loads running with concurrent_load")
+
             # if requested, get a string of the XML to put in the database
             if self.flags['load_xml']:
                 self.xml_str = etree.tostring(tree).decode().replace('\n', '').replace(' ', '')
@@ -150,6 +220,9 @@ class XmlLoadFile:
         # Remove directory names
         self.load_files = [lf for lf in self.load_files if '.' in lf.split('/')[-1]]
 
+        # Keep only files of the types being loaded, with something in them
+        self.discover_files()
+
         logging.info("Initial number of files: %s", str(len(self.load_files)))
 
         logging.debug("[--- End read_xml ---]")
@@ -200,7 +273,10 @@ class XmlLoadFile:
 
             # Generate all possible path/filenames from folder template
             if folder_template and template_fills:
-                self.load_files = self.filenames_from_template(folder_template, template_fills)
+                self.file_stats = dict(self.filenames_from_template(folder_template,
+                                                                    template_fills,
+                                                                    self.flags['scan_workers']))
+                self.load_files = list(self.file_stats)
 
         except (RuntimeError, TypeError, NameError, KeyError):
             logging.error("*** %s in read_xml read_file_info ***", sys.exc_info()[0])
@@ -307,11 +383,57 @@ class XmlLoadFile:
 
         return all_dates
 
+    def discover_files(self):
+        """! find the type, size and modification time of each file to load, unless found
+            when the directories were listed, with scan_workers files at a time. Drop files
+            that are not a type of MET file, of a type not being loaded, or empty.
+            Returns:
+               N/A
+        """
+        try:
+            new_files = [lf for lf in self.load_files if lf not in self.file_stats]
+            with ThreadPoolExecutor(max_workers=self.flags['scan_workers']) as executor:
+                self.file_stats.update(zip(new_files, executor.map(ReadDataFiles.file_stat,
+                                                                   new_files)))
+
+            skip_types = [CN.NO_KEY]
+            if not self.flags['load_stat']:
+                skip_types += CN.STAT_FILES
+            if not self.flags['load_mode']:
+                skip_types += CN.MODE_FILES
+            if not self.flags['load_mtd']:
+                skip_types += CN.MTD_FILES
+
+            file_stats = {}
+            load_files = []
+            for load_file in self.load_files:
+                file_stat = self.file_stats[load_file]
+                # files that can not be found are left for read_data to report
+                if file_stat is None:
+                    if ReadDataFiles.get_lookup(load_file) not in skip_types:
+                        load_files.append(load_file)
+                elif file_stat[0] in skip_types:
+                    continue
+                elif file_stat[1] == 0:
+                    logging.warning("!!! Empty file %s", load_file)
+                else:
+                    file_stats[load_file] = file_stat
+                    load_files.append(load_file)
+
+            self.load_files = load_files
+            self.file_stats = file_stats
+
+        except (RuntimeError, TypeError, NameError, KeyError):
+            logging.error("*** %s in read_xml discover_files ***", sys.exc_info()[0])
+            sys.exit("*** Error(s) found while finding files to load!")
+
     @staticmethod
-    def filenames_from_template(folder_template, template_fills):
-        """! given a folder template and the values to fill in, generates list of filenames
+    def filenames_from_template(folder_template, template_fills,
+                                scan_workers=CN.SCAN_WORKERS):
+        """! given a folder template and the values to fill in, generates filenames of
+            MET files in the directories, scanning scan_workers directories at a time
             Returns:
-               list of filenames
+               generator of filenames, each with its type, size and modification time
         """
         logging.debug("folder template is: %s", folder_template)
 
@@ -332,20 +454,14 @@ class XmlLoadFile:
                 raise ValueError("not enough template fill values")
 
             # generate a list of directories with all combinations of values filled in
-            load_dirs = [folder_template]
-            for key in template_fills:
-                alist = []
-                for tvalue in load_dirs:
-                    alist = alist + \
-                        [tvalue.replace("{" + key + "}", x) for x in template_fills[key]]
-                load_dirs = alist
-
-            # find all files in directories, append path to them, and put on load_files list
-            file_list = []
-            for file_dir in load_dirs:
-                if os.path.exists(file_dir):
-                    file_list = file_list + [os.path.join(file_dir, x)
-                                             for x in os.listdir(file_dir)]
+            load_dirs = []
+            for fills in product(*template_fills.values()):
+                load_dir = folder_template
+                for key, fill in zip(template_fills, fills):
+                    load_dir = load_dir.replace("{" + key + "}", fill)
+                load_dirs.append(load_dir)
+
+            logging.debug("Number of directories from folder template: %s", str(len(load_dirs)))
 
         except ValueError as value_error:
             logging.error("*** %s in filenames_from_template ***", sys.exc_info()[0])
@@ -355,4 +471,36 @@ class XmlLoadFile:
             logging.error("*** %s in filenames_from_template ***", sys.exc_info()[0])
             sys.exit("*** Error found while expanding XML folder templates!")
 
-        return file_list
+        return XmlLoadFile.scan_dirs(load_dirs, scan_workers)
+
+    @staticmethod
+    def scan_dirs(load_dirs, scan_workers):
+        """! find the MET files in the directories, scanning scan_workers directories at a time
+            Returns:
+               generator of filenames with the path, each with its type, size and
+               modification time, in the order of the directories
+        """
+        with ThreadPoolExecutor(max_workers=max(1, scan_workers)) as executor:
+            for dir_files in executor.map(XmlLoadFile.met_files, load_dirs):
+                yield from dir_files
+
+    @staticmethod
+    def met_files(file_dir):
+        """! list the files in a directory that have the name of a type of MET file,
+            with the size and modification time from the directory entry
+            Returns:
+               list of filenames with the path, each with its data_file_lu_id, size and
+               modification time in ns, empty if the directory does not exist
+        """
+        dir_files = []
+        try:
+            with os.scandir(file_dir) as dir_entries:
+                for dir_entry in dir_entries:
+                    lu_id = ReadDataFiles.get_lookup(dir_entry.name)
+                    if lu_id != CN.NO_KEY and dir_entry.is_file():
+                        stat_info = dir_entry.stat()
+                        dir_files.append((os.path.join(file_dir, dir_entry.name),
+                                          (lu_id, stat_info.st_size, stat_info.st_mtime_ns)))
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        return dir_files
@@ -19,7 +19,12 @@ import sys
 import os
 import logging
 import time
+import threading
+import queue
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
 import pymysql
 
 import constants as CN
@@ -31,6 +36,24 @@ class RunSql:
            N/A
     """
 
+    # With id_block_size set, ids are reserved in blocks from the id_sequence table
+    # the blocks are shared by all writers, as (next id, end of block) by (table, field)
+    # writer threads take ids from them one at a time, holding id_lock
+    id_block_size = 0
+    id_blocks = {}
+    id_lock = threading.Lock()
+
+    # With concurrent_load set, header and file checks are done while holding a named lock
+    concurrent_load = False
+
+    # With stream_infile set, LOAD DATA reads the CSV lines from a named pipe, not a file
+    stream_infile = False
+
+    # Without local_infile, rows are inserted insert_size rows per INSERT statement,
+    # on the connections of insert_pool at the same time when there is one
+    insert_size = 1
+    insert_pool = None
+
     def __init__(self):
         # Default to False since it requires extra permission
         self.local_infile = False
@@ -49,12 +72,7 @@ class RunSql:
                 sys.exit("*** Error when connecting to database")
 
             # Connect to the database using connection info from XML file
-            self.conn = pymysql.connect(host=connection['db_host'],
-                                        port=connection['db_port'],
-                                        user=connection['db_user'],
-                                        passwd=connection['db_password'],
-                                        db=connection['db_database'],
-                                        local_infile=True)
+            self.conn = RunSqlPool.mysql_connect(connection)
 
         except pymysql.OperationalError as pop_err:
             logging.error("*** %s in run_sql ***", str(pop_err))
@@ -87,11 +105,17 @@ class RunSql:
         conn.close()
 
     @staticmethod
-    def get_next_id(table, field, sql_cur):
+    def get_next_id(table, field, sql_cur, id_count=None):
         """ given a field for a table, find the max field value and return it plus one.
+            With id blocks on, id_count ids starting at the returned id are reserved instead.
+            Other loads may already have used larger ids, so callers must not treat rows with
+            ids of at least the returned id as new.
             Returns:
                next valid id to use in an id field in a table
         """
+        if RunSql.id_block_size > 0 and id_count is not None:
+            return RunSql.reserve_ids(table, field, id_count, sql_cur)
+
         # get the next valid id. Set it to zero (first valid id) if no records yet
         try:
             next_id = 0
@@ -106,6 +130,80 @@ class RunSql:
             logging.error("*** %s in write_sql_data get_next_id ***", sys.exc_info()[0])
 
 
+    @staticmethod
+    def id_sequence_on(id_block_size, sql_cur):
+        """ reserve ids in blocks of id_block_size from the id_sequence table, created if needed
+            Returns:
+               N/A
+        """
+        sql_cur.execute(CN.CREATE_ID_SEQUENCE)
+        RunSql.id_block_size = id_block_size
+        RunSql.id_blocks = {}
+
+    @staticmethod
+    def reserve_ids(table, field, id_count, sql_cur):
+        """ take id_count ids for a field of a table from the block reserved by this load,
+            reserving a new block from the id_sequence table when needed.
+            Returns:
+               first of id_count ids in a row that no other load will use
+        """
+        try:
+            # other writer threads must not take ids from the same block at the same time
+            with RunSql.id_lock:
+                next_id, end_id = RunSql.id_blocks.get((table, field), (0, 0))
+
+                if next_id + id_count > end_id:
+                    # start the sequence after the largest id already in the table
+                    sql_cur.execute(CN.Q_ID_SEQUENCE, [table, field])
+                    if sql_cur.fetchone() is None:
+                        sql_cur.execute(CN.INS_ID_SEQUENCE.format(field, table), [table, field])
+
+                    # move the sequence past the block and get the end of the block, in one step,
+                    # skipping any ids written since by a load without id blocks
+                    block_size = int(max(RunSql.id_block_size, id_count))
+                    sql_cur.execute(CN.UPD_ID_SEQUENCE.format(field, table),
+                                    [block_size, table, field])
+                    sql_cur.execute(CN.Q_LAST_INSERT_ID)
+                    end_id = sql_cur.fetchone()[0]
+                    next_id = end_id - block_size
+                    # with the block taken, let other loads reserve the next one
+                    sql_cur.connection.commit()
+                    logging.debug("Reserved %s ids from %s for %s %s",
+                                  block_size, next_id, table, field)
+
+                RunSql.id_blocks[(table, field)] = (next_id + id_count, end_id)
+                return next_id
+
+        except (RuntimeError, TypeError, NameError, KeyError, AttributeError):
+            logging.error("*** %s in run_sql reserve_ids ***", sys.exc_info()[0])
+
+    @staticmethod
+    def get_lock(lock_name, sql_cur):
+        """ with concurrent loads on, wait until no other load holds the lock, then take it.
+            Returns:
+               N/A
+        """
+        if not RunSql.concurrent_load:
+            return
+
+        sql_cur.execute(CN.Q_GET_LOCK, [lock_name, CN.LOCK_TIMEOUT])
+        if sql_cur.fetchone()[0] != 1:
+            logging.error("*** Timed out waiting for lock %s in run_sql get_lock ***", lock_name)
+            sys.exit("*** Error when waiting for another load")
+
+    @staticmethod
+    def release_lock(lock_name, sql_cur):
+        """ with concurrent loads on, commit what was written under the lock and release it.
+            Returns:
+               N/A
+        """
+        if not RunSql.concurrent_load:
+            return
+
+        sql_cur.connection.commit()
+        sql_cur.execute(CN.Q_RELEASE_LOCK, [lock_name])
+        sql_cur.fetchone()
+
     @staticmethod
     def get_file_name(data_file_id, sql_cur):
         """ given a data_file_id, return the matching filename.
@@ -135,20 +233,27 @@ class RunSql:
         try:
             if local_infile == 'ON':
                 # later in development, may wish to delete these files to clean up when done
-                tmpfile = tmp_dir + '/METdbLoad_' + sql_table + '.csv'
-                # write the data out to a csv file, use local data infile to load to database
-                raw_data[col_list].to_csv(tmpfile, na_rep=CN.MV_NOTAV,
-                                          index=False, header=False, sep=CN.SEP)
-                sql_cur.execute(CN.LD_TABLE.format(tmpfile, sql_table, CN.SEP))
-                # delete the temporary CSV file
-                os.remove(tmpfile)
+                # the process and thread ids keep loads that share a tmp dir, and threads
+                # writing to the same table, from using the same file
+                tmpfile = tmp_dir + '/METdbLoad_' + str(os.getpid()) + '_' + \
+                    str(threading.get_native_id()) + '_' + sql_table + '.csv'
+                if RunSql.stream_infile and RunSql.make_pipe(tmpfile):
+                    # stream the data through a pipe, so it is never written to disk
+                    RunSql.stream_to_sql(raw_data, col_list, sql_table, tmpfile, sql_cur)
+                else:
+                    # write the data out to a csv file, use local data infile to load to database
+                    with open(tmpfile, 'w', encoding='utf-8', newline='') as csv_file:
+                        RunSql.write_csv(raw_data, col_list, csv_file)
+                    sql_cur.execute(CN.LD_TABLE.format(tmpfile, sql_table, CN.SEP))
+                    # delete the temporary CSV file
+                    os.remove(tmpfile)
             else:
                 # fewer permissions required, but slower
                 # Make sure there are no NaN values
                 raw_data = raw_data.fillna(CN.MV_NOTAV)
 
                 # only line_data has timestamps in dataframe - change to strings
-                if 'line_data' in sql_table:
+                if 'line_data' in sql_table and 'fcst_valid_beg' in raw_data:
                     raw_data['fcst_valid_beg'] = raw_data['fcst_valid_beg'].astype(str)
                     raw_data['fcst_valid_end'] = raw_data['fcst_valid_end'].astype(str)
                     raw_data['fcst_init_beg'] = raw_data['fcst_init_beg'].astype(str)
@@ -158,13 +263,231 @@ class RunSql:
                     raw_data['fcst_valid'] = raw_data['fcst_valid_beg'].astype(str)
                     raw_data['fcst_init'] = raw_data['fcst_valid_end'].astype(str)
                     raw_data['obs_valid'] = raw_data['fcst_init_beg'].astype(str)
-                # make a copy of the dataframe that is a list of lists and write to database
-                dfile = raw_data[col_list].values.tolist()
-                sql_cur.executemany(sql_query, dfile)
+                # write to database a batch of rows at a time
+                RunSql.insert_rows(raw_data[col_list], sql_table, sql_query, sql_cur)
 
         except (RuntimeError, TypeError, NameError, KeyError, AttributeError):
             logging.error("*** %s in run_sql write_to_sql ***", sys.exc_info()[0])
 
+    @staticmethod
+    def write_csv(raw_data, col_list, csv_file, stop_writing=None):
+        """ write the columns of a dataframe to an open CSV file or pipe, formatted the same
+            as to_csv with na_rep=MV_NOTAV and sep=SEP, a chunk of rows at a time
+            Returns:
+               N/A
+        """
+        chunk_rows = max(CN.CSV_CHUNK_CELLS // len(col_list), 1)
+        col_values = RunSql.csv_values(raw_data, col_list)
+
+        for first_row in range(0, len(raw_data.index), chunk_rows):
+            if stop_writing is not None and stop_writing.is_set():
+                break
+
+            csv_text = None
+            if col_values is not None:
+                chunk_values = [values[first_row:first_row + chunk_rows] for values in col_values]
+                csv_text = RunSql.format_csv(chunk_values)
+            if csv_text is None:
+                if col_values is None:
+                    chunk_data = raw_data.iloc[first_row:first_row + chunk_rows][col_list]
+                else:
+                    # times are already text, formatted for the whole column
+                    chunk_data = pd.DataFrame(dict(enumerate(chunk_values)))
+                chunk_data.to_csv(csv_file, na_rep=CN.MV_NOTAV, index=False, header=False,
+                                  sep=CN.SEP)
+            else:
+                csv_file.write(csv_text)
+
+    @staticmethod
+    def csv_values(raw_data, col_list):
+        """ get the values of the columns to format as CSV, leaving the column types that
+            format_csv does not handle (time zones, nullable ints) to to_csv.
+            Categoricals of strings are turned back into strings here, when written.
+            Times are formatted here, as to_csv leaves off the time for a whole column
+            at midnight, not for each chunk.
+            Returns:
+               list of numpy arrays, one for each column, or None to use to_csv
+        """
+        if len(col_list) < 2:
+            return None
+
+        col_values = []
+        for col_name in col_list:
+            column = raw_data[col_name]
+            if not isinstance(column, pd.Series):
+                return None
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                if column.cat.categories.dtype != object:
+                    return None
+            elif not isinstance(column.dtype, np.dtype) or column.dtype.kind not in 'iubfOM':
+                return None
+            elif column.dtype.kind == 'M':
+                time_values = RunSql.format_times(column.to_numpy())
+                if time_values is None:
+                    return None
+                col_values.append(time_values)
+                continue
+            col_values.append(column.to_numpy())
+
+        return col_values
+
+    @staticmethod
+    def format_times(values):
+        """ format a column of times as to_csv does, formatting each different time once
+            Returns:
+               numpy array of text, or None if to_csv is needed, e.g. for fractions of seconds
+        """
+        codes, times = pd.factorize(values)
+        ticks = times.astype('datetime64[ns]').view('int64')
+        if (ticks % 10 ** 9).any():
+            return None
+        # like to_csv, leave off the time when every value is at midnight
+        if (ticks % (86400 * 10 ** 9)).any():
+            time_text = np.char.replace(np.datetime_as_string(times, unit='s'), 'T', ' ')
+        else:
+            time_text = np.datetime_as_string(times, unit='D')
+        # missing times have a code of -1, the last value
+        return np.append(time_text, CN.MV_NOTAV)[codes]
+
+    @staticmethod
+    def format_csv(col_values):
+        """ format columns of values as CSV lines, converting a column to strings at once
+            instead of formatting each value as to_csv does
+            Returns:
+               CSV text, or None if to_csv is needed, e.g. for a value that must be quoted
+        """
+        col_text = []
+        for values in col_values:
+            if values.dtype.kind in 'iub':
+                text = values.astype(str)
+            elif values.dtype.kind == 'f':
+                text = np.where(np.isnan(values), CN.MV_NOTAV, values.astype(str))
+            elif values.dtype.kind == 'U':
+                # times formatted by format_times
+                text = values
+            else:
+                missing = pd.isna(values)
+                if pd.api.types.infer_dtype(values, skipna=True) == 'string':
+                    # only the missing values need to change
+                    text = values.copy()
+                    text[missing] = CN.MV_NOTAV
+                else:
+                    text = np.where(missing, CN.MV_NOTAV, values.astype(str))
+
+            col_text.append(text.tolist())
+
+        num_rows = len(col_values[0])
+        if num_rows == 0:
+            return ''
+        csv_text = os.linesep.join(map(CN.SEP.join, zip(*col_text))) + os.linesep
+
+        # to_csv quotes a value with a separator, quote or line break in it
+        if csv_text.count(CN.SEP) != num_rows * (len(col_values) - 1) or '"' in csv_text or \
+                csv_text.count('\n') != num_rows or \
+                csv_text.count('\r') != num_rows * os.linesep.count('\r'):
+            return None
+
+        return csv_text
+
+    @staticmethod
+    def make_pipe(pipe_name):
+        """ make a named pipe for streaming data to LOAD DATA, if the system allows it
+            Returns:
+               True if the pipe was made
+        """
+        try:
+            os.mkfifo(pipe_name)
+            return True
+
+        except (OSError, AttributeError):
+            logging.warning("!!! %s making pipe %s, writing a CSV file instead",
+                            sys.exc_info()[0], pipe_name)
+            return False
+
+    @staticmethod
+    def stream_to_sql(raw_data, col_list, sql_table, pipe_name, sql_cur):
+        """ load the data into a table with LOAD DATA reading from a named pipe, while a
+            thread writes the CSV lines into the pipe a chunk of rows at a time.
+            Returns:
+               N/A
+        """
+        stop_writing = threading.Event()
+        write_errors = []
+
+        def write_pipe():
+            try:
+                with open(pipe_name, 'w', encoding='utf-8', newline='') as pipe:
+                    RunSql.write_csv(raw_data, col_list, pipe, stop_writing)
+            except OSError:
+                logging.debug("%s writing pipe %s", sys.exc_info()[0], pipe_name)
+            except (RuntimeError, TypeError, NameError, KeyError, ValueError):
+                write_errors.append(sys.exc_info()[1])
+
+        # missing columns are found before anything is loaded, as when writing a file
+        try:
+            raw_data.iloc[0:0][col_list]
+        except KeyError:
+            os.remove(pipe_name)
+            raise
+
+        writer = threading.Thread(target=write_pipe, daemon=True)
+        writer.start()
+
+        try:
+            sql_cur.execute(CN.LD_TABLE.format(pipe_name, sql_table, CN.SEP))
+
+        finally:
+            # if LOAD DATA stopped before reading all of the pipe, empty it so the writer ends
+            if writer.is_alive():
+                stop_writing.set()
+                pipe_fd = os.open(pipe_name, os.O_RDONLY | os.O_NONBLOCK)
+                while writer.is_alive():
+                    try:
+                        if not os.read(pipe_fd, CN.PIPE_READ_SIZE):
+                            writer.join(0.01)
+                    except BlockingIOError:
+                        writer.join(0.01)
+                os.close(pipe_fd)
+            writer.join()
+            os.remove(pipe_name)
+
+        if write_errors:
+            raise write_errors[0]
+
+    @staticmethod
+    def insert_rows(raw_data, sql_table, sql_query, sql_cur):
+        """ insert the rows of a dataframe in batches of insert_size rows, each batch a
+            multi-row INSERT statement, using the connections of insert_pool if there is one
+            Returns:
+               N/A
+        """
+        # with an insert_size of 1, executemany makes statements as long as it allows
+        batch_rows = RunSql.insert_size if RunSql.insert_size > 1 else CN.INSERT_BATCH_ROWS
+        first_rows = range(0, len(raw_data.index), batch_rows)
+
+        def insert_batch(first_row, batch_cur):
+            batch_start = time.perf_counter()
+            batch_data = raw_data.iloc[first_row:first_row + batch_rows].values.tolist()
+            batch_cur.executemany(sql_query, batch_data)
+            logging.debug("Inserted %s rows into %s in %s", len(batch_data), sql_table,
+                          timedelta(seconds=time.perf_counter() - batch_start))
+
+        if RunSql.insert_pool is None or len(first_rows) < 2:
+            for first_row in first_rows:
+                insert_batch(first_row, sql_cur)
+            return
+
+        def insert_pool_batch(first_row):
+            try:
+                insert_batch(first_row, RunSql.insert_pool.cursor())
+            finally:
+                RunSql.insert_pool.release()
+
+        with ThreadPoolExecutor(max_workers=RunSql.insert_pool.pool_size) as executor:
+            for future in [executor.submit(insert_pool_batch, first_row)
+                           for first_row in first_rows]:
+                future.result()
+
     @staticmethod
     def apply_indexes(drop, sql_cur):
         """
@@ -198,3 +521,117 @@ class RunSql:
         logging.info("    >>> Apply time: %s", str(apply_time))
 
         logging.debug("[--- End apply_indexes ---]")
+
+
+class RunSqlPool:
+    """ Pool of connections to a SQL database, shared by threads. Each thread takes a
+        connection with its own cursor, and gives it back for the next thread to use.
+        Returns:
+           N/A
+    """
+
+    def __init__(self, connection, pool_size, connect=None, db_error=pymysql.Error):
+        self.connection = connection
+        self.pool_size = max(1, pool_size)
+        # opens one connection - pymysql, unless another DB-API module is given, e.g. sqlite3
+        self.connect = connect if connect is not None else RunSqlPool.mysql_connect
+        self.db_error = db_error
+        # most recently used connections are reused first
+        self.idle_conns = queue.LifoQueue()
+        self.open_count = 0
+        self.open_lock = threading.Lock()
+        self.thread_data = threading.local()
+
+    @staticmethod
+    def mysql_connect(connection):
+        """ open one connection to a MySQL database, using connection info from XML file
+            Returns:
+               pymysql connection
+        """
+        return pymysql.connect(host=connection['db_host'],
+                               port=connection['db_port'],
+                               user=connection['db_user'],
+                               passwd=connection['db_password'],
+                               db=connection['db_database'],
+                               local_infile=True)
+
+    def cursor(self):
+        """ get the cursor of the current thread, taking a connection from the pool if needed
+            Returns:
+               cursor used only by the current thread
+        """
+        if getattr(self.thread_data, 'cur', None) is None:
+            self.thread_data.conn = self.take_conn()
+            self.thread_data.cur = self.thread_data.conn.cursor()
+        return self.thread_data.cur
+
+    def release(self):
+        """ commit what the current thread wrote and give its connection back to the pool
+            Returns:
+               N/A
+        """
+        conn = getattr(self.thread_data, 'conn', None)
+        if conn is None:
+            return
+
+        self.thread_data.cur.close()
+        self.thread_data.conn = None
+        self.thread_data.cur = None
+        conn.commit()
+        self.idle_conns.put(conn)
+
+    def take_conn(self):
+        """ take an idle connection that still works, open a new one if fewer than
+            pool_size are open, or else wait for another thread to release one
+            Returns:
+               connection to the database
+        """
+        with self.open_lock:
+            open_new = self.idle_conns.empty() and self.open_count < self.pool_size
+            if open_new:
+                self.open_count += 1
+
+        if open_new:
+            try:
+                return self.connect(self.connection)
+            except self.db_error:
+                with self.open_lock:
+                    self.open_count -= 1
+                raise
+
+        conn = self.idle_conns.get()
+        if not self.check_conn(conn):
+            logging.warning("!!! Database connection in pool lost, reconnecting")
+            conn = self.connect(self.connection)
+        return conn
+
+    def check_conn(self, conn):
+        """ health check of an idle connection, e.g. after a server timeout
+            Returns:
+               True if a query works on the connection
+        """
+        try:
+            check_cur = conn.cursor()
+            check_cur.execute("SELECT 1")
+            check_cur.fetchall()
+            check_cur.close()
+            return True
+        except self.db_error:
+            return False
+
+    def close_all(self):
+        """ commit and close all of the connections, after the threads are done with them
+            Returns:
+               N/A
+        """
+        self.release()
+
+        while not self.idle_conns.empty():
+            conn = self.idle_conns.get()
+            try:
+                conn.commit()
+                conn.close()
+            except self.db_error:
+                logging.warning("!!! %s closing database connection in pool", sys.exc_info()[0])
+
+        self.open_count = 0
@@ -35,6 +35,8 @@ class WriteFileSql:
 
     def __init__(self):
         self.sql_met = RunSql()
+        # data_file_id of each file written, or already in the database, by full file name
+        self.file_ids = {}
 
     def write_file_sql(self, load_flags, data_files, stat_data, mode_cts_data,
                        mode_obj_data, tcst_data, mtd_2d_data, mtd_3d_single_data,
@@ -54,36 +56,45 @@ class WriteFileSql:
             # Write Data Files
             # --------------------
 
+            # another load may be writing the same files, wait until it is done
+            self.sql_met.get_lock(CN.DATA_FILE, sql_cur)
+
             # get next valid data file id. data files start counting from 1
-            next_file_id = self.sql_met.get_next_id(CN.DATA_FILE, CN.DATA_FILE_ID, sql_cur)
+            next_file_id = self.sql_met.get_next_id(CN.DATA_FILE, CN.DATA_FILE_ID, sql_cur,
+                                                    len(data_files.index))
             if next_file_id == 0:
                 next_file_id = 1
 
             id_ctr = 0
             list_dupes = []
+            new_file_ids = []
+
+            # look for existing data file records for all of the files in one query
+            existing_files = self.get_existing_files(data_files, sql_cur)
 
             # write out records for data files, but first:
             # check for duplicates if flag on - delete if found
             for row_num, file_line in data_files.iterrows():
-                # look for existing data file record
-                sql_cur.execute(CN.Q_FILE, [file_line[CN.FILEPATH], file_line[CN.FILENAME]])
-                result = sql_cur.fetchone()
+                existing_id = existing_files.get((file_line[CN.FILENAME],
+                                                  file_line[CN.FILEPATH]))
 
                 # If you find a match, check the force_dup_file tag/flag
-                if sql_cur.rowcount > 0:
+                if existing_id is not None:
                     list_dupes = list_dupes + [file_line[CN.FILE_ROW]]
+                    self.file_ids[file_line[CN.FULL_FILE]] = existing_id
                     if not load_flags['force_dup_file']:
                         logging.warning("!!! Duplicate file %s without FORCE_DUP_FILE tag",
                                         file_line[CN.FULL_FILE])
                     else:
                         # With duplicate files allowed, save the existing id for the file
-                        data_files.loc[data_files.index[row_num], CN.DATA_FILE_ID] = result[0]
+                        data_files.loc[data_files.index[row_num], CN.DATA_FILE_ID] = existing_id
                         logging.warning("Duplicate file %s already in data_file",
                                         file_line[CN.FULL_FILE])
                 # Not a duplicate - give it a new id
                 else:
                     data_files.loc[data_files.index[row_num], CN.DATA_FILE_ID] = \
                         id_ctr + next_file_id
+                    new_file_ids.append(id_ctr + next_file_id)
                     id_ctr = id_ctr + 1
 
             # end for row_num, file_line
@@ -140,39 +151,26 @@ class WriteFileSql:
                 tcst_data.reset_index(drop=True, inplace=True)
 
                 # Replace the temporary id value with the actual index in the line data
-                for row_num, row in data_files.iterrows():
-                    if not stat_data.empty:
-                        stat_data.loc[stat_data[CN.FILE_ROW] == row[CN.FILE_ROW],
-                                      CN.DATA_FILE_ID] = row[CN.DATA_FILE_ID]
-                    if not mode_cts_data.empty:
-                        mode_cts_data.loc[mode_cts_data[CN.FILE_ROW] == row[CN.FILE_ROW],
-                                          CN.DATA_FILE_ID] = row[CN.DATA_FILE_ID]
-                    if not mode_obj_data.empty:
-                        mode_obj_data.loc[mode_obj_data[CN.FILE_ROW] == row[CN.FILE_ROW],
-                                          CN.DATA_FILE_ID] = row[CN.DATA_FILE_ID]
-                    if not tcst_data.empty:
-                        tcst_data.loc[tcst_data[CN.FILE_ROW] == row[CN.FILE_ROW],
-                                      CN.DATA_FILE_ID] = row[CN.DATA_FILE_ID]
-                    if not mtd_2d_data.empty:
-                        mtd_2d_data.loc[mtd_2d_data[CN.FILE_ROW] == row[CN.FILE_ROW],
-                                        CN.DATA_FILE_ID] = row[CN.DATA_FILE_ID]
-                    if not mtd_3d_single_data.empty:
-                        mtd_3d_single_data.loc[mtd_3d_single_data[CN.FILE_ROW] == row[CN.FILE_ROW],
-                                               CN.DATA_FILE_ID] = row[CN.DATA_FILE_ID]
-                    if not mtd_3d_pair_data.empty:
-                        mtd_3d_pair_data.loc[mtd_3d_pair_data[CN.FILE_ROW] == row[CN.FILE_ROW],
-                                             CN.DATA_FILE_ID] = row[CN.DATA_FILE_ID]
-
-                # get just the new data files
-                new_files = data_files[data_files[CN.DATA_FILE_ID] >= next_file_id]
+                self.set_data_file_ids(data_files, [stat_data, mode_cts_data, mode_obj_data,
+                                                    tcst_data, mtd_2d_data, mtd_3d_single_data,
+                                                    mtd_3d_pair_data])
+
+                # get just the new data files, by the ids given to them above. Ids from a block
+                # are not the largest in the table, so a larger id may be an existing file
+                new_files = data_files[data_files[CN.DATA_FILE_ID].isin(new_file_ids)]
 
                 # write the new data files out to the sql database
                 if not new_files.empty:
                     self.sql_met.write_to_sql(new_files, CN.DATA_FILE_FIELDS, CN.DATA_FILE,
                                               CN.INS_DATA_FILES, tmp_dir, sql_cur, local_infile)
 
+                self.file_ids.update(zip(data_files[CN.FULL_FILE], data_files[CN.DATA_FILE_ID]))
+
+            self.sql_met.release_lock(CN.DATA_FILE, sql_cur)
+
         except (RuntimeError, TypeError, NameError, KeyError):
             logging.error("*** %s in write_file_sql ***", sys.exc_info()[0])
+            self.sql_met.release_lock(CN.DATA_FILE, sql_cur)
 
         write_time_end = time.perf_counter()
         write_time = timedelta(seconds=write_time_end - write_time_start)
@@ -184,6 +182,40 @@ class WriteFileSql:
         return data_files, stat_data, mode_cts_data, mode_obj_data, tcst_data, \
             mtd_2d_data, mtd_3d_single_data, mtd_3d_pair_data
 
+    @staticmethod
+    def set_data_file_ids(data_files, line_frames):
+        """ put the data_file_id of each file into the line data from that file, using
+            one lookup of file_row per dataframe instead of a scan per file.
+            Returns:
+               N/A
+        """
+        file_ids = data_files.set_index(CN.FILE_ROW)[CN.DATA_FILE_ID]
+
+        for line_frame in line_frames:
+            if not line_frame.empty:
+                line_frame[CN.DATA_FILE_ID] = line_frame[CN.FILE_ROW].map(file_ids)
+
+    @staticmethod
+    def get_existing_files(data_files, sql_cur):
+        """ find which data files already have a data_file record, with one query
+            Returns:
+               dictionary of data_file_id by (filename, path)
+        """
+        existing_files = {}
+
+        if data_files.empty:
+            return existing_files
+
+        file_keys = data_files[[CN.FILENAME, CN.FILEPATH]].values.tolist()
+        sql_cur.execute(CN.Q_FILES.format(",".join(["(%s,%s)"] * len(file_keys))),
+                        [key for file_key in file_keys for key in file_key])
+
+        # keep the first id if a file has more than one record
+        for data_file_id, filename, path in sql_cur.fetchall():
+            existing_files.setdefault((filename, path), data_file_id)
+
+        return existing_files
+
     def write_metadata_sql(self, load_flags, data_files, group, description,
                            load_note, xml_str, tmp_dir, sql_cur, local_infile):
         """ write metadata and instance info records to a SQL database.
@@ -203,6 +235,8 @@ class WriteFileSql:
 
             # insert or update the group and description fields in the metadata table
             if group != CN.DEFAULT_DATABASE_GROUP:
+                # another load may be writing the metadata, wait until it is done
+                self.sql_met.get_lock('metadata', sql_cur)
                 sql_cur.execute(CN.Q_METADATA)
                 result = sql_cur.fetchone()
 
@@ -221,6 +255,7 @@ class WriteFileSql:
                                                 columns=['category', 'description'])
                     self.sql_met.write_to_sql(new_metadata, ['category', 'description'], 'metadata',
                                               CN.INS_METADATA, tmp_dir, sql_cur, local_infile)
+                self.sql_met.release_lock('metadata', sql_cur)
 
             # --------------------
             # Write Instance Info
@@ -229,12 +264,13 @@ class WriteFileSql:
             if load_flags['load_xml'] and not data_files.empty:
                 update_date = data_files[CN.LOAD_DATE].iloc[0]
                 next_instance_id = self.sql_met.get_next_id(CN.INSTANCE_INFO, CN.INSTANCE_INFO_ID,
-                                                            sql_cur)
+                                                            sql_cur, 1)
                 sql_cur.execute(CN.INS_INSTANCE, [next_instance_id, getpass.getuser(), update_date,
                                                   load_note, xml_str])
 
         except (RuntimeError, TypeError, NameError, KeyError):
             logging.error("*** %s in write_metadata_sql ***", sys.exc_info()[0])
+            self.sql_met.release_lock('metadata', sql_cur)
 
         write_time_end = time.perf_counter()
         write_time = timedelta(seconds=write_time_end - write_time_start)
@@ -32,8 +32,10 @@ class WriteModeSql:
            N/A
     """
     @staticmethod
-    def write_mode_data(load_flags, cts_data, obj_data, tmp_dir, sql_cur, local_infile):
+    def write_mode_data(load_flags, cts_data, obj_data, tmp_dir, sql_cur, local_infile,
+                        header_cache=None):
         """ write mode files (cts and object) to a SQL database.
+            header_cache keeps the ids of headers found or written by earlier sets.
             Returns:
                N/A
         """
@@ -67,14 +69,28 @@ class WriteModeSql:
             # At first, we do not know if the headers already exist, so we have no keys
             mode_headers[CN.MODE_HEADER_ID] = CN.NO_KEY
 
+            # another load may be writing the same headers, wait until it is done
+            sql_met.get_lock(CN.MODE_HEADER, sql_cur)
+
             # get the next valid mode header id. Set it to zero (first valid id) if no records yet
-            next_header_id = sql_met.get_next_id(CN.MODE_HEADER, CN.MODE_HEADER_ID, sql_cur)
+            next_header_id = sql_met.get_next_id(CN.MODE_HEADER, CN.MODE_HEADER_ID, sql_cur,
+                                                 len(mode_headers.index))
 
             # if the flag is set to check for duplicate headers, get ids from existing headers
             if load_flags["mode_header_db_check"]:
 
+                cached_headers = {}
+                if header_cache is not None:
+                    cached_headers = header_cache.get_ids(CN.MODE_HEADER, mode_headers,
+                                                          CN.MODE_HEADER_KEYS)
+
                 # For each header, query with unique fields to try to find a match in the database
                 for row_num, data_line in mode_headers.iterrows():
+                    # headers found or written by earlier sets do not need a query
+                    if row_num in cached_headers:
+                        mode_headers.loc[mode_headers.index[row_num], CN.MODE_HEADER_ID] = \
+                            cached_headers[row_num]
+                        continue
                     data_line[CN.FCST_VALID] = \
                         data_line[CN.FCST_VALID].strftime("%Y-%m-%d %H:%M:%S")
                     data_line[CN.FCST_INIT] = data_line[CN.FCST_INIT].strftime("%Y-%m-%d %H:%M:%S")
@@ -91,17 +107,14 @@ class WriteModeSql:
                     # If you find a match, put the key into the mode_headers dataframe
                     if sql_cur.rowcount > 0:
                         mode_headers.loc[mode_headers.index[row_num], CN.MODE_HEADER_ID] = result[0]
-                    # otherwise create the next id and put it in
-                    else:
-                        mode_headers.loc[mode_headers.index[row_num], CN.MODE_HEADER_ID] = \
-                            row_num + next_header_id
-            else:
-                # When all new headers, add the next id to the row number/index to make a new key
-                mode_headers.loc[mode_headers.mode_header_id == CN.NO_KEY, CN.MODE_HEADER_ID] = \
-                    mode_headers.index + next_header_id
+
+            # Headers without a match are new, add the next id to the row number to make a key
+            new_rows = mode_headers[CN.MODE_HEADER_ID] == CN.NO_KEY
+            mode_headers.loc[new_rows, CN.MODE_HEADER_ID] = \
+                mode_headers.index[new_rows] + next_header_id
 
             # get just the new headers with their keys
-            new_headers = mode_headers[mode_headers[CN.MODE_HEADER_ID] > (next_header_id - 1)]
+            new_headers = mode_headers[new_rows]
             logging.info("New mode headers: %s rows", str(len(new_headers.index)))
 
             # Write any new headers out to the sql database
@@ -110,6 +123,13 @@ class WriteModeSql:
                                      CN.INS_MHEADER, tmp_dir, sql_cur, local_infile)
                 new_headers = new_headers.iloc[0:0]
 
+            sql_met.release_lock(CN.MODE_HEADER, sql_cur)
+
+            # keep the ids for the next set of files
+            if header_cache is not None and load_flags["mode_header_db_check"]:
+                header_cache.add_ids(CN.MODE_HEADER, mode_headers, CN.MODE_HEADER_KEYS,
+                                     CN.MODE_HEADER_ID)
+
             # --------------------
             # Write Line Data
             # --------------------
@@ -147,7 +167,8 @@ class WriteModeSql:
                 obj_data.reset_index(drop=True, inplace=True)
 
                 # get next valid mode object id. Set it to zero (first valid id) if no records yet
-                next_line_id = sql_met.get_next_id(CN.MODE_SINGLE_T, CN.MODE_OBJ_ID, sql_cur)
+                next_line_id = sql_met.get_next_id(CN.MODE_SINGLE_T, CN.MODE_OBJ_ID, sql_cur,
+                                                   len(obj_data.index))
 
                 # create the mode_obj_ids using the dataframe index and next valid id
                 obj_data[CN.MODE_OBJ_ID] = obj_data.index + next_line_id
@@ -233,6 +254,7 @@ class WriteModeSql:
 
         except (RuntimeError, TypeError, NameError, KeyError):
             logging.error("*** %s in write_mode_sql ***", sys.exc_info()[0])
+            RunSql.release_lock(CN.MODE_HEADER, sql_cur)
 
         write_time_end = time.perf_counter()
         write_time = timedelta(seconds=write_time_end - write_time_start)
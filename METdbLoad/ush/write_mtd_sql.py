@@ -33,8 +33,9 @@ class WriteMtdSql:
     """
     @staticmethod
     def write_mtd_data(load_flags, m_2d_data, m_3d_single_data, m_3d_pair_data,
-                       tmp_dir, sql_cur, local_infile):
+                       tmp_dir, sql_cur, local_infile, header_cache=None):
         """ write mtd files to a SQL database.
+            header_cache keeps the ids of headers found or written by earlier sets.
             Returns:
                N/A
         """
@@ -77,14 +78,28 @@ class WriteMtdSql:
             # At first, we do not know if the headers already exist, so we have no keys
             mtd_headers[CN.MTD_HEADER_ID] = CN.NO_KEY
 
+            # another load may be writing the same headers, wait until it is done
+            sql_met.get_lock(CN.MTD_HEADER, sql_cur)
+
             # get the next valid MTD header id. Set it to zero (first valid id) if no records yet
-            next_header_id = sql_met.get_next_id(CN.MTD_HEADER, CN.MTD_HEADER_ID, sql_cur)
+            next_header_id = sql_met.get_next_id(CN.MTD_HEADER, CN.MTD_HEADER_ID, sql_cur,
+                                                 len(mtd_headers.index))
 
             # if the flag is set to check for duplicate headers, get ids from existing headers
             if load_flags["mtd_header_db_check"]:
 
+                cached_headers = {}
+                if header_cache is not None:
+                    cached_headers = header_cache.get_ids(CN.MTD_HEADER, mtd_headers,
+                                                          CN.MTD_HEADER_KEYS)
+
                 # For each header, query with unique fields to try to find a match in the database
                 for row_num, data_line in mtd_headers.iterrows():
+                    # headers found or written by earlier sets do not need a query
+                    if row_num in cached_headers:
+                        mtd_headers.loc[mtd_headers.index[row_num], CN.MTD_HEADER_ID] = \
+                            cached_headers[row_num]
+                        continue
                     data_line[CN.FCST_VALID] = \
                         data_line[CN.FCST_VALID].strftime("%Y-%m-%d %H:%M:%S")
                     data_line[CN.FCST_INIT] = data_line[CN.FCST_INIT].strftime("%Y-%m-%d %H:%M:%S")
@@ -110,17 +125,14 @@ class WriteMtdSql:
                     # If you find a match, put the key into the mtd_headers dataframe
                     if sql_cur.rowcount > 0:
                         mtd_headers.loc[mtd_headers.index[row_num], CN.MTD_HEADER_ID] = result[0]
-                    # otherwise create the next id and put it in
-                    else:
-                        mtd_headers.loc[mtd_headers.index[row_num], CN.MTD_HEADER_ID] = \
-                            row_num + next_header_id
-            else:
-                # When all new headers, add the next id to the row number/index to make a new key
-                mtd_headers.loc[mtd_headers.mtd_header_id == CN.NO_KEY, CN.MTD_HEADER_ID] = \
-                    mtd_headers.index + next_header_id
+
+            # Headers without a match are new, add the next id to the row number to make a key
+            new_rows = mtd_headers[CN.MTD_HEADER_ID] == CN.NO_KEY
+            mtd_headers.loc[new_rows, CN.MTD_HEADER_ID] = \
+                mtd_headers.index[new_rows] + next_header_id
 
             # get just the new headers with their keys
-            new_headers = mtd_headers[mtd_headers[CN.MTD_HEADER_ID] > (next_header_id - 1)]
+            new_headers = mtd_headers[new_rows]
             new_headers.obs_valid = pd.to_datetime(new_headers.obs_valid, errors='coerce')
             logging.info("New MTD headers: %s rows", str(len(new_headers.index)))
 
@@ -129,7 +141,10 @@ class WriteMtdSql:
                 # If there are any 2D revision files
                 if new_headers[CN.REVISION_ID].ne(CN.MV_NULL).any():
                     # numbered revision ids must have max revision id added to be unique
-                    next_rev_id = sql_met.get_next_id(CN.MTD_HEADER, CN.REVISION_ID, sql_cur)
+                    next_rev_id = sql_met.get_next_id(CN.MTD_HEADER, CN.REVISION_ID, sql_cur,
+                                                      new_headers.loc[new_headers.revision_id !=
+                                                                      CN.MV_NULL,
+                                                                      CN.REVISION_ID].max() + 1)
                     new_headers.loc[new_headers.revision_id != CN.MV_NULL, CN.REVISION_ID] = \
                         new_headers.loc[new_headers.revision_id != CN.MV_NULL, CN.REVISION_ID] + \
                         next_rev_id
@@ -138,10 +153,18 @@ class WriteMtdSql:
                                      CN.INS_MTDHEADER, tmp_dir, sql_cur, local_infile)
                 new_headers = new_headers.iloc[0:0]
 
+            sql_met.release_lock(CN.MTD_HEADER, sql_cur)
+
+            # keep the ids for the next set of files
+            if header_cache is not None and load_flags["mtd_header_db_check"]:
+                header_cache.add_ids(CN.MTD_HEADER, mtd_headers, CN.MTD_HEADER_KEYS,
+                                     CN.MTD_HEADER_ID)
+
             mtd_headers.obs_valid = pd.to_datetime(mtd_headers.obs_valid, errors='coerce')
 
         except (RuntimeError, TypeError, NameError, KeyError):
             logging.error("*** %s in write_mtd_sql write MTD headers ***", sys.exc_info()[0])
+            RunSql.release_lock(CN.MTD_HEADER, sql_cur)
 
         try:
             # --------------------
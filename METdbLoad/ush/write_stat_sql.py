@@ -19,8 +19,10 @@ import sys
 import logging
 import time
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
+import pymysql
 
 import constants as CN
 
@@ -34,8 +36,11 @@ class WriteStatSql:
     """
 
     @staticmethod
-    def write_stat_data(load_flags, stat_data, tmp_dir, sql_cur, local_infile):
+    def write_stat_data(load_flags, stat_data, tmp_dir, sql_cur, local_infile,
+                        header_cache=None, sql_pool=None):
         """ write stat files (MET and VSDB) to a SQL database.
+            header_cache keeps the ids of headers found or written by earlier sets.
+            With a sql_pool of more than one connection, line types are written in parallel.
             Returns:
                N/A
         """
@@ -61,30 +66,42 @@ class WriteStatSql:
             # At first, we do not know if the headers already exist, so we have no keys
             stat_headers[CN.STAT_HEADER_ID] = CN.NO_KEY
 
+            # another load may be writing the same headers, wait until it is done
+            sql_met.get_lock(CN.STAT_HEADER, sql_cur)
+
             # get the next valid stat header id. Set it to zero (first valid id) if no records yet
-            next_header_id = sql_met.get_next_id(CN.STAT_HEADER, CN.STAT_HEADER_ID, sql_cur)
+            next_header_id = sql_met.get_next_id(CN.STAT_HEADER, CN.STAT_HEADER_ID, sql_cur,
+                                                 len(stat_headers.index))
 
             # if the flag is set to check for duplicate headers, get ids from existing headers
             if load_flags["stat_header_db_check"]:
 
-                # For each header, query with unique fields to try to find a match in the database
-                for row_num, data_line in stat_headers.iterrows():
-                    sql_cur.execute(CN.Q_HEADER, data_line.values[1:-1].tolist())
-                    result = sql_cur.fetchone()
-
-                    # If you find a match, put the key into the stat_headers dataframe
-                    if sql_cur.rowcount > 0:
-                        stat_headers.loc[stat_headers.index[row_num], CN.STAT_HEADER_ID] = result[0]
-                    else:
-                        stat_headers.loc[stat_headers.index[row_num], CN.STAT_HEADER_ID] = \
-                            row_num + next_header_id
-            else:
-                # When all new headers, add the next id to the row number/index to make a new key
-                stat_headers.loc[stat_headers.stat_header_id == CN.NO_KEY, CN.STAT_HEADER_ID] = \
-                    stat_headers.index + next_header_id
+                existing_headers = {}
+                if header_cache is not None:
+                    existing_headers = header_cache.get_ids(CN.STAT_HEADER, stat_headers,
+                                                            CN.STAT_HEADER_KEYS[1:])
+
+                # Match all of the headers not in the cache against the database at once
+                db_headers = stat_headers[~stat_headers.index.isin(list(existing_headers))]
+                if not db_headers.empty:
+                    existing_headers.update(
+                        WriteStatSql.get_existing_headers(db_headers[CN.STAT_HEADER_KEYS],
+                                                          tmp_dir, sql_cur, local_infile))
+
+                # Use the key of a match
+                stat_headers[CN.STAT_HEADER_ID] = \
+                    stat_headers.index.to_series().map(existing_headers). \
+                    fillna(CN.NO_KEY).astype('int64')
+
+            # Headers without a match are new, add the next id to the row number to make a key.
+            # Ids from a block are not the largest in the table, so new headers are marked by
+            # having no match rather than by comparing ids with next_header_id
+            new_rows = stat_headers[CN.STAT_HEADER_ID] == CN.NO_KEY
+            stat_headers.loc[new_rows, CN.STAT_HEADER_ID] = \
+                stat_headers.index[new_rows] + next_header_id
 
             # get just the new headers with their keys
-            new_headers = stat_headers[stat_headers[CN.STAT_HEADER_ID] > (next_header_id - 1)]
+            new_headers = stat_headers[new_rows]
             logging.info("New headers: %s rows", str(len(new_headers.index)))
 
             # Write any new headers out to the sql database
@@ -92,6 +109,13 @@ class WriteStatSql:
                 sql_met.write_to_sql(new_headers, CN.STAT_HEADER_FIELDS, CN.STAT_HEADER,
                                      CN.INS_HEADER, tmp_dir, sql_cur, local_infile)
 
+            sql_met.release_lock(CN.STAT_HEADER, sql_cur)
+
+            # keep the ids for the next set of files
+            if header_cache is not None and load_flags["stat_header_db_check"]:
+                header_cache.add_ids(CN.STAT_HEADER, stat_headers, CN.STAT_HEADER_KEYS[1:],
+                                     CN.STAT_HEADER_ID)
+
             # put the header ids back into the dataframe of all the line data
             stat_data = pd.merge(left=stat_data, right=stat_headers, on=CN.STAT_HEADER_KEYS[1:])
             # Merging with limited keys renames the version column, change it back
@@ -103,6 +127,7 @@ class WriteStatSql:
 
         except (RuntimeError, TypeError, NameError, KeyError):
             logging.error("*** %s in top half of write_stat_data ***", sys.exc_info()[0])
+            RunSql.release_lock(CN.STAT_HEADER, sql_cur)
 
         try:
 
@@ -112,182 +137,21 @@ class WriteStatSql:
 
             # find all of the line types in the data
             line_types = stat_data.line_type.unique()
-            line_data = pd.DataFrame()
-
-            # process one kind of line data at a time
-            for line_type in line_types:
-
-                all_var = pd.DataFrame()
-                list_var = []
-
-                # use the UC line type to index into the list of table names
-                line_table = CN.LINE_TABLES[CN.UC_LINE_TYPES.index(line_type)]
-
-                # get the line data of just this type and re-index
-                line_data = stat_data[stat_data[CN.LINE_TYPE] == line_type].copy()
-                line_data = line_data.reset_index(drop=True)
-                logging.info("%s: %s rows", line_type, str(len(line_data.index)))
-
-                # change all Not Available values to METviewer not available (-9999)
-                line_data = line_data.replace(CN.NOTAV, CN.MV_NOTAV)
-
-                # Only variable length lines have a line_data_id
-                if line_type in CN.VAR_LINE_TYPES:
-                    # Get next valid line data id. Set it to zero (first valid id) if no records yet
-                    next_line_id = \
-                        sql_met.get_next_id(line_table, CN.LINE_DATA_ID, sql_cur)
-                    logging.debug("next_line_id is %s", next_line_id)
-
-                    # try to keep order the same as MVLoad
-                    line_data = line_data.sort_values(by=[CN.DATA_FILE_ID, CN.LINE_NUM],
-                                                      ignore_index=True).copy()
-
-                    line_data[CN.LINE_DATA_ID] = line_data.index + next_line_id
-
-                    # index of the first column of the repeating variables
-                    var_index = line_data.columns.get_loc(CN.LINE_VAR_COUNTER[line_type]) + 1
-
-                    # There are 10 extra variables after n_thresh in PSTD records
-                    if line_type == CN.PSTD:
-                        var_index = var_index + 10
-
-                    # need this later for old RHIST
-                    orig_index = var_index
-
-                    # process each variable line one at a time for different versions
-                    for row_num, file_line in line_data.iterrows():
-                        # how many sets of repeating variables
-                        var_count = int(file_line[CN.LINE_VAR_COUNTER[line_type]])
-                        # these two variable line types are one group short
-                        if line_type in [CN.PJC, CN.PRC]:
-                            var_count = var_count - 1
-
-                        # VSDB and STAT values for sets of repeating vars may be different
-                        if line_type == 'CN.ECLV':
-                            var_count = var_index - 1
-
-                        # reset to original value
-                        var_index = orig_index
-
-                        # older versions of RHIST have varying ECNT data in them
-                        if line_type == CN.RHIST and file_line[CN.VERSION] in CN.RHIST_OLD:
-                            var_count = int(file_line['3'])
-                            var_index = orig_index + 2
-                            if file_line[CN.VERSION] in CN.RHIST_5:
-                                var_index = var_index + 1
-                            if file_line[CN.VERSION] in CN.RHIST_6:
-                                var_index = var_index + 2
-
-                        # MCTC needs an i and a j counter
-                        if line_type == CN.MCTC:
-                            basic_count = var_count
-                            var_count = var_count * var_count
-
-                        # The number of variables in the repeats
-                        var_repeats = CN.LINE_VAR_REPEATS[line_type]
-
-                        # number of sets of variables times the number of variables in the sets
-                        repeat_width = int(var_count * var_repeats)
-
-                        # If variable length record exceeds current line length, delete
-                        if repeat_width > (len(file_line) - var_index):
-                            file_name = sql_met.get_file_name(file_line[CN.DATA_FILE_ID], sql_cur)
-                            logging.error('*** Variable length record from file %s line %s '
-                                          'type %s deleted as longer than %s ***',
-                                          file_name, row_num, line_type, CN.MAX_COL + 25)
-                            line_data.drop(line_data[line_data.line_data_id == row_num].index,
-                                           inplace=True)
-                        else:
-                            # pull out just the repeating data
-                            list_var_data = file_line.iloc[var_index:var_index + repeat_width]
-                            # put it into the right number of rows and columns
-                            var_data = \
-                                pd.DataFrame(list_var_data.values.reshape(var_count, var_repeats))
-
-                            # for older versions of RHIST, blank out repeating fields in line data
-                            if line_type == CN.RHIST and file_line[CN.VERSION] in CN.RHIST_OLD:
-                                line_data.iloc[row_num, var_index:var_index + repeat_width] = \
-                                    CN.MV_NOTAV
-
-                            # for stat file versions of PSTD, blank out variable fields in line data
-                            if line_type == CN.PSTD and file_line[CN.VERSION] != 'V01':
-                                line_data.iloc[row_num, var_index:var_index + repeat_width] = \
-                                    CN.MV_NOTAV
-
-                            # add on the first two fields - line data id, and i value
-                            var_data.insert(0, CN.LINE_DATA_ID, file_line[CN.LINE_DATA_ID])
-                            var_data.insert(1, 'i_value', var_data.index + 1)
-
-                            # MCTC has i and j counters where j increments faster
-                            if line_type == CN.MCTC:
-                                var_data.loc[:, 'i_value'] = \
-                                    np.repeat(np.array(range(1, basic_count + 1)), basic_count)
-                                j_indices = np.resize(range(1, basic_count + 1), var_count)
-                                var_data.insert(2, 'j_value', j_indices)
-
-
-                                # Fill in ec_value if missing - 1/n_cat
-                                if pd.isna(line_data.iloc[row_num, var_index + repeat_width]):
-                                    line_data.iloc[row_num, var_index + repeat_width] = \
-                                        1/line_data.iloc[row_num, var_index - 1]
-
-                                # Move field (ec_value) that was added later back to end of main line
-                                line_data.iloc[row_num, var_index] = \
-                                    line_data.iloc[row_num, var_index + repeat_width]
-
-                            if line_type == CN.ORANK:
-                                # move the values after the variable length data to the left
-                                var_end = var_index + repeat_width
-                                line_data.iloc[row_num, var_index:var_index + 7] = \
-                                    line_data.iloc[row_num, var_end:var_end + 7].values
-
-                            # collect all of the variable data for a line type
-                            list_var.append(var_data)
-
-                    # end for row_num, file_line
-                    if list_var:
-                        all_var = pd.concat(list_var, ignore_index=True, sort=False)
-                        list_var = []
-
-                    if line_type == CN.RHIST:
-                        # copy the RHIST columns and create ECNT lines from them
-                        line_data2 = line_data[line_data[CN.VERSION].isin(CN.RHIST_OLD)].copy()
-                        if not line_data2.empty:
-                            line_data2.line_type = CN.ECNT
-
-                            # put the fields in the correct order for ECNT
-                            line_data2 = \
-                                line_data2.rename(columns={'1': '2', '2': '4',
-                                                           '3': '1', '4': '3',
-                                                           '5': '7', '7': '5'})
-
-                            # Write out the ECNT lines created from old RHIST lines
-                            sql_met.write_to_sql(line_data2, CN.LINE_DATA_COLS[CN.ECNT],
-                                                 CN.LINE_TABLES[CN.UC_LINE_TYPES.index(CN.ECNT)],
-                                                 CN.LINE_DATA_Q[CN.ECNT],
-                                                 tmp_dir, sql_cur, local_infile)
-                            line_data2 = line_data2.iloc[0:0]
-
-                            # copy the value of n_rank two columns earlier for old RHIST
-                            line_data.loc[line_data[CN.VERSION].isin(CN.RHIST_OLD), '1'] = \
-                                line_data['3']
-
-                # write the lines out to a CSV file, and then load them into database
-                if not line_data.empty:
-                    sql_met.write_to_sql(line_data, CN.LINE_DATA_COLS[line_type], line_table,
-                                         CN.LINE_DATA_Q[line_type], tmp_dir, sql_cur, local_infile)
-                    line_data = line_data.iloc[0:0]
-
-                # if there are variable length records, write them out also
-                if not all_var.empty:
-                    all_var.columns = CN.LINE_DATA_VAR_FIELDS[line_type]
-                    sql_met.write_to_sql(all_var, CN.LINE_DATA_VAR_FIELDS[line_type],
-                                         CN.LINE_DATA_VAR_TABLES[line_type],
-                                         CN.LINE_DATA_VAR_Q[line_type],
-                                         tmp_dir, sql_cur, local_infile)
-                    all_var = all_var.iloc[0:0]
-
-            # end for line_type
+
+            if sql_pool is not None and sql_pool.pool_size > 1 and len(line_types) > 1:
+                # each line type has its own tables, so write several at once,
+                # each thread with its own connection from the pool
+                thread_types = WriteStatSql.split_line_types(stat_data, line_types,
+                                                             sql_pool.pool_size)
+                with ThreadPoolExecutor(max_workers=sql_pool.pool_size) as executor:
+                    futures = [executor.submit(WriteStatSql.write_pool_line_types, types,
+                                               stat_data, tmp_dir, sql_pool, local_infile)
+                               for types in thread_types if types]
+                    for future in futures:
+                        future.result()
+            else:
+                WriteStatSql.write_line_types(line_types, stat_data, tmp_dir, sql_cur,
+                                              local_infile)
 
             # write out line_data_perc records
             if CN.FCST_PERC in stat_data:
@@ -310,3 +174,308 @@ class WriteStatSql:
         logging.info("    >>> Write time Stat: %s", str(write_time))
 
         logging.debug("[--- End write_stat_data ---]")
+
+    @staticmethod
+    def write_line_types(line_types, stat_data, tmp_dir, sql_cur, local_infile):
+        """ write the line data of the given line types, one line type at a time.
+            Returns:
+               N/A
+        """
+
+        sql_met = RunSql()
+        line_data = pd.DataFrame()
+
+        # process one kind of line data at a time
+        for line_type in line_types:
+
+            all_var = pd.DataFrame()
+
+            # use the UC line type to index into the list of table names
+            line_table = CN.LINE_TABLES[CN.UC_LINE_TYPES.index(line_type)]
+
+            # get the line data of just this type and re-index
+            # variable length lines are taken sorted, to keep order the same as MVLoad,
+            # so that the rows are copied once and then changed in place
+            type_rows = np.flatnonzero(stat_data[CN.LINE_TYPE] == line_type)
+            if line_type in CN.VAR_LINE_TYPES:
+                type_rows = type_rows[np.lexsort(
+                    (stat_data[CN.LINE_NUM].to_numpy()[type_rows],
+                     stat_data[CN.DATA_FILE_ID].to_numpy()[type_rows]))]
+            line_data = stat_data.take(type_rows)
+            line_data.reset_index(drop=True, inplace=True)
+            logging.info("%s: %s rows", line_type, str(len(line_data.index)))
+
+            # Only variable length lines have a line_data_id
+            if line_type in CN.VAR_LINE_TYPES:
+                # Get next valid line data id. Set it to zero (first valid id) if no records yet
+                next_line_id = \
+                    sql_met.get_next_id(line_table, CN.LINE_DATA_ID, sql_cur,
+                                        len(line_data.index))
+                logging.debug("next_line_id is %s", next_line_id)
+
+                line_data[CN.LINE_DATA_ID] = line_data.index + next_line_id
+
+            # change all Not Available values to METviewer not available (-9999)
+            line_data.replace(CN.NOTAV, CN.MV_NOTAV, inplace=True)
+
+            if line_type in CN.VAR_LINE_TYPES:
+                # split out the repeating variables, a block of lines at a time
+                line_data, all_var = \
+                    WriteStatSql.get_var_data(line_type, line_data, sql_met, sql_cur)
+
+                if line_type == CN.RHIST:
+                    # copy the RHIST columns and create ECNT lines from them
+                    line_data2 = line_data[line_data[CN.VERSION].isin(CN.RHIST_OLD)].copy()
+                    if not line_data2.empty:
+                        line_data2.line_type = CN.ECNT
+
+                        # put the fields in the correct order for ECNT
+                        line_data2 = \
+                            line_data2.rename(columns={'1': '2', '2': '4',
+                                                       '3': '1', '4': '3',
+                                                       '5': '7', '7': '5'})
+
+                        # Write out the ECNT lines created from old RHIST lines
+                        sql_met.write_to_sql(line_data2, CN.LINE_DATA_COLS[CN.ECNT],
+                                             CN.LINE_TABLES[CN.UC_LINE_TYPES.index(CN.ECNT)],
+                                             CN.LINE_DATA_Q[CN.ECNT],
+                                             tmp_dir, sql_cur, local_infile)
+                        line_data2 = line_data2.iloc[0:0]
+
+                        # copy the value of n_rank two columns earlier for old RHIST
+                        line_data.loc[line_data[CN.VERSION].isin(CN.RHIST_OLD), '1'] = \
+                            line_data['3']
+
+            # write the lines out to a CSV file, and then load them into database
+            if not line_data.empty:
+                sql_met.write_to_sql(line_data, CN.LINE_DATA_COLS[line_type], line_table,
+                                     CN.LINE_DATA_Q[line_type], tmp_dir, sql_cur, local_infile)
+                line_data = line_data.iloc[0:0]
+
+            # if there are variable length records, write them out also
+            if not all_var.empty:
+                all_var.columns = CN.LINE_DATA_VAR_FIELDS[line_type]
+                sql_met.write_to_sql(all_var, CN.LINE_DATA_VAR_FIELDS[line_type],
+                                     CN.LINE_DATA_VAR_TABLES[line_type],
+                                     CN.LINE_DATA_VAR_Q[line_type],
+                                     tmp_dir, sql_cur, local_infile)
+                all_var = all_var.iloc[0:0]
+
+    # end for line_type
+
+    @staticmethod
+    def write_pool_line_types(line_types, stat_data, tmp_dir, sql_pool, local_infile):
+        """ write the line data of the given line types with a connection from the pool.
+            Returns:
+               N/A
+        """
+        try:
+            WriteStatSql.write_line_types(line_types, stat_data, tmp_dir, sql_pool.cursor(),
+                                          local_infile)
+        finally:
+            sql_pool.release()
+
+    @staticmethod
+    def split_line_types(stat_data, line_types, num_threads):
+        """ share out the line types among the threads, largest first to the thread
+            with the fewest lines so far, so that the threads finish at about the same time.
+            Returns:
+               list of lists of line types, one list for each thread
+        """
+        type_counts = stat_data.line_type.value_counts()
+        thread_types = [[] for _ in range(num_threads)]
+        thread_lines = [0] * num_threads
+
+        for line_type in sorted(line_types, key=lambda lt: -type_counts[lt]):
+            thread_num = thread_lines.index(min(thread_lines))
+            thread_types[thread_num].append(line_type)
+            thread_lines[thread_num] += type_counts[line_type]
+
+        return thread_types
+
+    @staticmethod
+    def get_existing_headers(stat_headers, tmp_dir, sql_cur, local_infile):
+        """ stage the candidate headers in a temporary table and join it to stat_header,
+            instead of querying for each header one at a time. If the temporary table
+            cannot be used, e.g. without permission to create one, query for each header.
+            Returns:
+               dictionary of stat_headers row number to existing stat_header_id
+        """
+
+        existing_headers = {}
+
+        try:
+            # the row number goes in stat_header_id to tie each match back to its header
+            tmp_headers = stat_headers.copy()
+            tmp_headers[CN.STAT_HEADER_ID] = tmp_headers.index
+
+            sql_cur.execute(CN.DROP_TMP_HEADER)
+            sql_cur.execute(CN.CREATE_TMP_HEADER)
+            RunSql.write_to_sql(tmp_headers, CN.STAT_HEADER_FIELDS, CN.TMP_STAT_HEADER,
+                                CN.INS_TMP_HEADER, tmp_dir, sql_cur, local_infile)
+
+            sql_cur.execute(CN.Q_HEADERS)
+            existing_headers = dict(sql_cur.fetchall())
+
+        except pymysql.Error as sql_err:
+            logging.warning("!!! Could not match headers with %s, querying each header: %s",
+                            CN.TMP_STAT_HEADER, sql_err)
+            existing_headers = WriteStatSql.query_each_header(stat_headers, sql_cur)
+
+        except (RuntimeError, TypeError, NameError, KeyError):
+            logging.error("*** %s in write_stat_sql get_existing_headers ***", sys.exc_info()[0])
+
+        finally:
+            sql_cur.execute(CN.DROP_TMP_HEADER)
+
+        return existing_headers
+
+    @staticmethod
+    def query_each_header(stat_headers, sql_cur):
+        """ query stat_header with the unique fields of each header to try to find a match
+            Returns:
+               dictionary of stat_headers row number to existing stat_header_id
+        """
+
+        existing_headers = {}
+
+        for row_num, data_line in stat_headers[CN.STAT_HEADER_KEYS[1:]].iterrows():
+            sql_cur.execute(CN.Q_HEADER, data_line.values.tolist())
+            result = sql_cur.fetchone()
+
+            # If you find a match, keep its key
+            if sql_cur.rowcount > 0:
+                existing_headers[row_num] = result[0]
+
+        return existing_headers
+
+    @staticmethod
+    def get_var_data(line_type, line_data, sql_met, sql_cur):
+        """ pull the repeating variables out of variable length lines. Lines with the same
+            number of repeats starting in the same column are reshaped together.
+            Returns:
+               line data with the repeating fields handled, and the variable data
+        """
+
+        all_var = pd.DataFrame()
+        list_var = []
+
+        # index of the first column of the repeating variables
+        orig_index = line_data.columns.get_loc(CN.LINE_VAR_COUNTER[line_type]) + 1
+
+        # There are 10 extra variables after n_thresh in PSTD records
+        if line_type == CN.PSTD:
+            orig_index = orig_index + 10
+
+        # The number of variables in the repeats
+        var_repeats = CN.LINE_VAR_REPEATS[line_type]
+
+        # how many sets of repeating variables, and where they start, for each line
+        var_counts = line_data[CN.LINE_VAR_COUNTER[line_type]].astype('int64').to_numpy()
+        var_indexes = np.full(len(line_data.index), orig_index)
+
+        # these two variable line types are one group short
+        if line_type in [CN.PJC, CN.PRC]:
+            var_counts = var_counts - 1
+
+        # older versions of RHIST have varying ECNT data in them
+        old_rhist = np.zeros(len(line_data.index), dtype=bool)
+        if line_type == CN.RHIST:
+            old_rhist = line_data[CN.VERSION].isin(CN.RHIST_OLD).to_numpy()
+            var_counts[old_rhist] = line_data.loc[old_rhist, '3'].astype('int64').to_numpy()
+            var_indexes[old_rhist] = orig_index + 2
+            var_indexes[old_rhist & line_data[CN.VERSION].isin(CN.RHIST_5).to_numpy()] += 1
+            var_indexes[old_rhist & line_data[CN.VERSION].isin(CN.RHIST_6).to_numpy()] += 2
+
+        # MCTC needs an i and a j counter
+        basic_counts = var_counts
+        if line_type == CN.MCTC:
+            var_counts = basic_counts * basic_counts
+
+        # number of sets of variables times the number of variables in the sets
+        repeat_widths = var_counts * var_repeats
+
+        # If variable length record exceeds current line length, delete
+        too_long = repeat_widths > (len(line_data.columns) - var_indexes)
+        for row_num in np.flatnonzero(too_long):
+            file_name = sql_met.get_file_name(line_data[CN.DATA_FILE_ID].iloc[row_num], sql_cur)
+            logging.error('*** Variable length record from file %s line %s '
+                          'type %s deleted as longer than %s ***',
+                          file_name, row_num, line_type, CN.MAX_COL + 25)
+
+        # the repeating data is taken from the lines before any fields are moved
+        line_values = line_data.values
+        line_data_ids = line_data[CN.LINE_DATA_ID].to_numpy()
+        versions = line_data[CN.VERSION].to_numpy()
+
+        line_groups = pd.DataFrame({'var_index': var_indexes, 'basic_count': basic_counts})
+        for (var_index, basic_count), group_rows in \
+                line_groups[~too_long].groupby(['var_index', 'basic_count']).groups.items():
+
+            rows = group_rows.to_numpy()
+            var_count = var_counts[rows[0]]
+            repeat_width = repeat_widths[rows[0]]
+
+            if var_count > 0:
+                # pull out just the repeating data, in the right number of rows and columns
+                var_data = \
+                    pd.DataFrame(line_values[rows, var_index:var_index + repeat_width].
+                                 reshape(len(rows) * var_count, var_repeats))
+
+                # add on the first two fields - line data id, and i value
+                var_data.insert(0, CN.LINE_DATA_ID, np.repeat(line_data_ids[rows], var_count))
+                var_data.insert(1, 'i_value', np.tile(np.arange(1, var_count + 1), len(rows)))
+
+                # MCTC has i and j counters where j increments faster
+                if line_type == CN.MCTC:
+                    var_data.loc[:, 'i_value'] = \
+                        np.tile(np.repeat(np.arange(1, basic_count + 1), basic_count), len(rows))
+                    j_indices = np.resize(np.arange(1, basic_count + 1), var_count)
+                    var_data.insert(2, 'j_value', np.tile(j_indices, len(rows)))
+
+                # remember which line the variables came from, to put them in line order
+                var_data['var_row'] = np.repeat(rows, var_count)
+
+                # collect all of the variable data for a line type
+                list_var.append(var_data)
+
+            # for older versions of RHIST, blank out repeating fields in line data
+            # for stat file versions of PSTD, blank out variable fields in line data
+            if line_type == CN.RHIST:
+                blank_rows = rows[old_rhist[rows]]
+            elif line_type == CN.PSTD:
+                blank_rows = rows[versions[rows] != 'V01']
+            else:
+                blank_rows = rows[:0]
+            if len(blank_rows) > 0 and repeat_width > 0:
+                line_data.iloc[blank_rows, var_index:var_index + repeat_width] = CN.MV_NOTAV
+
+            if line_type == CN.MCTC:
+                # Fill in ec_value if missing - 1/n_cat
+                ec_values = line_data.iloc[rows, var_index + repeat_width]
+                for row_num in rows[pd.isna(ec_values).to_numpy()]:
+                    line_data.iloc[row_num, var_index + repeat_width] = \
+                        1/line_data.iloc[row_num, var_index - 1]
+
+                # Move field (ec_value) that was added later back to end of main line
+                line_data.iloc[rows, var_index] = \
+                    line_data.iloc[rows, var_index + repeat_width].values
+
+            if line_type == CN.ORANK:
+                # move the values after the variable length data to the left
+                var_end = var_index + repeat_width
+                line_data.iloc[rows, var_index:var_index + 7] = \
+                    line_data.iloc[rows, var_end:var_end + 7].values
+
+        # delete the records that were too long
+        if too_long.any():
+            line_data.drop(line_data[line_data.line_data_id.isin(np.flatnonzero(too_long))].index,
+                           inplace=True)
+
+        if list_var:
+            # put the variables back in line order, keeping the order of the repeats
+            all_var = pd.concat(list_var, ignore_index=True, sort=False)
+            all_var = all_var.iloc[np.argsort(all_var['var_row'].to_numpy(), kind='stable')]
+            all_var = all_var.drop(columns='var_row').reset_index(drop=True)
+
+        return line_data, all_var
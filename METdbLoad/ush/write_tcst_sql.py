@@ -34,8 +34,10 @@ class WriteTcstSql:
     """
 
     @staticmethod
-    def write_tcst_data(load_flags, tcst_data, tmp_dir, sql_cur, local_infile):
+    def write_tcst_data(load_flags, tcst_data, tmp_dir, sql_cur, local_infile,
+                        header_cache=None):
         """ write tcst files to a SQL database.
+            header_cache keeps the ids of headers found or written by earlier sets.
             Returns:
                N/A
         """
@@ -61,30 +63,42 @@ class WriteTcstSql:
             # At first, we do not know if the headers already exist, so we have no keys
             tcst_headers[CN.TCST_HEADER_ID] = CN.NO_KEY
 
+            # another load may be writing the same headers, wait until it is done
+            sql_met.get_lock(CN.TCST_HEADER, sql_cur)
+
             # get the next valid tcst header id. Set it to zero (first valid id) if no records yet
-            next_header_id = sql_met.get_next_id(CN.TCST_HEADER, CN.TCST_HEADER_ID, sql_cur)
+            next_header_id = sql_met.get_next_id(CN.TCST_HEADER, CN.TCST_HEADER_ID, sql_cur,
+                                                 len(tcst_headers.index))
 
             # if the flag is set to check for duplicate headers, get ids from existing headers
             if load_flags["tcst_header_db_check"]:
 
+                cached_headers = {}
+                if header_cache is not None:
+                    cached_headers = header_cache.get_ids(CN.TCST_HEADER, tcst_headers,
+                                                          CN.TCST_HEADER_KEYS[1:])
+
                 # For each header, query with unique fields to try to find a match in the database
                 for row_num, data_line in tcst_headers.iterrows():
+                    # headers found or written by earlier sets do not need a query
+                    if row_num in cached_headers:
+                        tcst_headers.loc[tcst_headers.index[row_num], CN.TCST_HEADER_ID] = \
+                            cached_headers[row_num]
+                        continue
                     sql_cur.execute(CN.Q_HEADER_TCST, data_line.values[1:-1].tolist())
                     result = sql_cur.fetchone()
 
                     # If you find a match, put the key into the tcst_headers dataframe
                     if sql_cur.rowcount > 0:
                         tcst_headers.loc[tcst_headers.index[row_num], CN.TCST_HEADER_ID] = result[0]
-                    else:
-                        tcst_headers.loc[tcst_headers.index[row_num], CN.TCST_HEADER_ID] = \
-                            row_num + next_header_id
-            else:
-                # When all new headers, add the next id to the row number/index to make a new key
-                tcst_headers.loc[tcst_headers.tcst_header_id == CN.NO_KEY, CN.TCST_HEADER_ID] = \
-                    tcst_headers.index + next_header_id
+
+            # Headers without a match are new, add the next id to the row number to make a key
+            new_rows = tcst_headers[CN.TCST_HEADER_ID] == CN.NO_KEY
+            tcst_headers.loc[new_rows, CN.TCST_HEADER_ID] = \
+                tcst_headers.index[new_rows] + next_header_id
 
             # get just the new headers with their keys
-            new_headers = tcst_headers[tcst_headers[CN.TCST_HEADER_ID] > (next_header_id - 1)]
+            new_headers = tcst_headers[new_rows]
             logging.info("New headers: %s rows", str(len(new_headers.index)))
 
             # Write any new headers out to the sql database
@@ -92,6 +106,13 @@ class WriteTcstSql:
                 sql_met.write_to_sql(new_headers, CN.TCST_HEADER_FIELDS, CN.TCST_HEADER,
                                      CN.INS_HEADER_TCST, tmp_dir, sql_cur, local_infile)
 
+            sql_met.release_lock(CN.TCST_HEADER, sql_cur)
+
+            # keep the ids for the next set of files
+            if header_cache is not None and load_flags["tcst_header_db_check"]:
+                header_cache.add_ids(CN.TCST_HEADER, tcst_headers, CN.TCST_HEADER_KEYS[1:],
+                                     CN.TCST_HEADER_ID)
+
             # put the header ids back into the dataframe of all the line data
             tcst_data = pd.merge(left=tcst_data, right=tcst_headers, on=CN.TCST_HEADER_KEYS[1:])
             # Merging with limited keys renames the version column, change it back
@@ -103,6 +124,7 @@ class WriteTcstSql:
 
         except (RuntimeError, TypeError, NameError, KeyError):
             logging.error("*** %s in write_tcst_data write tcst headers ***", sys.exc_info()[0])
+            RunSql.release_lock(CN.TCST_HEADER, sql_cur)
 
         try:
 
@@ -141,7 +163,8 @@ class WriteTcstSql:
                 if line_type in CN.VAR_LINE_TYPES_TCST:
                     # Get next valid line data id. Set it to zero (first valid id) if no records yet
                     next_line_id = \
-                        sql_met.get_next_id(line_table, CN.LINE_DATA_ID, sql_cur)
+                        sql_met.get_next_id(line_table, CN.LINE_DATA_ID, sql_cur,
+                                            len(line_data.index))
                     logging.debug("next_line_id is %s", next_line_id)
 
                     # try to keep order the same as MVLoad